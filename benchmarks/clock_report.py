@@ -0,0 +1,38 @@
+"""
+Time clock reports over the sessions of a synthetic notebook.
+
+Usage:
+    python benchmarks/clock_report.py --notes 20000 --tasks 8
+"""
+import argparse
+import tempfile
+import time
+
+from synthetic import make_notebook
+from zettel.clock import GROUPS, ClockLog
+from zettel.notebook import Notebook
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=20_000)
+    parser.add_argument("--tasks", type=int, default=8, help="Average task lines per note")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dir:
+        make_notebook(dir, args.notes, tasks=args.tasks)
+        start = time.perf_counter()
+        sum(1 for _ in Notebook(dir).find_tasks())
+        print(f"cold task index  {time.perf_counter() - start:>8.3f} s")
+
+        start = time.perf_counter()
+        log = ClockLog.from_index(dir)
+        print(f"load {len(log)} sessions  {time.perf_counter() - start:>8.3f} s")
+        for by in GROUPS:
+            start = time.perf_counter()
+            rows = log.report(by)
+            print(f"report --by {by:<8}  {time.perf_counter() - start:>8.3f} s  ({len(rows)} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Per-note parse time of python-frontmatter against zettel.flatyaml on the
+flat frontmatter that zt writes.
+
+Usage:
+    python benchmarks/frontmatter_parse.py --notes 5000
+"""
+import argparse
+import random
+import time
+
+import frontmatter
+
+from synthetic import note_content
+from zettel import flatyaml
+
+
+def per_note(parse, documents):
+    start = time.perf_counter()
+    for text in documents:
+        parse(text)
+    return (time.perf_counter() - start) / len(documents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=5_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    documents = [note_content(rng, body_lines=2) for _ in range(args.notes)]
+
+    reference = per_note(frontmatter.loads, documents)
+    fast = per_note(flatyaml.loads, documents)
+    print(f"python-frontmatter: {reference * 1e6:8.1f} us/note")
+    print(f"zettel.flatyaml:    {fast * 1e6:8.1f} us/note")
+    print(f"speedup:            {reference / fast:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Trigram fuzzy matching over synthetic note titles and tags.
+
+Usage:
+    python benchmarks/fuzzy_find.py --titles 100000 --queries 500
+"""
+import argparse
+import random
+import time
+
+from synthetic import TAGS, vocabulary
+from zettel.fuzzy import TrigramIndex
+
+
+def typo(rng, word):
+    if len(word) < 4:
+        return word
+    position = rng.randrange(len(word))
+    return word[:position] + word[position + 1 :]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--titles", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words, cum_weights = vocabulary(args.titles // 5)
+    texts = [
+        " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(2, 7)) + rng.sample(TAGS, rng.randint(0, 3)))
+        for _ in range(args.titles)
+    ]
+
+    start = time.perf_counter()
+    index = TrigramIndex.build(texts)
+    print(f"build             {time.perf_counter() - start:>8.3f} s")
+    blob = index.dumps()
+    start = time.perf_counter()
+    index = TrigramIndex.loads(blob)
+    print(f"load from cache   {time.perf_counter() - start:>8.3f} s  ({len(blob) / 1e6:.1f} MB)")
+
+    queries = [
+        " ".join(typo(rng, word) for word in rng.choice(texts).split()[: rng.randint(1, 3)])
+        for _ in range(args.queries)
+    ]
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query, args.top)
+    elapsed = time.perf_counter() - start
+    print(f"{len(queries)} queries       {elapsed:>8.3f} s  ({len(queries) / elapsed:.0f} per second)")
+
+
+if __name__ == "__main__":
+    main()
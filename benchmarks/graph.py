@@ -0,0 +1,64 @@
+"""
+Wikilink graph metrics and PageRank over a synthetic link index.
+
+Usage:
+    python benchmarks/graph.py --notes 100000 --links 1000000
+
+The notes and links are inserted straight into the index tables, so this
+times building the graph and the metrics, not scanning note files.
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from zettel.graph import Graph
+from zettel.index import NoteIndex
+
+
+def fill(index, notes, links, rng):
+    ids = [f"2024{n:010d}" for n in range(notes)]
+    # A few targets are missing notes, and links favour older notes.
+    existing = ids[: notes - notes // 200]
+    with index.conn:
+        index.conn.executemany(
+            "INSERT INTO notes VALUES (?, ?, ?, '', NULL, ?, ?, 1)",
+            [(f"Reference/{id}.md", id, id, id, n) for n, id in enumerate(existing)],
+        )
+        keys = index._note_keys(ids)
+        index.conn.executemany(
+            "INSERT INTO links VALUES (?, ?, 'x', 1, NULL)",
+            [
+                (keys[existing[int(len(existing) * rng.random() ** 2)]], keys[ids[int(notes * rng.random() ** 3)]])
+                for _ in range(links)
+            ],
+        )
+
+
+def timed(label, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{label:<18}{time.perf_counter() - start:>8.3f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=100_000)
+    parser.add_argument("--links", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dir, NoteIndex(dir) as index:
+        fill(index, args.notes, args.links, random.Random(0))
+        start = time.perf_counter()
+        graph = timed("build", lambda: Graph.from_index(index))
+        timed("reverse", graph.reverse)
+        timed("orphans", graph.orphans)
+        timed("hubs", graph.hubs)
+        timed("components", graph.components)
+        timed("pagerank", graph.pagerank)
+        print(f"{'total':<18}{time.perf_counter() - start:>8.3f} s  ({graph!r})")
+
+
+if __name__ == "__main__":
+    main()
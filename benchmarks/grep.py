@@ -0,0 +1,47 @@
+"""
+Full-text search over the bodies of a synthetic notebook.
+
+Usage:
+    python benchmarks/grep.py --notes 50000 --lines 200
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from synthetic import make_notebook, vocabulary
+from zettel.search import grep
+
+QUERIES = ["python", "pipeline cache", "release review latency", "zz*"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=50_000)
+    parser.add_argument("--lines", type=int, default=200, help="Body lines per note")
+    parser.add_argument("--vocabulary", type=int, default=50_000, help="Distinct body words")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dir:
+        make_notebook(dir, args.notes, body_lines=args.lines, words=vocabulary(args.vocabulary))
+        size = sum(entry.stat().st_size for sub in ("Actions", "Reference") for entry in os.scandir(os.path.join(dir, sub)))
+        print(f"{args.notes} notes, {size / 1e6:.0f} MB")
+
+        start = time.perf_counter()
+        grep(dir, "python")
+        print(f"cold index        {time.perf_counter() - start:>8.3f} s")
+        index_size = os.path.getsize(os.path.join(dir, ".zettel", "index.sqlite"))
+        print(f"index size        {index_size / 1e6:>8.0f} MB")
+
+        for query in QUERIES:
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                hits = grep(dir, query)
+                best = min(best, time.perf_counter() - start)
+            print(f"grep {query!r:<26} {best:>8.3f} s  ({len(hits)} hits)")
+
+
+if __name__ == "__main__":
+    main()
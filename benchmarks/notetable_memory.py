@@ -0,0 +1,57 @@
+"""
+Compare the memory held by Notebook.notes as a NoteTable with the list of
+(id, Note) tuples it replaced.
+
+Usage:
+    python benchmarks/notetable_memory.py --notes 20000
+"""
+import argparse
+import gc
+import tempfile
+import tracemalloc
+
+from synthetic import make_notebook
+from zettel.fzf import Note, list_files
+from zettel.index import NoteIndex
+from zettel.table import NoteTable
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=20_000)
+    parser.add_argument("--body-lines", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dir:
+        make_notebook(dir, args.notes, args.body_lines)
+        files = list_files(dir)
+        with NoteIndex(dir) as index:
+            index.sync(files)
+
+        notes, list_bytes = measure(lambda: [(note.id, note) for note in (Note(f) for f in files)])
+        del notes
+
+        def build_table():
+            with NoteIndex(dir) as index:
+                return NoteTable.from_records(dir, index.records())
+
+        table, table_bytes = measure(build_table)
+
+    print(f"notes:                 {len(table):>12,}")
+    print(f"list of (id, Note):    {list_bytes / 2**20:>10.1f} MB  ({list_bytes / len(table):,.0f} B/note)")
+    print(f"NoteTable:             {table_bytes / 2**20:>10.1f} MB  ({table_bytes / len(table):,.0f} B/note)")
+    print(f"ratio:                 {list_bytes / table_bytes:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Time a cold index build of a synthetic notebook with 1, 2, 4 and 8 workers.
+
+Usage:
+    python benchmarks/parallel_load.py --notes 50000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from synthetic import make_notebook
+from zettel.fzf import list_files
+from zettel.index import NoteIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=50_000)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    os.environ["ZETTEL_CACHE"] = "0"
+    with tempfile.TemporaryDirectory() as dir:
+        make_notebook(dir, args.notes)
+        files = list_files(dir)
+        baseline = None
+        print(f"{'jobs':>4}  {'seconds':>8}  {'speedup':>7}")
+        for jobs in args.jobs:
+            start = time.perf_counter()
+            with NoteIndex(dir, jobs=jobs) as index:
+                index.sync(files)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{jobs:>4}  {elapsed:>8.2f}  {baseline / elapsed:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+p50/p99 latency of looking up the note to preview (``zt find TITLE``) with
+and without a running ``zt serve`` daemon, and of ``zt preview ID`` rendering
+a note and serving it from the cache.
+
+Usage:
+    python benchmarks/preview_latency.py --notes 20000 --runs 50
+"""
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import make_notebook
+from zettel import client
+from zettel.fzf import get_notes
+
+ZT = [sys.executable, "-c", "from zettel.cli import app; app()"]
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def time_previews(dir, titles, daemon):
+    env = {**os.environ, "ZETTEL_DAEMON": "1" if daemon else "0"}
+    samples = []
+    for title in titles:
+        start = time.perf_counter()
+        subprocess.run(ZT + ["find", "--dir", dir, title], env=env, check=True, stdout=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def time_rendered_previews(dir, ids):
+    env = {**os.environ, "ZETTEL_DAEMON": "0"}
+    samples = []
+    for id in ids:
+        start = time.perf_counter()
+        subprocess.run(ZT + ["preview", "--dir", dir, id], env=env, check=True, stdout=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def wait_for_daemon(dir, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.request(dir, "ping") is not None:
+            return
+        time.sleep(0.1)
+    raise RuntimeError("zt serve did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=20_000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dir:
+        make_notebook(dir, args.notes)
+        notes = list(get_notes(dir))
+        sample = random.Random(0).sample(notes, args.runs)
+        titles = [note.display_title for note in sample]
+        ids = [note.id for note in sample]
+
+        without = time_previews(dir, titles, daemon=False)
+        daemon = subprocess.Popen(ZT + ["serve", "--dir", dir], stderr=subprocess.DEVNULL)
+        try:
+            wait_for_daemon(dir)
+            with_daemon = time_previews(dir, titles, daemon=True)
+        finally:
+            daemon.terminate()
+            daemon.wait()
+        rendered = time_rendered_previews(dir, ids)
+        cached = time_rendered_previews(dir, ids)
+
+    print(f"{'':16}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    rows = [("in-process", without), ("zt serve", with_daemon), ("preview cold", rendered), ("preview cached", cached)]
+    for label, samples in rows:
+        print(
+            f"{label:16}{percentile(samples, 0.5) * 1e3:>10.1f}"
+            f"{percentile(samples, 0.99) * 1e3:>10.1f}{statistics.mean(samples) * 1e3:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
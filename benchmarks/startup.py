@@ -0,0 +1,87 @@
+"""
+Import-time budget for the `zt` entry point, measured with
+``python -X importtime``. Exits with status 1 when a command goes over.
+
+Budgets cover zettel's own modules (their ``self`` time), so they do not
+move with the speed of the machine's typer and rich imports; the total
+is printed alongside. Commands run with the daemon disabled.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --budget-ms 120 --runs 5  # one budget for all
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ZT = "from zettel.cli import app; app()"
+
+# (arguments, budget in ms for zettel.* modules). Baselines were 20-30 ms
+# for --help and find --id, and 35-60 ms for a title lookup, which also
+# imports the index; the budgets leave room for noisy machines.
+COMMANDS = {
+    "zt --help": (["--help"], 60),
+    "zt find --id": (["find", "--id", "20240101T101010", "--dir", "{dir}"], 60),
+    "zt find <title>": (["find", "Title", "--dir", "{dir}"], 120),
+}
+
+
+def import_times(args):
+    """Return (total_us, {module: self_us}) for one run of ``zt args``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", ZT, *args],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "ZETTEL_DAEMON": "0"},
+    )
+    total = 0
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not name.startswith("  "):
+            total += int(cumulative_us)
+        modules[name.strip()] = int(self_us)
+    return total, modules
+
+
+def zettel_time(run):
+    return sum(us for name, us in run[1].items() if name == "zettel" or name.startswith("zettel."))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget-ms", type=float, default=None)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    over = False
+    with tempfile.TemporaryDirectory() as dir:
+        note = Path(dir, "Actions", "20240101T101010.md")
+        note.parent.mkdir()
+        note.write_text("# Title\n")
+        for label, (command, budget_ms) in COMMANDS.items():
+            budget_ms = args.budget_ms or budget_ms
+            command = [part.format(dir=dir) for part in command]
+            runs = [import_times(command) for _ in range(args.runs)]
+            run = min(runs, key=zettel_time)
+            total, modules = run
+            ms = zettel_time(run) / 1000
+            status = "ok" if ms <= budget_ms else "OVER BUDGET"
+            over = over or ms > budget_ms
+            zettel = sorted(
+                ((us, name) for name, us in modules.items() if name.startswith("zettel")), reverse=True
+            )[:3]
+            detail = ", ".join(f"{name} {us / 1000:.1f}" for us, name in zettel)
+            print(
+                f"{label:18} {ms:7.1f} ms  (budget {budget_ms:.0f}, total {total / 1000:.0f})  {status}  [{detail}]"
+            )
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
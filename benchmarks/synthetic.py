@@ -0,0 +1,93 @@
+"""
+Helpers to generate synthetic notebooks for the benchmarks in this folder.
+"""
+import itertools
+import os
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+WORDS = (
+    "python pandas notes meeting review draft budget data pipeline report "
+    "zettelkasten index query cache latency design refactor issue release"
+).split()
+TAGS = ["python", "data", "meeting", "reading", "ops", "writing", "ideas", "work"]
+STATUSES = [None, None, None, "todo", "next", "wip", "done", "inbox"]
+TASK_STATUSES = ["@todo", "@next", "@wip", "@focus", "@later", "@waiting", "@done", "@done"]
+ACTIVITIES = ["research", "meeting", "review", "writing", "ops"]
+
+
+def note_id(n, start=datetime(2015, 1, 1)):
+    return (start + timedelta(minutes=n)).strftime("%Y%m%dT%H%M%S")
+
+
+def task_line(rng, start=datetime(2023, 1, 1)):
+    """A ``- @status`` task line, usually with tags and a few clock sessions."""
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6)))
+    parts = [f"- {rng.choice(TASK_STATUSES)} {words}"]
+    if rng.random() < 0.5:
+        parts.append(f"@activity({rng.choice(ACTIVITIES)})")
+    if rng.random() < 0.3:
+        parts.append(f"@{rng.choice(TAGS)}")
+    if rng.random() < 0.7:
+        sessions = []
+        for _ in range(rng.randint(1, 3)):
+            begin = start + timedelta(minutes=rng.randrange(0, 2 * 365 * 24 * 60))
+            minutes = rng.randint(5, 180)
+            sessions.append(f"{begin:%Y%m%dT%H%M%S}/{minutes // 60:02d}:{minutes % 60:02d}:00")
+        parts.append(f"@clock({', '.join(sessions)})")
+    return " ".join(parts)
+
+
+def vocabulary(size, seed=0):
+    """
+    ``size`` made-up words with Zipf-like cumulative weights, for bodies
+    where a few words are everywhere and most are rare.
+    """
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = WORDS + ["".join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(size)]
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    return words, cum_weights
+
+
+def note_content(rng, body_lines=20, tasks=0, words=None):
+    title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 7)))
+    tags = rng.sample(TAGS, rng.randint(0, 3))
+    status = rng.choice(STATUSES)
+    lines = ["---", f"title: {title}"]
+    if status:
+        lines.append(f"status: {status}")
+    if tags:
+        lines.append("tags:")
+        lines.extend(f"  - {tag}" for tag in tags)
+    lines.append("---")
+    lines.append("")
+    for _ in range(body_lines):
+        if words is None:
+            lines.append(" ".join(rng.choice(WORDS) for _ in range(12)))
+        else:
+            lines.append(" ".join(rng.choices(words[0], cum_weights=words[1], k=12)))
+    if tasks:
+        lines.append("")
+        lines.extend(task_line(rng) for _ in range(rng.randint(0, 2 * tasks)))
+    lines.append("")
+    return "\n".join(lines)
+
+
+def make_notebook(root, count, body_lines=20, seed=0, tasks=0, words=None):
+    """
+    Write ``count`` notes split between Actions/ and Reference/, with
+    ``tasks`` task lines per note on average. Body text is drawn from
+    ``words`` (see :func:`vocabulary`) when given.
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+    for subdir in ("Actions", "Reference"):
+        (root / subdir).mkdir(parents=True, exist_ok=True)
+    for n in range(count):
+        subdir = "Actions" if n % 4 == 0 else "Reference"
+        path = root / subdir / f"{note_id(n)}.md"
+        path.write_text(note_content(rng, body_lines, tasks, words))
+        os.utime(path, (1_600_000_000 + n, 1_600_000_000 + n))
+    return root
@@ -0,0 +1,48 @@
+"""
+Time loading tasks with a cold and a warm task cache, unfiltered and filtered.
+
+Usage:
+    python benchmarks/task_cache.py --notes 5000 --tasks 2
+"""
+import argparse
+import tempfile
+import time
+
+from synthetic import make_notebook
+from zettel.notebook import Notebook
+from zettel.tasks import TaskQuery
+
+QUERIES = {
+    "--activity ops": TaskQuery(activity="ops"),
+    "--tag ops": TaskQuery(tags=("ops",)),
+    "--clocked-since 2024-12-01": TaskQuery(since="2024-12-01"),
+}
+
+
+def load(dir, query=None):
+    start = time.perf_counter()
+    count = sum(1 for _ in Notebook(dir).find_tasks(query=query))
+    return time.perf_counter() - start, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=5_000)
+    parser.add_argument("--tasks", type=int, default=2, help="Average task lines per note")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dir:
+        make_notebook(dir, args.notes, tasks=args.tasks)
+        cold, count = load(dir)
+        warm = min(load(dir)[0] for _ in range(args.repeat))
+        print(f"{count} tasks in {args.notes} notes")
+        print(f"cold  {cold * 1000:>8.1f} ms")
+        print(f"warm  {warm * 1000:>8.1f} ms")
+        for name, query in QUERIES.items():
+            elapsed = min(load(dir, query)[0] for _ in range(args.repeat))
+            print(f"{name:<28}  {load(dir, query)[1]:>6} tasks  {elapsed * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compare the built-in task scanner with ``rg --json`` on a synthetic notebook.
+
+Usage:
+    python benchmarks/task_scan.py --notes 20000 --jobs 1 4
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+from synthetic import make_notebook
+from zettel.scanner import rg_tasks, scan_tasks
+
+
+def timed(tasks, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(1 for _ in tasks())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=20_000)
+    parser.add_argument("--tasks", type=int, default=2, help="Average task lines per note")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dir:
+        make_notebook(dir, args.notes, tasks=args.tasks)
+        print(f"{'scanner':>10}  {'tasks':>7}  {'seconds':>8}")
+        results = {}
+        if shutil.which("rg"):
+            results["rg"] = timed(lambda: rg_tasks(dir), args.repeat)
+        else:
+            print("rg is not installed; timing the built-in scanner only")
+        for jobs in args.jobs:
+            results[f"native/{jobs}"] = timed(lambda: scan_tasks(dir, jobs=jobs), args.repeat)
+        for name, (elapsed, count) in results.items():
+            ratio = f"  {elapsed / results['rg'][0]:.1f}x rg" if "rg" in results and name != "rg" else ""
+            print(f"{name:>10}  {count:>7}  {elapsed:>8.3f}{ratio}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Time Notebook.get_note_by_title against the linear scan it replaced on a
+NoteTable of synthetic titles.
+
+Usage:
+    python benchmarks/title_lookup.py --notes 100000
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+
+from synthetic import STATUSES, TAGS, WORDS, note_id
+from zettel.index import NoteRecord
+from zettel.notebook import Notebook
+from zettel.table import NoteTable
+
+
+def synthetic_table(count, rng):
+    table = NoteTable(Path("."))
+    for n in range(count):
+        id = note_id(n)
+        title = " ".join(rng.choice(WORDS) for _ in range(4)) + f" {n}"
+        tags = rng.sample(TAGS, rng.randint(0, 2))
+        table.append(NoteRecord(Path("Reference", f"{id}.md"), id, title, tags, rng.choice(STATUSES), "", n))
+    return table
+
+
+def linear_lookup(table, title):
+    for note in table.records():
+        if title == note.display_title:
+            return note
+    normalized = Notebook._normalize_display_title(title)
+    for note in table.records():
+        if normalized == note.title:
+            return note
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    start = time.perf_counter()
+    table = synthetic_table(args.notes, rng)
+    print(f"build {args.notes:,} rows:  {time.perf_counter() - start:8.2f} s")
+
+    notebook = Notebook.__new__(Notebook)
+    notebook.notes = table
+    rows = [rng.randrange(len(table)) for _ in range(args.queries)]
+    queries = [table[row].display_title if row % 2 else table.title(row) for row in rows]
+
+    start = time.perf_counter()
+    for query in queries:
+        notebook.get_note_by_title(query)
+    hashed = (time.perf_counter() - start) / len(queries)
+
+    start = time.perf_counter()
+    for query in queries[:10]:
+        linear_lookup(table, query)
+    linear = (time.perf_counter() - start) / 10
+
+    print(f"hashed lookup:      {hashed * 1e6:8.1f} us/query")
+    print(f"linear scan:        {linear * 1e3:8.1f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,23 +19,11 @@ import sys
 import shutil
 from pathlib import Path
 
-import yaml
+from zettel import flatyaml
 
 TIMESTAMP_RE = re.compile(r"^\d{8}T\d{6}$")
 
 
-def yaml_quote(value):
-    """Add double quotes around a YAML value only when needed."""
-    try:
-        parsed = yaml.safe_load(f"v: {value}")
-        if isinstance(parsed, dict) and parsed.get("v") == value:
-            return value
-    except yaml.YAMLError:
-        pass
-    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
-    return f'"{escaped}"'
-
-
 def parse_header(content):
     """Extract title and tags from the first markdown header line."""
     first_line, _, rest = content.partition("\n")
@@ -61,14 +49,7 @@ def parse_header(content):
 
 def build_yaml_content(title, tags, body):
     """Build note content with YAML frontmatter."""
-    lines = ["---", f"title: {yaml_quote(title)}"]
-    if tags:
-        lines.append("tags:")
-        for tag in tags:
-            lines.append(f"  - {tag}")
-    lines.append("---")
-    lines.append(body)
-    return "\n".join(lines)
+    return flatyaml.dumps(title, tags=tags, content=body)
 
 
 def has_frontmatter(content):
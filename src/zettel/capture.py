@@ -0,0 +1,240 @@
+"""
+New notes from capture queries, as typed into ``zt open --query`` or piped
+into ``zt add --batch``: ``[@]title @status #tag #key=value #123``.
+
+Note ids are the creation time, ``YYYYMMDDTHHMMSS``. :class:`NoteIds` keeps
+them unique within a process by adding a ``-NNN`` suffix to ids created in
+the same second, and :func:`create_note` never overwrites a file: when the id
+is taken it moves on to the next one.
+"""
+import json
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from . import flatyaml
+
+ID_FORMAT = "%Y%m%dT%H%M%S"
+RESERVED_KEYS = frozenset(["title", "status", "tags", "body"])
+MAX_SUFFIX = 999
+
+ACTION_TAGS = frozenset(
+    [
+        "@inbox",
+        "@triage",
+        "@focus",
+        "@wip",
+        "@next",
+        "@todo",
+        "@later",
+        "@backlog",
+        "@someday",
+        "@icebox",
+        "@waiting",
+        "@scheduled",
+        "@due",
+        "@done",
+        "@wontfix",
+    ]
+)
+
+
+class Draft(NamedTuple):
+    title: str
+    status: Optional[str] = None
+    tags: List[str] = []
+    properties: Dict[str, str] = {}
+    body: str = ""
+
+    @property
+    def folder(self):
+        return "Actions" if self.status else "Reference"
+
+
+def extract_action_tag(query):
+    """Extract action tag from query. Returns (status, cleaned_query)."""
+    for tag in ACTION_TAGS:
+        if tag in query:
+            cleaned = re.sub(r"\s*" + re.escape(tag) + r"\b", "", query).strip()
+            cleaned = re.sub(r"\s+", " ", cleaned)
+            return tag.lstrip("@"), cleaned
+    return None, query
+
+
+def parse_query(query):
+    """
+    Parse a capture query into a :class:`Draft`. A leading ``@`` files the
+    note in the inbox, ``#tag`` adds a tag, ``#key=value`` a property and
+    ``#123`` stays in the title as a reference. Titles are lower-cased.
+    """
+    query = query.strip()
+    leading_at = re.match(r"^@\s*", query)
+    if leading_at:
+        query = query[leading_at.end() :]
+    status, clean_query = extract_action_tag(query)
+    if leading_at and not status:
+        status = "inbox"
+    tag_match = re.search(r"\[?#\S", clean_query)
+    if not tag_match:
+        return Draft(clean_query.strip().lower(), status)
+
+    tag_str = clean_query[tag_match.start() :].strip("[]")
+    all_tags = [t.strip().lstrip("#") for t in re.split(r"[,\s]+(?=#)|,", tag_str) if t.strip()]
+    title_base = clean_query[: tag_match.start()].strip().lower()
+    tags = [t for t in all_tags if not t.isdigit() and "=" not in t]
+    props = {}
+    for t in all_tags:
+        if "=" in t and not t.isdigit():
+            key, _, value = t.partition("=")
+            if key and value:
+                props[key] = value
+    numeric_refs = [f"#{t}" for t in all_tags if t.isdigit()]
+    title = f"{title_base} {' '.join(numeric_refs)}".strip() if numeric_refs else title_base
+    return Draft(title, status, tags, props)
+
+
+def parse_record(record):
+    """
+    A :class:`Draft` from a JSON object: a ``query`` to parse, or ``title``
+    with optional ``status``, ``tags`` (a list or comma-separated string)
+    and ``body``. Any other keys are string properties.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+    body = record.get("body", "")
+    if not isinstance(body, str):
+        raise ValueError("body must be a string")
+    if "query" in record:
+        if not isinstance(record["query"], str):
+            raise ValueError("query must be a string")
+        return parse_query(record["query"])._replace(body=body)
+
+    title = record.get("title")
+    if not isinstance(title, str) or not title.strip():
+        raise ValueError("missing title")
+    status = record.get("status")
+    if status is not None and not isinstance(status, str):
+        raise ValueError("status must be a string")
+    tags = record.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise ValueError("tags must be a string or a list of strings")
+    properties = {key: value for key, value in record.items() if key not in RESERVED_KEYS}
+    for key, value in properties.items():
+        if not isinstance(value, str):
+            raise ValueError(f"property {key!r} must be a string")
+    tags = [tag.strip().lstrip("#") for tag in tags if tag.strip().lstrip("#")]
+    return Draft(title.strip(), status.strip() if status else None, tags, properties, body)
+
+
+def check_draft(draft):
+    """
+    Raise ``ValueError`` unless the frontmatter of ``draft`` reads back as
+    written: status and tags are written unquoted, so they must not need
+    quotes, and property names must be flat keys.
+    """
+    if draft.status and flatyaml.quote(draft.status) != draft.status:
+        raise ValueError(f"invalid status {draft.status!r}")
+    for tag in draft.tags:
+        if flatyaml.quote(tag) != tag:
+            raise ValueError(f"invalid tag {tag!r}")
+    for key in draft.properties:
+        if key in RESERVED_KEYS or not flatyaml.is_flat_key(key):
+            raise ValueError(f"invalid property name {key!r}")
+
+
+def parse_line(line):
+    """A :class:`Draft` from one ``zt add --batch`` input line: a JSON object or a query."""
+    line = line.strip()
+    draft = parse_record(json.loads(line)) if line.startswith("{") else parse_query(line)
+    check_draft(draft)
+    return draft
+
+
+def read_drafts(lines, errors):
+    """
+    Yield a :class:`Draft` per non-blank line of ``lines``. Lines that do
+    not parse or have no title are skipped, with a message appended to
+    ``errors``.
+    """
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            draft = parse_line(line)
+        except ValueError as err:
+            errors.append(f"line {number}: {err}")
+            continue
+        if not draft.title:
+            errors.append(f"line {number}: missing title")
+            continue
+        yield draft
+
+
+def render(draft):
+    """The note text of ``draft``: frontmatter, then the body if any."""
+    return flatyaml.dumps(draft.title, draft.status, draft.tags, draft.properties, draft.body)
+
+
+class NoteIds:
+    """
+    Creation-time note ids that increase strictly: ids made in the same
+    second (or after the clock went back) get a ``-001``, ``-002``, ...
+    suffix, and after ``-999`` the next second is used.
+    """
+
+    def __init__(self, now=datetime.now):
+        self._now = now
+        self._second = None
+        self._count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        second = self._now().replace(microsecond=0)
+        if self._second is None or second > self._second:
+            self._second, self._count = second, 0
+        elif self._count < MAX_SUFFIX:
+            self._count += 1
+        else:
+            self._second, self._count = self._second + timedelta(seconds=1), 0
+        stamp = self._second.strftime(ID_FORMAT)
+        return f"{stamp}-{self._count:03d}" if self._count else stamp
+
+
+def _taken(dir, id):
+    return any(
+        os.path.lexists(os.path.join(dir, folder, name))
+        for folder in ("Actions", "Reference")
+        for name in (f"{id}.md", id)
+    )
+
+
+def create_note(dir, draft, ids):
+    """
+    Write ``draft`` as a new note under ``dir`` with the next free id from
+    ``ids``, and return the id. The file is created exclusively, so an
+    existing note is never overwritten, even by a concurrent ``zt``.
+    """
+    folder = os.path.join(dir, draft.folder)
+    os.makedirs(folder, exist_ok=True)
+    text = render(draft)
+    for id in ids:
+        if _taken(dir, id):
+            continue
+        try:
+            with open(os.path.join(folder, f"{id}.md"), "x") as f:
+                f.write(text)
+        except FileExistsError:
+            continue
+        return id
+
+
+def create_notes(dir, drafts, ids=None):
+    """Create a note for each of ``drafts``; yields ``(id, draft)`` as they are written."""
+    ids = ids or NoteIds()
+    for draft in drafts:
+        yield create_note(dir, draft, ids), draft
@@ -1,30 +1,51 @@
-import re
 import subprocess
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from urllib.parse import quote
 
 import typer
-import yaml
 from typing_extensions import Annotated
 
-from .fzf import ss, copy_to_clipboard, get_titles
-from .notebook import Notebook
-from .notes import Note
-from .tasks import Task
+from .fzf import ss, copy_to_clipboard, find_note_file, get_titles
+
+# Commands import the notebook, index, YAML and fzf modules themselves, so
+# that `zt --help` and the per-keystroke fzf commands only pay for what they
+# use.
 
 app = typer.Typer()
+clock_app = typer.Typer(help="Time tracked with @clock")
+app.add_typer(clock_app, name="clock")
+graph_app = typer.Typer(help="Metrics of the wikilink graph")
+app.add_typer(graph_app, name="graph")
+
+
+def choices(*values):
+    """An option callback that only accepts ``values``."""
 
+    def validate(value: str):
+        if value not in values:
+            raise typer.BadParameter(f"Invalid option. Allowed options are {', '.join(values)}")
+        return value
 
-def validate_option(value: str):
-    allowed_values = {"all", "open", "closed"}
-    if value not in allowed_values:
-        raise typer.BadParameter(
-            f"Invalid option. Allowed options are {', '.join(allowed_values)}"
-        )
-    return value
+    return validate
+
+
+def parse_date(value: Optional[str]):
+    """A ``YYYY-MM-DD`` (or ``YYYYMMDD``) day as a ``date``, or ``None``; also an option callback."""
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value.replace("-", ""), "%Y%m%d").date()
+    except ValueError:
+        raise typer.BadParameter(f"Invalid date: {value}. Use YYYY-MM-DD")
+
+
+Jobs = Annotated[
+    Optional[int],
+    typer.Option(help="Worker processes for parsing changed notes (0: one per CPU)", envvar="ZETTEL_JOBS"),
+]
 
 
 @app.callback()
@@ -38,40 +59,119 @@ def callback():
 def tasks(
     dir: Annotated[Path, typer.Argument(help="Notebook folder")] = Path("."),
     status: str = typer.Option(
-        default="open", help="One of: all|open|closed", callback=validate_option
+        default="open", help="One of: all|open|closed", callback=choices("all", "open", "closed")
+    ),
+    scanner: str = typer.Option(
+        default="auto", help="One of: auto|rg|native (auto reuses cached tasks; rg and native re-scan every file)", callback=choices("auto", "rg", "native")
+    ),
+    format: str = typer.Option(
+        default="fzf", help="One of: fzf|jsonl|tsv (jsonl and tsv stream every task, unsorted)", callback=choices("fzf", "jsonl", "tsv")
+    ),
+    dump_json: Optional[Path] = typer.Option(
+        default=None, help="With fzf, also write the sorted tasks to this JSON file"
     ),
+    tag: List[str] = typer.Option(default=[], help="Only tasks with this tag (repeat for several)"),
+    activity: Optional[str] = typer.Option(default=None, help="Only tasks with this @activity"),
+    clocked_since: Optional[str] = typer.Option(
+        default=None, help="Only tasks clocked on or after this day (YYYY-MM-DD)", callback=parse_date
+    ),
+    file: List[str] = typer.Option(default=[], help="Only tasks in this note, by id or relative path (repeatable)"),
 ):
     """
     Find all actions itens (todos) in folder
     """
+    from .notebook import Notebook
+    from .tasks import TaskQuery
+
+    since = clocked_since.isoformat() if clocked_since else None
+    query = TaskQuery(status, tuple(tag), activity, since, tuple(file))
     notebook = Notebook(dir)
-    notebook.get_tasks()
+    if format == "fzf":
+        notebook.get_tasks(scanner=scanner, dump_json=dump_json, query=query)
+    else:
+        notebook.write_tasks(sys.stdout, format=format, scanner=scanner, query=query)
+
+
+def _find_note(dir, title=None, id=None):
+    """Resolve a note by id (parsing only that file) or by title."""
+    id = id.strip() if id else None
+    if id:
+        from .notes import Note
+
+        path = find_note_file(dir, id)
+        return None if path is None else Note(path, lazy=True)
+    if title:
+        from . import client
+
+        result = client.request(dir, "note", title=title)
+        if result is None:
+            from .notebook import Notebook
+
+            return Notebook(dir).get_note_by_title(title)
+        if result["note"] is None:
+            return None
+
+        from .index import NoteRecord
+
+        return NoteRecord(**{**result["note"], "path": Path(dir, result["note"]["path"])})
+    return None
+
+
+def _find_fuzzy(dir, query, top, threshold):
+    from . import client
+
+    result = client.request(dir, "fuzzy", query=query, top=top, threshold=threshold)
+    if result is not None:
+        return [Path(dir, match["path"]) for match in result]
+
+    from .notebook import Notebook
+
+    return [note.path for note, _ in Notebook(dir).find_fuzzy(query, top, threshold)]
 
 
 @app.command()
 def find(
-    title: Annotated[str, typer.Argument],
+    title: Annotated[Optional[str], typer.Argument()] = None,
     dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+    id: Annotated[Optional[str], typer.Option(help="Note id, instead of a title")] = None,
+    fuzzy: Annotated[
+        Optional[str], typer.Option(help="Approximate title or tags; prints the best matches first")
+    ] = None,
+    top: Annotated[int, typer.Option(help="Number of matches printed with --fuzzy", min=1)] = 10,
+    threshold: Annotated[
+        Optional[float],
+        typer.Option(help="Minimum trigram similarity of --fuzzy matches (default 0.3, as in pg_trgm)", min=0, max=1),
+    ] = None,
 ):
-    notebook = Notebook(dir)
-    note = notebook.get_note_by_title(title)
+    if id and id.strip():
+        path = find_note_file(dir, id.strip())
+        if path is not None:
+            print(path)
+        return
+    if fuzzy is not None:
+        for path in _find_fuzzy(dir, fuzzy, top, threshold):
+            print(path)
+        return
+    note = _find_note(dir, title)
     if note is not None:
         print(note.path)
 
 
 @app.command()
 def copy(
-    title: Annotated[str, typer.Argument],
+    title: Annotated[Optional[str], typer.Argument()] = None,
     dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+    id: Annotated[Optional[str], typer.Option(help="Note id, instead of a title")] = None,
 ):
     """
     Copy a wikilink for a note to the clipboard.
     """
-    notebook = Notebook(dir)
-    note = notebook.get_note_by_title(title)
+    note = _find_note(dir, title, id)
     if note is None:
-        print(f"Note not found: {title}", file=sys.stderr)
+        print(f"Note not found: {id or title}", file=sys.stderr)
         raise typer.Exit(code=1)
+    from .notes import Note
+
     clean_title = Note.strip_tags(note.title)
     link_id = f"{note.id}/index" if note.path.name == "index.md" else note.id
     if copy_to_clipboard(f"[[{link_id}|{clean_title}]]"):
@@ -82,49 +182,6 @@ def copy(
 
 VAULT_ID = "510b22d0827fd8cf"
 
-ACTION_TAGS = frozenset(
-    [
-        "@inbox",
-        "@triage",
-        "@focus",
-        "@wip",
-        "@next",
-        "@todo",
-        "@later",
-        "@backlog",
-        "@someday",
-        "@icebox",
-        "@waiting",
-        "@scheduled",
-        "@due",
-        "@done",
-        "@wontfix",
-    ]
-)
-
-
-def _extract_action_tag(query):
-    """Extract action tag from query. Returns (status, cleaned_query)."""
-    for tag in ACTION_TAGS:
-        if tag in query:
-            cleaned = re.sub(r"\s*" + re.escape(tag) + r"\b", "", query).strip()
-            cleaned = re.sub(r"\s+", " ", cleaned)
-            return tag.lstrip("@"), cleaned
-    return None, query
-
-
-def _yaml_quote(value):
-    """Add double quotes around a YAML value only when needed."""
-    try:
-        parsed = yaml.safe_load(f"v: {value}")
-        if isinstance(parsed, dict) and parsed.get("v") == value:
-            return value
-    except yaml.YAMLError:
-        pass
-    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
-    return f'"{escaped}"'
-
-
 def _build_obsidian_url(params):
     encoded_parts = []
     for key, value in params:
@@ -142,16 +199,17 @@ def open_note(
     title: Annotated[Optional[str], typer.Argument()] = None,
     query: Annotated[Optional[str], typer.Option()] = None,
     dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+    id: Annotated[Optional[str], typer.Option(help="Note id, instead of a title")] = None,
 ):
     """
     Open a note in Obsidian, or create a new one from a query.
     """
     title = title.strip() if title else None
     query = query.strip() if query else None
+    id = id.strip() if id else None
 
-    if title:
-        notebook = Notebook(dir)
-        note = notebook.get_note_by_title(title)
+    if title or id:
+        note = _find_note(dir, title, id)
         if note is None:
             return
         filepath = str(note.path.relative_to(dir).with_suffix(""))
@@ -162,57 +220,16 @@ def open_note(
             ("openmode", "tab"),
         ]
     elif query:
-        note_id = datetime.now().strftime("%Y%m%dT%H%M%S")
-        leading_at = re.match(r"^@\s*", query)
-        if leading_at:
-            query = query[leading_at.end() :]
-        status, clean_query = _extract_action_tag(query)
-        if leading_at and not status:
-            status = "inbox"
-        tag_match = re.search(r"\[?#\S", clean_query)
-        if tag_match:
-            tag_str = clean_query[tag_match.start() :].strip("[]")
-            all_tags = [
-                t.strip().lstrip("#")
-                for t in re.split(r"[,\s]+(?=#)|,", tag_str)
-                if t.strip()
-            ]
-            title_base = clean_query[: tag_match.start()].strip().lower()
-            tags = [t for t in all_tags if not t.isdigit() and "=" not in t]
-            props = {}
-            for t in all_tags:
-                if "=" in t and not t.isdigit():
-                    key, _, value = t.partition("=")
-                    if key and value:
-                        props[key] = value
-            numeric_refs = [f"#{t}" for t in all_tags if t.isdigit()]
-            title = (
-                f"{title_base} {' '.join(numeric_refs)}".strip()
-                if numeric_refs
-                else title_base
-            )
-        else:
-            tags = []
-            props = {}
-            title = clean_query.strip().lower()
-        subfolder = "Actions" if status else "Reference"
-        filepath = f"{subfolder}/{note_id}"
-        frontmatter_lines = ["---", f"title: {_yaml_quote(title)}"]
-        if status:
-            frontmatter_lines.append(f"status: {status}")
-        if tags:
-            frontmatter_lines.append("tags:")
-            for tag in tags:
-                frontmatter_lines.append(f"  - {tag}")
-        for key, value in props.items():
-            frontmatter_lines.append(f"{key}: {_yaml_quote(value)}")
-        frontmatter_lines.append("---")
-        frontmatter_lines.append("")
-        content = "\n".join(frontmatter_lines)
-        note_path = dir / f"{filepath}.md"
-        note_path.parent.mkdir(parents=True, exist_ok=True)
-        note_path.write_text(content)
-        print(f"{title}")
+        from .capture import NoteIds, check_draft, create_note, parse_query
+
+        draft = parse_query(query)
+        try:
+            check_draft(draft)
+        except ValueError as err:
+            print(f"Cannot create note: {err}", file=sys.stderr)
+            raise typer.Exit(code=1)
+        create_note(dir, draft, NoteIds())
+        print(f"{draft.title}")
         return
     else:
         return
@@ -220,13 +237,326 @@ def open_note(
     subprocess.run(["open", _build_obsidian_url(params)])
 
 
+def _complete_tag(ctx: typer.Context, incomplete: str):
+    from .fzf import get_tags
+
+    dir = ctx.params.get("dir") or Path(".")
+    return [tag for tag, _ in get_tags(dir, prefix=incomplete.lstrip("#"))]
+
+
+@app.command()
+def add(
+    query: Annotated[Optional[str], typer.Argument(help="Capture query, as for open --query")] = None,
+    dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+    batch: Annotated[
+        bool, typer.Option(help="Create a note per stdin line: a capture query or a JSON object")
+    ] = False,
+):
+    """
+    Create notes from capture queries and print the id and title of each.
+    """
+    from .capture import create_notes, read_drafts
+
+    errors = []
+    if batch:
+        drafts = read_drafts(sys.stdin, errors)
+    elif query and query.strip():
+        drafts = read_drafts([query], errors)
+    else:
+        print("Nothing to add: give a query or --batch", file=sys.stderr)
+        raise typer.Exit(code=1)
+    for id, draft in create_notes(dir, drafts):
+        print(f"{id}\t{draft.title}")
+    for error in errors:
+        print(error, file=sys.stderr)
+    if errors:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def daily(
+    start: Annotated[Optional[str], typer.Option("--from", help="First day (YYYY-MM-DD), by default today")] = None,
+    end: Annotated[Optional[str], typer.Option("--to", help="Last day (YYYY-MM-DD), by default the first day")] = None,
+    dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+):
+    """
+    Create the missing daily notes (Reference/daily-YYYYMMDD.md) for a range of days and print their ids.
+    """
+    from datetime import date
+
+    from .daily import create_daily_notes, daily_id
+
+    first = parse_date(start) or date.today()
+    last = parse_date(end) or first
+    if last < first:
+        print(f"--to {last} is before --from {first}", file=sys.stderr)
+        raise typer.Exit(code=1)
+    for day in create_daily_notes(dir, first, last):
+        print(daily_id(day))
+
+
 @app.command(name="list")
-def list_notes(dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path(".")):
+def list_notes(
+    dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+    jobs: Jobs = None,
+    sort: Annotated[
+        str, typer.Option(help="One of: mtime|id|rank (PageRank over wikilinks)", callback=choices("mtime", "id", "rank"))
+    ] = "mtime",
+    limit: Annotated[
+        Optional[int], typer.Option(help="Only list the first N notes", min=1)
+    ] = None,
+    with_id: Annotated[
+        bool, typer.Option(help="Prefix each title with the note id and a tab")
+    ] = False,
+    tag: Annotated[
+        List[str], typer.Option(help="Only notes with this tag (repeat for notes with all of them)", autocompletion=_complete_tag)
+    ] = [],
+):
     """
     List all note titles.
     """
-    for title in get_titles(dir):
+    from . import client
+
+    tags = [t.lstrip("#") for t in tag] or None
+    titles = client.request(dir, "list", sort=sort, limit=limit, with_id=with_id, tags=tags)
+    if titles is None:
+        titles = get_titles(dir, jobs=jobs, sort=sort, limit=limit, with_id=with_id, tags=tags)
+    for title in titles:
         print(title)
 
 
+@app.command()
+def tags(
+    prefix: Annotated[Optional[str], typer.Argument(help="Only tags starting with this")] = None,
+    dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+    jobs: Jobs = None,
+):
+    """
+    List note tags with the number of notes using each, most used first.
+    """
+    from .fzf import get_tags
+
+    for tag, count in get_tags(dir, jobs=jobs, prefix=prefix.lstrip("#") if prefix else None):
+        print(f"{tag}\t{count}")
+
+
+@app.command()
+def serve(
+    dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+    jobs: Jobs = None,
+    watch: Annotated[bool, typer.Option("--watch", help="Watch files instead of re-scanning on each request")] = False,
+    backend: Annotated[
+        str, typer.Option(help="Watch backend: auto, inotify or poll", callback=choices("auto", "inotify", "poll"))
+    ] = "auto",
+):
+    """
+    Keep the notebook in memory and answer list, find, copy and open.
+    """
+    from . import client
+    from .server import serve as run_server
+
+    print(f"Serving {dir} on {client.socket_path(dir)}", file=sys.stderr)
+    try:
+        run_server(dir, jobs=jobs, watch=watch, backend=backend)
+    except RuntimeError as err:
+        print(err, file=sys.stderr)
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def watch(
+    dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+    jobs: Jobs = None,
+    backend: Annotated[
+        str, typer.Option(help="Watch backend: auto, inotify or poll", callback=choices("auto", "inotify", "poll"))
+    ] = "auto",
+    interval: Annotated[float, typer.Option(help="Seconds between polls with the poll backend", min=0.1)] = 1.0,
+):
+    """
+    Keep the note index up to date as files change, so listings don't re-scan.
+    """
+    from .watch import watch as run_watcher
+
+    print(f"Watching {dir}", file=sys.stderr)
+    try:
+        run_watcher(dir, backend=backend, interval=interval, jobs=jobs)
+    except OSError as err:
+        print(f"Cannot watch {dir}: {err}", file=sys.stderr)
+        raise typer.Exit(code=1)
+
+
+def _note_id(dir, ref):
+    """The id of the note ``ref`` names, by id or by title."""
+    ref = ref.strip()
+    if find_note_file(dir, ref) is not None:
+        return ref
+    note = _find_note(dir, ref)
+    if note is None:
+        print(f"Note not found: {ref}", file=sys.stderr)
+        raise typer.Exit(code=1)
+    return note.id
+
+
+@app.command()
+def links(
+    note: Annotated[str, typer.Argument(help="Note id or title")],
+    dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+):
+    """
+    List the notes a note links to, in order. Links to missing notes show their alias.
+    """
+    from .links import links as note_links
+
+    for target, title, alias in note_links(dir, _note_id(dir, note)):
+        print(f"{target}\t{title if title is not None else alias or ''}")
+
+
+@app.command()
+def backlinks(
+    note: Annotated[str, typer.Argument(help="Note id or title")],
+    dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+):
+    """
+    List the notes that link to a note, most recently modified first.
+    """
+    from .links import backlinks as note_backlinks
+
+    for source, title in note_backlinks(dir, _note_id(dir, note)):
+        print(f"{source}\t{title}")
+
+
+@app.command()
+def preview(
+    id: Annotated[Optional[str], typer.Argument(help="Note id")] = None,
+    dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+    width: Annotated[int, typer.Option(help="Columns to render for", min=20)] = 80,
+    warm: Annotated[
+        Optional[int], typer.Option(help="Instead, cache the previews of the N most recent notes", min=1)
+    ] = None,
+):
+    """
+    Print a note rendered for the search preview pane, from the cache when current.
+    """
+    from .preview import preview as render_preview, warm as warm_previews
+
+    if warm is not None:
+        warm_previews(dir, count=warm, width=width)
+        return
+    text = render_preview(dir, id.strip(), width=width) if id and id.strip() else None
+    if text is not None:
+        sys.stdout.write(text)
+
+
+@app.command()
+def grep(
+    query: Annotated[str, typer.Argument(help="Words that must all appear; end one with * to match a prefix")],
+    dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+    limit: Annotated[int, typer.Option(help="Show the N best matches", min=1)] = 20,
+    jobs: Jobs = None,
+):
+    """
+    Search note bodies, best matches first.
+    """
+    from .search import grep as search_notes, highlight, query_terms
+
+    terms = query_terms(query)
+    color = sys.stdout.isatty()
+    try:
+        hits = search_notes(dir, query, limit=limit, jobs=jobs)
+    except RuntimeError as err:
+        print(err, file=sys.stderr)
+        raise typer.Exit(code=1)
+    for hit in hits:
+        print(f"{hit.path.relative_to(dir).as_posix()}: {hit.title}")
+        print(f"    {highlight(hit.snippet, terms) if color else hit.snippet}")
+
+
+@clock_app.command()
+def report(
+    dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+    by: Annotated[str, typer.Option(help="One of: day|week|activity|note", callback=choices("day", "week", "activity", "note"))] = "day",
+    start: Annotated[
+        Optional[str], typer.Option("--from", help="First day (YYYY-MM-DD)", callback=parse_date)
+    ] = None,
+    end: Annotated[Optional[str], typer.Option("--to", help="Last day (YYYY-MM-DD)", callback=parse_date)] = None,
+    format: Annotated[
+        str, typer.Option(help="One of: table|csv|json", callback=choices("table", "csv", "json"))
+    ] = "table",
+    jobs: Jobs = None,
+):
+    """
+    Sum clocked time by day, ISO week, activity or note.
+    """
+    from .clock import ClockLog, write_report
+
+    log = ClockLog.from_index(dir, jobs=jobs)
+    rows = log.report(by, start and start.toordinal(), end and end.toordinal())
+    write_report(rows, by, format, sys.stdout)
+
+
+@graph_app.command()
+def stats(
+    dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+    jobs: Jobs = None,
+):
+    """
+    Count notes, links, orphans and connected components.
+    """
+    from .graph import Graph
+
+    rows = Graph.load(dir, jobs=jobs).stats()
+    width = max(len(label) for label, _ in rows)
+    for label, value in rows:
+        print(f"{label:<{width}}  {value}")
+
+
+@graph_app.command()
+def orphans(
+    dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+    jobs: Jobs = None,
+):
+    """
+    List the notes that neither link to nor are linked from another note.
+    """
+    from .graph import Graph
+
+    graph = Graph.load(dir, jobs=jobs)
+    for node in graph.orphans():
+        print(graph.ids[node])
+
+
+@graph_app.command()
+def hubs(
+    dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+    top: Annotated[int, typer.Option(help="How many notes to list", min=1)] = 20,
+    jobs: Jobs = None,
+):
+    """
+    List the most linked-to notes with their backlink and link counts.
+    """
+    from .graph import Graph
+
+    graph = Graph.load(dir, jobs=jobs)
+    for node, backlinks, links in graph.hubs(top):
+        print(f"{graph.ids[node]}\t{backlinks}\t{links}")
+
+
+@graph_app.command()
+def components(
+    dir: Annotated[Path, typer.Option(help="Notebook folder")] = Path("."),
+    top: Annotated[int, typer.Option(help="How many components to list", min=1)] = 20,
+    jobs: Jobs = None,
+):
+    """
+    List clusters of linked notes, largest first, with their size and most linked-to note.
+    """
+    from .graph import Graph
+
+    graph = Graph.load(dir, jobs=jobs)
+    in_degrees = graph.in_degrees()
+    for members in graph.components()[:top]:
+        hub = max(members, key=lambda node: (in_degrees[node], -node))
+        print(f"{len(members)}\t{graph.ids[hub]}")
+
+
 app.command(name="search")(ss)
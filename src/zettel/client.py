@@ -0,0 +1,67 @@
+"""
+Thin client for ``zt serve``.
+
+Kept free of heavy imports so that commands can ask a running daemon before
+paying for loading the notebook themselves.
+"""
+import hashlib
+import json
+import os
+import socket
+import tempfile
+
+MAX_SOCKET_PATH = 100
+TIMEOUT = 10
+
+
+def daemon_enabled():
+    return os.environ.get("ZETTEL_DAEMON", "1").lower() not in {"0", "false", "no", "off"}
+
+
+def socket_path(dir):
+    """
+    ``<notebook>/.zettel/serve.sock``, or a per-notebook path in the temp
+    folder when that would be too long for a Unix socket.
+    """
+    dir = os.path.abspath(dir)
+    path = os.path.join(dir, ".zettel", "serve.sock")
+    if len(path.encode()) <= MAX_SOCKET_PATH:
+        return path
+    digest = hashlib.sha1(dir.encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"zettel-{os.getuid()}-{digest}.sock")
+
+
+def send(path, payload, timeout=TIMEOUT):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(json.dumps(payload).encode() + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b"".join(chunks))
+
+
+def request(dir, command, **args):
+    """
+    Send ``command`` to the daemon serving ``dir``.
+
+    Returns the daemon's result, or ``None`` when no daemon is running (or
+    it failed), in which case the caller does the work itself.
+    """
+    if not daemon_enabled():
+        return None
+    path = socket_path(dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        response = send(path, {"command": command, "args": args})
+    except (OSError, ValueError):
+        return None
+    if not response.get("ok"):
+        return None
+    return response["result"]
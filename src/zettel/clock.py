@@ -0,0 +1,189 @@
+"""
+Time-tracking reports over ``@clock`` sessions.
+
+Sessions are cached per file by the task index as typed arrays, and
+:class:`ClockLog` concatenates them into columns (day, seconds, activity
+code, note code) that reports filter and count in bulk.
+"""
+from array import array
+from collections import Counter
+from datetime import date
+from itertools import compress
+from pathlib import Path
+
+from .tasks import file_date
+
+GROUPS = ("day", "week", "activity", "note")
+UNKNOWN = "unknown"
+
+
+class Sessions:
+    """
+    The ``@clock`` sessions of one file as columns: the day each session
+    started (a date ordinal, falling back to the date in the file name when
+    the session has no start, 0 when there is neither), its duration in
+    seconds and the ``@activity`` of its task.
+    """
+
+    def __init__(self, file):
+        self.days = array("i")
+        self.seconds = array("q")
+        self.activities = []
+        self.fallback = file_date(file)
+
+    def add(self, task):
+        activity = task["tags"].get("activity")
+        activity = activity if isinstance(activity, str) else ""
+        for session in task["tags"]["clock"] or ():
+            start = session["start"]
+            self.days.append(start.toordinal() if start else self.fallback)
+            self.seconds.append(int(session["duration"].total_seconds()))
+            self.activities.append(activity)
+
+    def dumps(self):
+        """
+        Serialize to the session count, the raw bytes of both arrays and the
+        newline-joined activities, or ``None`` without sessions. Loading is
+        then a couple of ``frombytes`` calls per file.
+        """
+        if not self.days:
+            return None
+        return b"".join(
+            [
+                len(self.days).to_bytes(4, "little"),
+                self.days.tobytes(),
+                self.seconds.tobytes(),
+                "\n".join(self.activities).encode("utf-8"),
+            ]
+        )
+
+
+class ClockLog:
+    """
+    Every clocked session of a notebook in four parallel columns, with
+    activities and notes interned into small vocabularies.
+    """
+
+    def __init__(self):
+        self.days = array("i")
+        self.seconds = array("q")
+        self.activities = array("I")
+        self.notes = array("I")
+        self.activity_names = []
+        self.note_names = []
+        self._activity_codes = {}
+        self._note_codes = {}
+
+    def __repr__(self):
+        return f"<ClockLog of {len(self)} sessions>"
+
+    def __len__(self):
+        return len(self.days)
+
+    @classmethod
+    def from_index(cls, dir, jobs=None):
+        from .fzf import Note
+        from .index import NoteIndex
+        from .scanner import note_paths
+
+        log = cls()
+        with NoteIndex(dir, jobs=jobs) as index:
+            for rel, blob in index.sessions(note_paths(dir)):
+                log.load(Note._extract_id(Path(rel)), blob)
+        return log
+
+    def load(self, note, blob):
+        """Append the sessions of note id ``note`` serialized by :meth:`Sessions.dumps`."""
+        count = int.from_bytes(blob[:4], "little")
+        view = memoryview(blob)
+        days_end = 4 + count * self.days.itemsize
+        seconds_end = days_end + count * self.seconds.itemsize
+        self.days.frombytes(view[4:days_end])
+        self.seconds.frombytes(view[days_end:seconds_end])
+
+        activities = str(view[seconds_end:], "utf-8").split("\n")
+        codes = self._activity_codes
+        for activity in set(activities).difference(codes):
+            codes[activity] = len(self.activity_names)
+            self.activity_names.append(activity)
+        self.activities.extend(map(codes.__getitem__, activities))
+        code = self._note_codes.get(note)
+        if code is None:
+            code = self._note_codes[note] = len(self.note_names)
+            self.note_names.append(note)
+        self.notes.extend(array("I", [code]) * count)
+
+    def report(self, by="day", start=None, end=None):
+        """
+        Total clocked time per ``by`` group as ``(key, sessions, seconds)``
+        rows, restricted to sessions between the ``start`` and ``end`` day
+        ordinals (inclusive). Dates sort chronologically, activities and
+        notes by time spent.
+        """
+        if by not in GROUPS:
+            raise ValueError(f"Unknown group: {by}")
+        column = {"day": self.days, "week": self.days, "activity": self.activities, "note": self.notes}[by]
+        seconds = self.seconds
+        if start is not None or end is not None:
+            lo = 1 if start is None else start
+            hi = date.max.toordinal() if end is None else end
+            keep = list(map(range(lo, hi + 1).__contains__, self.days))
+            column = array(column.typecode, compress(column, keep))
+            seconds = array(seconds.typecode, compress(seconds, keep))
+
+        # Counting and filtering run in C; only the sums need a loop, and
+        # with every key known up front it is a bare addition per session.
+        counts = Counter(column)
+        totals = dict.fromkeys(counts, 0)
+        for key, duration in zip(column, seconds):
+            totals[key] += duration
+
+        if by in ("day", "week"):
+            rows = self._by_date(by, counts, totals)
+            return sorted(rows, key=lambda row: (row[0] == UNKNOWN, row[0]))
+        names = self.activity_names if by == "activity" else self.note_names
+        rows = [(names[key] or UNKNOWN, counts[key], totals[key]) for key in totals]
+        return sorted(rows, key=lambda row: (-row[2], row[0]))
+
+    @staticmethod
+    def _by_date(by, counts, totals):
+        if by == "day":
+            return [(date.fromordinal(day).isoformat() if day else UNKNOWN, counts[day], totals[day]) for day in totals]
+        weeks = {}
+        for day in totals:
+            if day:
+                year, week, _ = date.fromordinal(day).isocalendar()
+                key = f"{year}-W{week:02d}"
+            else:
+                key = UNKNOWN
+            sessions, seconds = weeks.get(key, (0, 0))
+            weeks[key] = (sessions + counts[day], seconds + totals[day])
+        return [(key, sessions, seconds) for key, (sessions, seconds) in weeks.items()]
+
+
+def format_seconds(seconds):
+    hours, remainder = divmod(seconds, 3600)
+    return f"{hours}:{remainder // 60:02d}"
+
+
+def write_report(rows, by, format, file):
+    if format == "json":
+        import json
+
+        json.dump([{by: key, "sessions": sessions, "seconds": seconds} for key, sessions, seconds in rows], file)
+        file.write("\n")
+    elif format == "csv":
+        import csv
+
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow([by, "sessions", "seconds", "hours"])
+        for key, sessions, seconds in rows:
+            writer.writerow([key, sessions, seconds, f"{seconds / 3600:.2f}"])
+    else:
+        width = max([len(by)] + [len(str(key)) for key, _, _ in rows])
+        file.write(f"{by:<{width}}  {'sessions':>8}  {'time':>8}\n")
+        for key, sessions, seconds in rows:
+            file.write(f"{key:<{width}}  {sessions:>8}  {format_seconds(seconds):>8}\n")
+        total = sum(seconds for _, _, seconds in rows)
+        count = sum(sessions for _, sessions, _ in rows)
+        file.write(f"{'total':<{width}}  {count:>8}  {format_seconds(total):>8}\n")
@@ -0,0 +1,49 @@
+"""
+Daily notes for ``zt daily``: ``Reference/daily-YYYYMMDD.md``, titled
+``daily DD/MM/YYYY`` and tagged ``daily``.
+
+The notes that already exist come from one listing of ``Reference/``, so
+backfilling a range of days costs one ``listdir`` plus a write per missing
+day. Files are created exclusively: existing notes are never touched and
+running it again creates nothing.
+"""
+import os
+from datetime import timedelta
+
+from . import flatyaml
+
+FOLDER = "Reference"
+
+
+def daily_id(day):
+    return f"daily-{day:%Y%m%d}"
+
+
+def daily_note(day):
+    """The text of the daily note of ``day``."""
+    return flatyaml.dumps(f"daily {day:%d/%m/%Y}", tags=["daily"])
+
+
+def missing_days(dir, start, end):
+    """The days from ``start`` to ``end`` (inclusive) without a daily note."""
+    try:
+        names = set(os.listdir(os.path.join(dir, FOLDER)))
+    except FileNotFoundError:
+        names = set()
+    days = (start + timedelta(days=offset) for offset in range((end - start).days + 1))
+    return [day for day in days if f"{daily_id(day)}.md" not in names and daily_id(day) not in names]
+
+
+def create_daily_notes(dir, start, end):
+    """Create the missing daily notes from ``start`` to ``end`` and return their days."""
+    folder = os.path.join(dir, FOLDER)
+    os.makedirs(folder, exist_ok=True)
+    created = []
+    for day in missing_days(dir, start, end):
+        try:
+            with open(os.path.join(folder, f"{daily_id(day)}.md"), "x") as f:
+                f.write(daily_note(day))
+        except FileExistsError:
+            continue
+        created.append(day)
+    return created
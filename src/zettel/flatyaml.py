@@ -0,0 +1,289 @@
+"""
+Fast reader and writer for the flat frontmatter that zettel writes itself.
+
+Notes created by ``zt open --query``, ``zt add`` and ``migrate_notes.py``
+only use top-level ``key: scalar`` pairs and block lists of scalars.
+``loads`` parses that subset directly and hands anything else to PyYAML (the
+libyaml loader when available), giving the same result as
+``frontmatter.loads``. ``dumps`` writes it, quoting a value only when it
+would not read back as the same string.
+"""
+import re
+
+FM_BOUNDARY = re.compile(r"^-{3,}\s*$", re.MULTILINE)
+KEY = re.compile(r"[A-Za-z_][A-Za-z0-9_-]*")
+KEY_LINE = re.compile(rf"({KEY.pattern}):(?: +(.*))?")
+ITEM_LINE = re.compile(r"( *)- +(.*)")
+DOUBLE_QUOTED = re.compile(r'"((?:[^"\\]|\\["\\])*)"')
+DOUBLE_QUOTED_ESCAPE = re.compile(r'\\(["\\])')
+SINGLE_QUOTED = re.compile(r"'((?:[^']|'')*)'")
+PLAIN_INDICATORS = frozenset("-?:,[]{}#&*!|>'\"%@`")
+# Indicators that may still start a plain scalar, depending on what follows.
+MAYBE_PLAIN_INDICATORS = frozenset("-?:")
+UNSUPPORTED_CHARACTERS = re.compile(r"[\t\r\x85\u2028\u2029\ufeff]")
+
+# Copies of ``yaml.reader.Reader.NON_PRINTABLE`` and of the implicit
+# resolvers of ``yaml.resolver.Resolver``, keyed by the first characters
+# they apply to, so that reading flat frontmatter does not import PyYAML.
+NON_PRINTABLE = re.compile("[^\x09\x0A\x0D\x20-\x7E\x85\xA0-\uD7FF\uE000-\uFFFD\U00010000-\U0010ffff]")
+RESOLVERS = [
+    (
+        re.compile(
+            r"""^(?:yes|Yes|YES|no|No|NO
+            |true|True|TRUE|false|False|FALSE
+            |on|On|ON|off|Off|OFF)$""",
+            re.X,
+        ),
+        "yYnNtTfFoO",
+    ),
+    (
+        re.compile(
+            r"""^(?:[-+]?(?:[0-9][0-9_]*)\.[0-9_]*(?:[eE][-+][0-9]+)?
+            |\.[0-9][0-9_]*(?:[eE][-+][0-9]+)?
+            |[-+]?[0-9][0-9_]*(?::[0-5]?[0-9])+\.[0-9_]*
+            |[-+]?\.(?:inf|Inf|INF)
+            |\.(?:nan|NaN|NAN))$""",
+            re.X,
+        ),
+        "-+0123456789.",
+    ),
+    (
+        re.compile(
+            r"""^(?:[-+]?0b[0-1_]+
+            |[-+]?0[0-7_]+
+            |[-+]?(?:0|[1-9][0-9_]*)
+            |[-+]?0x[0-9a-fA-F_]+
+            |[-+]?[1-9][0-9_]*(?::[0-5]?[0-9])+)$""",
+            re.X,
+        ),
+        "-+0123456789",
+    ),
+    (re.compile(r"^(?:<<)$"), "<"),
+    (
+        re.compile(
+            r"""^(?: ~
+            |null|Null|NULL
+            | )$""",
+            re.X,
+        ),
+        "~nN",
+    ),
+    (
+        re.compile(
+            r"""^(?:[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]
+            |[0-9][0-9][0-9][0-9] -[0-9][0-9]? -[0-9][0-9]?
+             (?:[Tt]|[ \t]+)[0-9][0-9]?
+             :[0-9][0-9] :[0-9][0-9] (?:\.[0-9]*)?
+             (?:[ \t]*(?:Z|[-+][0-9][0-9]?(?::[0-9][0-9])?))?)$""",
+            re.X,
+        ),
+        "0123456789",
+    ),
+    (re.compile(r"^(?:=)$"), "="),
+    (re.compile(r"^(?:!|&|\*)$"), "!&*"),
+]
+IMPLICIT_RESOLVERS = {
+    char: tuple(regexp for regexp, first in RESOLVERS if char in first)
+    for char in "".join(first for _, first in RESOLVERS)
+}
+_PLAIN_KEYS = {}
+
+
+class Post:
+    """The ``metadata``/``content`` pair of a ``frontmatter.Post``."""
+
+    __slots__ = ("content", "metadata")
+
+    def __init__(self, content, metadata):
+        self.content = content
+        self.metadata = metadata
+
+    def __repr__(self):
+        return f"<Post {self.metadata!r}>"
+
+
+def is_plain_str(value):
+    """
+    Whether ``value`` reads back as the same string when written unquoted
+    after ``key: ``. Conservative: may reject strings YAML would accept.
+    """
+    if not value or value[0] in PLAIN_INDICATORS or value != value.strip(" "):
+        return False
+    if ": " in value or " #" in value or value.endswith(":") or "\t" in value:
+        return False
+    for regexp in IMPLICIT_RESOLVERS.get(value[0], ()):
+        if regexp.match(value):
+            return False
+    return True
+
+
+def is_flat_key(key):
+    """Whether ``key`` can be written, and read back by :func:`parse_flat`, as ``key: value``."""
+    return isinstance(key, str) and KEY.fullmatch(key) is not None and _is_plain_key(key)
+
+
+def _is_plain_key(key):
+    result = _PLAIN_KEYS.get(key)
+    if result is None:
+        result = _PLAIN_KEYS[key] = is_plain_str(key)
+    return result
+
+
+def _scalar(raw):
+    """Parse a single-line scalar, or return ``None`` when unsupported."""
+    raw = raw.rstrip(" ")
+    if raw.startswith('"'):
+        match = DOUBLE_QUOTED.fullmatch(raw)
+        return DOUBLE_QUOTED_ESCAPE.sub(r"\1", match.group(1)) if match else None
+    if raw.startswith("'"):
+        match = SINGLE_QUOTED.fullmatch(raw)
+        return match.group(1).replace("''", "'") if match else None
+    return raw if is_plain_str(raw) else None
+
+
+def parse_flat(fm):
+    """
+    Parse flat frontmatter: top-level ``key: scalar`` pairs and block lists
+    of scalars. Returns ``None`` for anything outside that subset.
+    """
+    if UNSUPPORTED_CHARACTERS.search(fm) or NON_PRINTABLE.search(fm):
+        return None
+
+    metadata = {}
+    list_key = None
+    list_indent = None
+    for line in fm.split("\n"):
+        if not line.strip(" "):
+            continue
+
+        item = ITEM_LINE.fullmatch(line)
+        if item:
+            indent, raw = item.groups()
+            if list_key is None or list_indent not in (None, len(indent)):
+                return None
+            value = _scalar(raw)
+            if value is None:
+                return None
+            if list_indent is None:
+                list_indent = len(indent)
+                metadata[list_key] = []
+            metadata[list_key].append(value)
+            continue
+
+        pair = KEY_LINE.fullmatch(line)
+        if not pair:
+            return None
+        key, raw = pair.groups()
+        if not _is_plain_key(key):
+            return None
+        if raw is None or not raw.strip(" "):
+            metadata[key] = None
+            list_key, list_indent = key, None
+        else:
+            value = _scalar(raw)
+            if value is None:
+                return None
+            metadata[key] = value
+            list_key = list_indent = None
+
+    return metadata
+
+
+def _is_plain_value(value):
+    """
+    Whether ``value`` reads back unchanged as ``key: value``, from the
+    indicator and implicit-type tables; ``None`` for the rare values that
+    only PyYAML can tell.
+    """
+    if not value or value[0] == " " or value[-1] == " ":
+        return False
+    if "\n" in value or UNSUPPORTED_CHARACTERS.search(value):
+        return None
+    if value[0] in PLAIN_INDICATORS and value[0] not in MAYBE_PLAIN_INDICATORS:
+        return False
+    if ": " in value or " #" in value or value.endswith(":") or NON_PRINTABLE.search(value):
+        return False
+    for regexp in IMPLICIT_RESOLVERS.get(value[0], ()):
+        if regexp.match(value):
+            return False
+    return None if value[0] in MAYBE_PLAIN_INDICATORS else True
+
+
+def _round_trips(value):
+    import yaml
+
+    try:
+        parsed = yaml.safe_load(f"v: {value}")
+    except yaml.YAMLError:
+        return False
+    return isinstance(parsed, dict) and parsed.get("v") == value
+
+
+def quote(value):
+    """Add double quotes around a YAML value only when needed."""
+    plain = _is_plain_value(value)
+    if plain is None:
+        plain = _round_trips(value)
+    if plain:
+        return value
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def dumps(title, status=None, tags=(), properties=None, content=""):
+    """
+    A note with flat frontmatter: the quoted ``title``, then ``status``,
+    the ``tags`` list and ``properties`` (quoted values), then ``content``.
+    """
+    lines = ["---", f"title: {quote(title)}"]
+    if status:
+        lines.append(f"status: {status}")
+    if tags:
+        lines.append("tags:")
+        lines.extend(f"  - {tag}" for tag in tags)
+    if properties:
+        lines.extend(f"{key}: {quote(value)}" for key, value in properties.items())
+    lines.append("---")
+    lines.append(content)
+    return "\n".join(lines)
+
+
+def load_metadata(fm):
+    metadata = parse_flat(fm)
+    if metadata is None:
+        import yaml
+
+        try:
+            from yaml import CSafeLoader as SafeLoader
+        except ImportError:  # pragma: no cover - depends on how PyYAML was built
+            from yaml import SafeLoader
+
+        metadata = yaml.load(fm, Loader=SafeLoader)
+    return metadata
+
+
+def loads(text):
+    """
+    Parse a note like ``frontmatter.loads`` and return a :class:`Post`.
+
+    Raises on invalid YAML, as ``frontmatter.loads`` does.
+    """
+    text = text.replace("\r\n", "\n").strip()
+    if FM_BOUNDARY.match(text):
+        try:
+            _, fm, content = FM_BOUNDARY.split(text, 2)
+        except ValueError:
+            return Post(text, {})
+        metadata = load_metadata(fm)
+        if not isinstance(metadata, dict):
+            metadata = {}
+        if not all(isinstance(key, str) for key in metadata):
+            raise TypeError("frontmatter keys must be strings")
+        return Post(content.strip(), metadata)
+
+    if text.startswith(("{", "+++")):
+        import frontmatter
+
+        return frontmatter.loads(text)
+
+    return Post(text, {})
@@ -0,0 +1,186 @@
+"""
+Approximate title lookup for ``zt find --fuzzy``.
+
+Each note's title and tags are split into trigrams (per word, padded like
+PostgreSQL's ``pg_trgm``), and :class:`TrigramIndex` keeps a postings array
+of note rows per trigram. A query counts the trigrams it shares with every
+row at once, with bitmaps as bit-sliced counters, and ranks rows by trigram
+similarity (shared / union), best first. Rows below a minimum similarity
+(0.3 by default, as in ``pg_trgm``) are left out.
+"""
+import heapq
+import re
+import unicodedata
+from array import array
+
+SIMILARITY_THRESHOLD = 0.3
+WORD = re.compile(r"\w+")
+ONE_BIT = re.compile("1")
+
+
+def normalize(text):
+    """Lower-case ``text`` and drop diacritics."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def trigrams(text):
+    """The set of trigrams of the words in ``text``."""
+    grams = set()
+    for word in WORD.findall(normalize(text)):
+        padded = f"  {word} "
+        grams.update(padded[start : start + 3] for start in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Trigram postings over rows of text. Trigrams found in fewer than one row
+    in 32 keep a sorted array of rows (an offsets array into one flat
+    postings array); more frequent ones keep a bitmap of rows instead, which
+    is smaller then. ``sizes`` holds the trigram count of each row.
+    """
+
+    def __init__(self, grams, offsets, postings, dense, bitmaps, sizes):
+        self.grams = grams
+        self.offsets = offsets
+        self.postings = postings
+        self.dense = dense
+        self.bitmaps = bitmaps
+        self.sizes = sizes
+        self._positions = {gram: position for position, gram in enumerate(grams)}
+        self._slots = {position: slot for slot, position in enumerate(dense)}
+        self._bitmap_size = (len(sizes) + 7) // 8
+
+    def __repr__(self):
+        return f"<TrigramIndex of {len(self.sizes)} rows, {len(self.grams)} trigrams>"
+
+    def __len__(self):
+        return len(self.sizes)
+
+    @classmethod
+    def build(cls, texts):
+        lists = {}
+        sizes = array("H")
+        for row, text in enumerate(texts):
+            grams = trigrams(text)
+            sizes.append(min(len(grams), 0xFFFF))
+            for gram in grams:
+                rows = lists.get(gram)
+                if rows is None:
+                    rows = lists[gram] = array("I")
+                rows.append(row)
+
+        grams = sorted(lists)
+        offsets = array("I", [0])
+        postings = array("I")
+        dense = array("I")
+        bitmaps = bytearray()
+        for position, gram in enumerate(grams):
+            rows = lists[gram]
+            if len(rows) * 32 > len(sizes):
+                dense.append(position)
+                bitmaps += cls._rows_bitmap(rows, len(sizes))
+            else:
+                postings.extend(rows)
+            offsets.append(len(postings))
+        return cls(grams, offsets, postings, dense, bytes(bitmaps), sizes)
+
+    @staticmethod
+    def _rows_bitmap(rows, count):
+        bits = bytearray((count + 7) // 8)
+        for row in rows:
+            bits[row >> 3] |= 1 << (row & 7)
+        return bits
+
+    def dumps(self):
+        """Serialize to the array lengths, the raw arrays and the vocabulary."""
+        columns = [self.offsets, self.postings, self.dense, self.sizes]
+        header = array("I", [len(column) for column in columns])
+        text = "\n".join(self.grams).encode("utf-8")
+        return b"".join(
+            [header.tobytes(), *(column.tobytes() for column in columns), self.bitmaps, len(text).to_bytes(4, "little"), text]
+        )
+
+    @classmethod
+    def loads(cls, blob):
+        view = memoryview(blob)
+        header = array("I")
+        header.frombytes(view[: 4 * header.itemsize])
+        position = 4 * header.itemsize
+        columns = []
+        for typecode, length in zip("IIIH", header):
+            column = array(typecode)
+            end = position + length * column.itemsize
+            column.frombytes(view[position:end])
+            columns.append(column)
+            position = end
+        offsets, postings, dense, sizes = columns
+        end = position + len(dense) * ((len(sizes) + 7) // 8)
+        bitmaps = bytes(view[position:end])
+        length = int.from_bytes(view[end : end + 4], "little")
+        text = str(view[end + 4 : end + 4 + length], "utf-8")
+        return cls(text.split("\n") if text else [], offsets, postings, dense, bitmaps, sizes)
+
+    def _bitmap(self, gram):
+        """The rows containing ``gram`` as the bits of an integer."""
+        position = self._positions.get(gram)
+        if position is None:
+            return 0
+        slot = self._slots.get(position)
+        size = self._bitmap_size
+        if slot is not None:
+            return int.from_bytes(self.bitmaps[slot * size : (slot + 1) * size], "little")
+        rows = self.postings[self.offsets[position] : self.offsets[position + 1]]
+        return int.from_bytes(self._rows_bitmap(rows, len(self.sizes)), "little")
+
+    def search(self, query, top=10, threshold=None):
+        """
+        The ``top`` rows most similar to ``query`` as ``(row, similarity)``,
+        best first; ties go to the lower row. Rows less similar than
+        ``threshold`` (:data:`SIMILARITY_THRESHOLD` by default) are left out.
+        """
+        grams = trigrams(query)
+        if not grams or top <= 0:
+            return []
+        if threshold is None:
+            threshold = SIMILARITY_THRESHOLD
+
+        # Bit-sliced counters: bit i of the number of trigrams each row
+        # shares with the query is bit ``row`` of counters[i], so adding a
+        # trigram to every row is a few big-integer operations.
+        counters = [0] * len(grams).bit_length()
+        for gram in grams:
+            carry = self._bitmap(gram)
+            for i, counter in enumerate(counters):
+                if not carry:
+                    break
+                counters[i], carry = counter ^ carry, counter & carry
+
+        # Similarity is at most shared / len(grams), so rows are scored in
+        # decreasing order of shared trigrams until no remaining row can
+        # beat the current top.
+        best = []
+        sizes = self.sizes
+        for count in range(len(grams), 0, -1):
+            if count / len(grams) < threshold:
+                break
+            if len(best) == top and best[0][0] > count / len(grams):
+                break
+            mask = -1
+            for i, counter in enumerate(counters):
+                mask &= counter if count >> i & 1 else ~counter
+            if not mask:
+                continue
+            rows = [match.start() for match in ONE_BIT.finditer(bin(mask)[:1:-1])]
+            # Within a count fewer trigrams score higher, so only the
+            # ``top`` smallest rows can make it.
+            for row in sorted(rows, key=sizes.__getitem__)[:top]:
+                item = (count / (len(grams) + sizes[row] - count), -row)
+                if item[0] < threshold:
+                    break
+                if len(best) < top:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+        return [(-row, score) for score, row in sorted(best, reverse=True)]
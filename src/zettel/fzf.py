@@ -1,24 +1,31 @@
 from pathlib import Path
-from fzf import fzf_prompt
+from typing import NamedTuple, Optional
+import heapq
 import os
 import re
+import shutil
 import subprocess
 
-import frontmatter
+YAML_BOUNDARY = re.compile(r"-{3,}\s*$")
+ID_TIMESTAMP = re.compile(r"\d{8}(?:T\d{6})?")
+
 
 class Note:
-    def __init__(self, path):
+    """
+    A note file with its title, tags and status.
+
+    With ``lazy=True`` only the frontmatter block (or the first line when
+    there is none) is read up front and ``content`` is loaded on first access.
+    """
+
+    def __init__(self, path, lazy=False):
         self.path = Path(path)
+        self._content = None
 
-        try:
-            with open(self.path, "r") as f:
-                content = f.read()
-            self.content = content
-        except UnicodeDecodeError as err:
-            self.content = str(err)
-        self._frontmatter_post = self._parse_frontmatter(self.content)
+        text = self._read_head(self.path) if lazy else self.content
+        self._frontmatter_post = self._parse_frontmatter(text)
         self.id = self._extract_id(self.path)
-        self.title = self._extract_title() or self.id
+        self.title = self._extract_title(text) or self.id
         self.tags = self._extract_tags(self._frontmatter_post)
         self.status = self._extract_status(self._frontmatter_post)
         self.display_title = self._format_display_title(self.title, self.tags, self.status)
@@ -32,7 +39,61 @@ class Note:
     def id(self):
         return self.id
 
-    def _extract_title(self):
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = self._read_content(self.path)
+        return self._content
+
+    @property
+    def body(self):
+        """The note text without its frontmatter."""
+        post = self._parse_frontmatter(self.content)
+        return post.content if post is not None else self.content
+
+    @staticmethod
+    def _read_content(path):
+        try:
+            with open(path, "r") as f:
+                return f.read()
+        except UnicodeDecodeError as err:
+            return str(err)
+
+    @staticmethod
+    def _read_head(path):
+        """
+        Read just enough of ``path`` to extract title, tags and status.
+
+        That is the frontmatter block plus the first non-blank line after it,
+        or the first non-blank line when there is no frontmatter. JSON
+        frontmatter is rare enough that the whole file is read instead.
+        """
+        lines = []
+        state = "start"
+        try:
+            with open(path, "r") as f:
+                for line in f:
+                    lines.append(line)
+                    if state == "start":
+                        first = line.lstrip()
+                        if not first:
+                            continue
+                        if YAML_BOUNDARY.match(first):
+                            state = "frontmatter"
+                        elif first.rstrip("\n") == "{":
+                            return "".join(lines) + f.read()
+                        else:
+                            break
+                    elif state == "frontmatter":
+                        if YAML_BOUNDARY.match(line):
+                            state = "body"
+                    elif line.strip():
+                        break
+        except UnicodeDecodeError as err:
+            return str(err)
+        return "".join(lines)
+
+    def _extract_title(self, text):
         title_from_metadata = self._title_from_metadata(self._frontmatter_post)
         if title_from_metadata:
             return title_from_metadata
@@ -40,7 +101,7 @@ class Note:
         header_source = (
             self._frontmatter_post.content
             if getattr(self._frontmatter_post, "content", None)
-            else self.content
+            else text
         )
         return self._title_from_first_header(header_source)
 
@@ -53,7 +114,9 @@ class Note:
     @staticmethod
     def _parse_frontmatter(content):
         try:
-            return frontmatter.loads(content)
+            from . import flatyaml
+
+            return flatyaml.loads(content)
         except Exception:
             return None
 
@@ -152,19 +215,128 @@ class Note:
         return result
 
 
-def get_files(path):
-    files = []
-    for subdir in [path / "Actions", path / "Reference"]:
-        if subdir.is_dir():
-            files.extend(subdir.glob("*.md"))
-            files.extend(subdir.glob("*/index.md"))
-    sorted_by_mtime_descending = sorted(files, key=lambda t: -os.stat(t).st_mtime)
-    return sorted_by_mtime_descending
+class NoteFile(NamedTuple):
+    path: str
+    id: str
+    stat: Optional[os.stat_result]
+
+
+def scan_files(path, stat=True):
+    """
+    Walk ``Actions/`` and ``Reference/`` with ``os.scandir`` and yield a
+    ``NoteFile`` for every ``*.md`` and ``*/index.md`` note.
+
+    With ``stat`` each file is stat'ed exactly once and the result travels
+    with it, so sorting and cache validation never stat it again.
+    """
+    for subdir in ("Actions", "Reference"):
+        try:
+            entries = os.scandir(os.path.join(path, subdir))
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.endswith(".md") and entry.is_file():
+                    yield NoteFile(entry.path, entry.name[:-3], entry.stat() if stat else None)
+                elif entry.is_dir():
+                    index = os.path.join(entry.path, "index.md")
+                    try:
+                        st = os.stat(index)
+                    except (FileNotFoundError, NotADirectoryError):
+                        continue
+                    yield NoteFile(index, entry.name, st if stat else None)
+
+
+def _id_sort_key(file):
+    match = ID_TIMESTAMP.search(file.id)
+    return (match.group(0) if match else "", file.id)
+
+
+def select_files(path, sort="mtime", limit=None):
+    """
+    Note files ordered most recent first, by mtime or by the timestamp in
+    the note id. With ``limit`` only the top ``limit`` files are kept, using
+    a heap instead of a full sort. Sorting by id never stats a file.
+    """
+    if sort == "id":
+        files = scan_files(path, stat=False)
+        key = _id_sort_key
+    else:
+        files = scan_files(path)
+        key = lambda file: (file.stat.st_mtime_ns, file.path)
+    if limit is not None:
+        return heapq.nlargest(limit, files, key=key)
+    return sorted(files, key=key, reverse=True)
+
+
+def list_files(path):
+    return [Path(file.path) for file in scan_files(path, stat=False)]
+
+
+def get_files(path, sort="mtime", limit=None):
+    return [Path(file.path) for file in select_files(path, sort, limit)]
+
+
+def get_notes(path, jobs=None, sort="mtime", limit=None, tags=None):
+    from .index import NoteIndex
+    from .watch import watching
+
+    if tags:
+        yield from _tagged_notes(path, tags, jobs, sort, limit)
+        return
+
+    if sort == "rank":
+        from .graph import ranked_records
+
+        yield from ranked_records(path, jobs=jobs, limit=limit)
+        return
+
+    if watching(path):
+        # ``zt watch`` keeps the index current: no need to look at the files.
+        # Read the records before the connection closes, in case the caller stops early.
+        with NoteIndex(path, jobs=jobs) as index:
+            if sort == "id":
+                records = sorted(index.records(), key=_id_sort_key, reverse=True)[:limit]
+            else:
+                records = list(index.records(limit=limit))
+        yield from records
+        return
+
+    files = select_files(path, sort, limit)
+    with NoteIndex(path, jobs=jobs) as index:
+        paths = index.sync(files, prune=limit is None)
+        yield from index.records(paths)
+
+
+def _synced_index(path, jobs=None):
+    """The note index of ``path``, synced with every note unless ``zt watch`` keeps it current."""
+    from .index import NoteIndex
+    from .watch import watching
+
+    index = NoteIndex(path, jobs=jobs)
+    if not watching(path):
+        index.sync(scan_files(path))
+    return index
+
+
+def _tagged_notes(path, tags, jobs=None, sort="mtime", limit=None):
+    """Notes with all of ``tags``, from the ``note_tags`` postings."""
+    with _synced_index(path, jobs) as index:
+        records = list(index.tagged_records(tags, limit if sort == "mtime" else None))
+    if sort == "id":
+        records.sort(key=_id_sort_key, reverse=True)
+    elif sort == "rank":
+        from .graph import ranked_records
 
+        paths = {record.path for record in records}
+        records = [record for record in ranked_records(path, jobs=jobs) if record.path in paths]
+    return records[:limit]
 
-def get_notes(path):
-    for file in get_files(path):
-        yield Note(file)
+
+def get_tags(path, jobs=None, prefix=None):
+    """``(tag, count)`` for the tags of all notes, most used first, optionally by ``prefix``."""
+    with _synced_index(path, jobs) as index:
+        return index.tag_counts(prefix)
 
 
 def _colorize_display(display_title, tags, status):
@@ -177,9 +349,23 @@ def _colorize_display(display_title, tags, status):
     return result
 
 
-def get_titles(path):
-    for note in get_notes(path):
-        yield _colorize_display(note.display_title, note.tags, note.status)
+def get_titles(path, jobs=None, sort="mtime", limit=None, with_id=False, tags=None):
+    for note in get_notes(path, jobs=jobs, sort=sort, limit=limit, tags=tags):
+        title = _colorize_display(note.display_title, note.tags, note.status)
+        yield f"{note.id}\t{title}" if with_id else title
+
+
+def find_note_file(path, id):
+    """
+    Resolve a note id straight to its file, without loading the notebook.
+    """
+    if not id or "/" in id or id in {".", ".."}:
+        return None
+    for subdir in ("Actions", "Reference"):
+        for candidate in (Path(path, subdir, f"{id}.md"), Path(path, subdir, id, "index.md")):
+            if candidate.is_file():
+                return candidate
+    return None
 
 
 def parse_fzf_output(prompt):
@@ -193,6 +379,12 @@ def parse_fzf_output(prompt):
     return (query, note_title)
 
 
+def fzf_prompt(*args, **kwargs):
+    from fzf import fzf_prompt
+
+    return fzf_prompt(*args, **kwargs)
+
+
 def copy_to_clipboard(text):
     try:
         subprocess.run(["pbcopy"], input=text.encode(), check=True)
@@ -207,27 +399,46 @@ def copy_to_clipboard(text):
             return False
 
 
+def warm_previews(notebook, width):
+    """Start caching previews of recent notes in the background; returns at once."""
+    subprocess.Popen(
+        ["zt", "preview", "--dir", str(notebook), "--width", str(width), "--warm", "200"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
 def ss():
     home = Path("~")
     notebook = Path(home.expanduser(), "Notebook/")
+    # The preview pane spans the terminal below the list, minus its border.
+    width = max(20, shutil.get_terminal_size().columns - 4)
+    try:
+        warm_previews(notebook, width)
+    except OSError:
+        pass
 
     try:
         fzf_prompt(
-            get_titles(notebook),
+            get_titles(notebook, with_id=True),
             reversed_layout=True,
             print_query=True,
             match_exact=True,
             ansi=True,
             escape_output=False,
+            delimiter="\t",
+            with_field_index_expressions="2..",
             preview_window_settings="down:60%",
-            preview=f"zt find --dir {notebook} {{}} | xargs glow --style dark",
+            preview=f"zt preview --dir {notebook} --width {width} {{1}}",
             keybinds=",".join([
-                f"enter:execute-silent(zt open --dir {notebook} --query {{q}} {{}})+reload(zt list --dir {notebook})+clear-query",
-                f"ctrl-x:execute-silent(zt copy --dir {notebook} {{}})",
-                f"ctrl-t:execute-silent(open -a iTerm $(dirname $(zt find --dir {notebook} {{}})))",
-                f'f2:execute-silent(f=$(zt find --dir {notebook} {{}}); if [ "$(basename "$f")" = "index.md" ]; then code "$(dirname "$f")"; else code "$f"; fi)',
+                f"enter:execute-silent(zt open --dir {notebook} --query {{q}} --id {{1}})+reload(zt list --dir {notebook} --with-id)+clear-query",
+                f"ctrl-x:execute-silent(zt copy --dir {notebook} --id {{1}})",
+                f"ctrl-t:execute-silent(open -a iTerm $(dirname $(zt find --dir {notebook} --id {{1}})))",
+                f'f2:execute-silent(f=$(zt find --dir {notebook} --id {{1}}); if [ "$(basename "$f")" = "index.md" ]; then code "$(dirname "$f")"; else code "$f"; fi)',
                 "ctrl-z:clear-query",
-                f"ctrl-r:reload(zt list --dir {notebook})",
+                f"ctrl-r:reload(zt list --dir {notebook} --with-id)",
             ]),
             header="(enter: Obsidian; ctrl+t: iTerm, f2: VSCode, ctrl+x: wikilink, ctrl+r: reload)",
         )
@@ -0,0 +1,191 @@
+"""
+Notebook-wide wikilink graph metrics for ``zt graph`` and ``zt list --sort rank``.
+
+:class:`Graph` holds the links between notes in compressed sparse row
+form: node ``n`` is the note with key ``n`` in the link index, the targets
+of its links are ``indices[indptr[n]:indptr[n + 1]]``, and the reverse
+adjacency is kept the same way. Everything is flat ``array`` columns, so
+metrics run over integers rather than ``Note`` objects. Links to missing
+notes and repeated links are dropped.
+"""
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import accumulate, chain, compress, repeat
+from operator import add, itemgetter, mul, sub
+
+DAMPING = 0.85
+TOLERANCE = 1e-4
+MAX_ITERATIONS = 100
+
+
+class Graph:
+    def __init__(self, ids, notes, indptr, indices):
+        self.ids = ids
+        self.notes = notes
+        self.indptr = indptr
+        self.indices = indices
+        self._reverse = None
+
+    def __repr__(self):
+        return f"<Graph of {self.note_count} notes, {len(self.indices)} links>"
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def note_count(self):
+        return sum(self.notes)
+
+    @classmethod
+    def from_index(cls, index):
+        """Build the graph from an up-to-date :class:`~zettel.index.NoteIndex`."""
+        # Node 0 is unused, so that node numbers are the keys themselves.
+        ids = [None]
+        notes = bytearray(1)
+        for key, id, is_note in index.graph_nodes():
+            # Keys are assigned in order and never deleted; guard anyway.
+            while len(ids) < key:
+                ids.append(None)
+                notes.append(0)
+            ids.append(id)
+            notes.append(is_note)
+
+        edges = index.graph_edges().fetchall()
+        edges = list(compress(edges, map(notes.__getitem__, map(itemgetter(1), edges))))
+        sources = array("I", map(itemgetter(0), edges))
+        indptr = array("I", [bisect_left(sources, node) for node in range(len(ids) + 1)])
+        return cls(ids, notes, indptr, array("I", map(itemgetter(1), edges)))
+
+    @classmethod
+    def load(cls, dir, jobs=None):
+        from .links import _link_index
+
+        with _link_index(dir, jobs) as index:
+            return cls.from_index(index)
+
+    def note_nodes(self):
+        """The nodes that are notes, as opposed to targets of dangling links."""
+        return [node for node, is_note in enumerate(self.notes) if is_note]
+
+    def sources(self):
+        """The source node of each link, parallel to ``indices``."""
+        return array("I", chain.from_iterable(map(repeat, range(len(self)), self.out_degrees())))
+
+    def out_degrees(self):
+        indptr = self.indptr
+        return array("I", map(sub, indptr[1:], indptr[:-1]))
+
+    def in_degrees(self):
+        indptr, _ = self.reverse()
+        return array("I", map(sub, indptr[1:], indptr[:-1]))
+
+    def reverse(self):
+        """The ``(indptr, indices)`` of the graph with every link reversed."""
+        if self._reverse is None:
+            indices = self.indices
+            in_degrees = Counter(indices)
+            indptr = array("I", accumulate(map(in_degrees.__getitem__, range(len(self))), initial=0))
+            # A stable sort by target keeps each node's sources in order.
+            order = sorted(range(len(indices)), key=indices.__getitem__)
+            self._reverse = (indptr, array("I", map(self.sources().__getitem__, order)))
+        return self._reverse
+
+    def orphans(self):
+        """Notes without links in or out."""
+        out_degrees, in_degrees = self.out_degrees(), self.in_degrees()
+        return [node for node in self.note_nodes() if not out_degrees[node] and not in_degrees[node]]
+
+    def hubs(self, top=20):
+        """
+        The ``top`` notes with the most backlinks, then the most links, as
+        ``(node, in_degree, out_degree)``.
+        """
+        out_degrees, in_degrees = self.out_degrees(), self.in_degrees()
+        nodes = sorted(self.note_nodes(), key=lambda node: (-in_degrees[node], -out_degrees[node]))
+        return [(node, in_degrees[node], out_degrees[node]) for node in nodes[:top]]
+
+    def components(self):
+        """
+        Weakly connected components (links taken in either direction) as
+        lists of nodes, largest first.
+        """
+        rindptr, rindices = self.reverse()
+        indptr, indices = self.indptr, self.indices
+        labels = array("i", [-1]) * len(self)
+        components = []
+        for start in self.note_nodes():
+            if labels[start] != -1:
+                continue
+            label = len(components)
+            labels[start] = label
+            members = [start]
+            for node in members:
+                for neighbours in (indices[indptr[node] : indptr[node + 1]], rindices[rindptr[node] : rindptr[node + 1]]):
+                    for neighbour in neighbours:
+                        if labels[neighbour] == -1:
+                            labels[neighbour] = label
+                            members.append(neighbour)
+            components.append(members)
+        components.sort(key=len, reverse=True)
+        return components
+
+    def pagerank(self, damping=DAMPING, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+        """
+        PageRank of every node (0 for missing notes), summing to 1 over notes.
+        Notes without links spread their rank evenly over all notes.
+        """
+        count = self.note_count
+        if not count:
+            return array("d", bytes(8 * len(self)))
+        rindptr, rindices = self.reverse()
+        notes = list(map(float, self.notes))
+        out_degrees = self.out_degrees()
+        inverse_degrees = [1 / degree if degree else 0.0 for degree in out_degrees]
+        sinks = [node for node in self.note_nodes() if not out_degrees[node]]
+        starts, ends = rindptr[:-1], rindptr[1:]
+        rank = [is_note / count for is_note in notes]
+        for _ in range(max_iterations):
+            # Every step is a C-level map: the rank each link carries, its
+            # running total in reverse order, and per node the difference of
+            # that total across the node's incoming links.
+            carried = map(list(map(mul, rank, inverse_degrees)).__getitem__, rindices)
+            totals = list(accumulate(carried, initial=0.0))
+            pulled = map(sub, map(totals.__getitem__, ends), map(totals.__getitem__, starts))
+            base = (1 - damping) / count + damping * sum(map(rank.__getitem__, sinks)) / count
+            new = list(map(add, map(mul, notes, repeat(base)), map(mul, pulled, repeat(damping))))
+            delta = sum(map(abs, map(sub, new, rank)))
+            rank = new
+            if delta < tolerance:
+                break
+        return array("d", rank)
+
+    def stats(self):
+        """Notebook-wide counts as ``(label, value)`` pairs."""
+        components = self.components()
+        orphans = self.orphans()
+        count = self.note_count
+        return [
+            ("notes", count),
+            ("links", len(self.indices)),
+            ("orphans", len(orphans)),
+            ("components", len(components)),
+            ("largest component", len(components[0]) if components else 0),
+            ("links per note", round(len(self.indices) / count, 2) if count else 0),
+        ]
+
+
+def ranked_records(dir, jobs=None, limit=None):
+    """
+    Note records ordered by PageRank, best first. Ranks are cached in the
+    note index until a note file changes.
+    """
+    from .links import _link_index
+
+    with _link_index(dir, jobs) as index:
+        signature = index.graph_signature()
+        if index.ranks_signature() != signature:
+            graph = Graph.from_index(index)
+            ranks = graph.pagerank()
+            index.store_ranks(signature, [(graph.ids[node], ranks[node]) for node in graph.note_nodes()])
+        return list(index.ranked_records(limit))
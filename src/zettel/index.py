@@ -0,0 +1,809 @@
+import json
+import os
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from .fzf import Note, NoteFile
+
+SCHEMA_VERSION = 11
+SQL_CHUNK = 500
+MIN_PARALLEL_FILES = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    path TEXT PRIMARY KEY,
+    id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    status TEXT,
+    display_title TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notes_mtime ON notes (mtime_ns DESC);
+CREATE INDEX IF NOT EXISTS notes_id ON notes (id);
+CREATE TABLE IF NOT EXISTS note_tags (
+    tag TEXT NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS note_tags_tag ON note_tags (tag);
+CREATE INDEX IF NOT EXISTS note_tags_path ON note_tags (path);
+CREATE TABLE IF NOT EXISTS task_files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    tasks TEXT,
+    sessions BLOB
+);
+CREATE TABLE IF NOT EXISTS task_tags (
+    tag TEXT NOT NULL,
+    value TEXT,
+    path TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS task_tags_tag ON task_tags (tag, value);
+CREATE INDEX IF NOT EXISTS task_tags_path ON task_tags (path);
+CREATE TABLE IF NOT EXISTS fulltext_files (
+    docid INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    body BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trigrams (
+    digest TEXT PRIMARY KEY,
+    blob BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS link_files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS note_keys (
+    key INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS links (
+    source INTEGER NOT NULL,
+    target INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    alias TEXT
+);
+CREATE INDEX IF NOT EXISTS links_edges ON links (source, target);
+CREATE INDEX IF NOT EXISTS links_target ON links (target);
+CREATE INDEX IF NOT EXISTS links_path ON links (path);
+CREATE TABLE IF NOT EXISTS ranks (
+    id TEXT PRIMARY KEY,
+    rank REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE IF NOT EXISTS previews (
+    id TEXT NOT NULL,
+    width INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (id, width)
+);
+"""
+
+# Created by the first sync_text, so that an SQLite without FTS5 only
+# costs ``zt grep``.
+FULLTEXT_SCHEMA = """
+CREATE VIRTUAL TABLE fulltext USING fts5 (
+    title, body, content='', tokenize='unicode61 remove_diacritics 2'
+);
+INSERT INTO fulltext (fulltext, rank) VALUES ('rank', 'bm25(10.0, 1.0)');
+"""
+
+
+class NoteRecord(NamedTuple):
+    path: Path
+    id: str
+    title: str
+    tags: List[str]
+    status: Optional[str]
+    display_title: str
+    mtime_ns: int
+
+    def __repr__(self) -> str:
+        return f"{self.id} {self.display_title}"
+
+
+def cache_path(dir):
+    return Path(dir) / ".zettel" / "index.sqlite"
+
+
+def cache_enabled():
+    return os.environ.get("ZETTEL_CACHE", "1").lower() not in {"0", "false", "no", "off"}
+
+
+def resolve_jobs(jobs=None):
+    """
+    Number of worker processes used to parse notes.
+
+    Falls back to ``ZETTEL_JOBS`` and then to 1; 0 means one per CPU.
+    """
+    if jobs is None:
+        try:
+            jobs = int(os.environ.get("ZETTEL_JOBS", "1"))
+        except ValueError:
+            jobs = 1
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    return jobs
+
+
+def parse_note(file, rel, mtime_ns, size):
+    note = Note(file, lazy=True)
+    return (
+        rel,
+        note.id,
+        note.title,
+        "\n".join(note.tags),
+        note.status,
+        note.display_title,
+        mtime_ns,
+        size,
+    )
+
+
+def _parse_chunk(chunk):
+    return [parse_note(*item) for item in chunk]
+
+
+def parse_tasks(file, rel, mtime_ns, size):
+    """
+    Scan ``file`` for task lines and parse them into one JSON list of
+    ``[line, title, status, open, task]``, or ``None`` when the file has no
+    tasks. Each ``task`` dict is a JSON string of its own (see
+    :func:`~zettel.tasks.dumps_task`) so that listing tasks does not pay
+    for decoding all of them. Clocked time is stored
+    separately as :class:`~zettel.clock.Sessions` columns, and the tags of
+    the task at each position as ``task_tags`` postings.
+    """
+    from .clock import Sessions
+    from .scanner import scan_file
+    from .tasks import Task, dumps_task, task_tags
+
+    tasks = []
+    tags = []
+    sessions = Sessions(file)
+    for position, (line, text) in enumerate(scan_file(file)):
+        task = Task(text).task
+        tasks.append((line, task["title"], task["status"], task["open"], dumps_task(task)))
+        tags.extend((tag, value, rel, position) for tag, value in task_tags(task, sessions.fallback))
+        sessions.add(task)
+    cached = json.dumps(tasks, separators=(",", ":")) if tasks else None
+    return (rel, mtime_ns, size, cached, sessions.dumps()), tags
+
+
+def _parse_tasks_chunk(chunk):
+    return [parse_tasks(*item) for item in chunk]
+
+
+def parse_text(file, rel, mtime_ns, size):
+    """
+    The title and body of ``file`` for the full-text index, with the body
+    also zlib-compressed for storage (it is only read back for snippets).
+    """
+    note = Note(file)
+    body = note.body
+    return rel, mtime_ns, size, note.title, body, zlib.compress(body.encode("utf-8"))
+
+
+def _parse_text_chunk(chunk):
+    return [parse_text(*item) for item in chunk]
+
+
+def parse_links(file, rel, mtime_ns, size):
+    """The ``link_files`` row of ``file`` and a ``links`` row per wikilink in it."""
+    from .links import extract_links
+
+    source = Note._extract_id(Path(file))
+    links = [(source, target, rel, line, alias) for line, target, alias in extract_links(Note._read_content(file))]
+    return (rel, mtime_ns, size), links
+
+
+def _parse_links_chunk(chunk):
+    return [parse_links(*item) for item in chunk]
+
+
+class NoteIndex:
+    """
+    Note metadata, parsed tasks, wikilinks, a full-text index of note bodies,
+    the trigram index of titles and rendered previews cached in SQLite under
+    ``<notebook>/.zettel/``.
+
+    Rows are keyed by the path relative to the notebook and invalidated by
+    ``(mtime_ns, size)``, so a sync only re-parses files that changed.
+    """
+
+    def __init__(self, dir, jobs=None):
+        self.dir = Path(dir)
+        self.jobs = resolve_jobs(jobs)
+        self.conn = self._connect()
+
+    def __repr__(self):
+        return f"<NoteIndex at {self.dir}>"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _connect(self):
+        if cache_enabled():
+            path = cache_path(self.dir)
+            try:
+                path.parent.mkdir(exist_ok=True)
+                conn = sqlite3.connect(path, timeout=10)
+                conn.execute("PRAGMA journal_mode=WAL")
+                self._migrate(conn)
+                return conn
+            except (OSError, sqlite3.Error):
+                pass
+        conn = sqlite3.connect(":memory:")
+        self._migrate(conn)
+        return conn
+
+    @staticmethod
+    def _migrate(conn):
+        (version,) = conn.execute("PRAGMA user_version").fetchone()
+        if version != SCHEMA_VERSION:
+            # Virtual tables first: dropping one drops its shadow tables too.
+            tables = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY sql LIKE 'CREATE VIRTUAL%' DESC"
+                )
+            ]
+            for table in tables:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.commit()
+
+    @staticmethod
+    def _stat(file):
+        if isinstance(file, NoteFile):
+            return file.stat or os.stat(file.path)
+        return os.stat(file)
+
+    def _relative(self, path):
+        if isinstance(path, NoteFile):
+            path = path.path
+        path = Path(path)
+        try:
+            return path.relative_to(self.dir).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def _absolute(self, rel):
+        return self.dir / rel
+
+    def sync(self, files, prune=True):
+        """
+        Bring the index up to date with ``files``.
+
+        Files whose ``(mtime_ns, size)`` differ from the stored row are parsed
+        again, along with their ``note_tags`` postings. With ``prune`` rows
+        for files not in ``files`` are deleted. Returns the relative paths of
+        ``files`` in the order given.
+        """
+        files = list(files)
+        stored = {
+            row[0]: (row[1], row[2])
+            for row in self._select("path, mtime_ns, size", None if prune else [self._relative(f) for f in files])
+        }
+        order = []
+        changed = []
+        for file in files:
+            rel = self._relative(file)
+            try:
+                st = self._stat(file)
+            except FileNotFoundError:
+                continue
+            order.append(rel)
+            if stored.get(rel) != (st.st_mtime_ns, st.st_size):
+                changed.append((str(self._absolute(rel)), rel, st.st_mtime_ns, st.st_size))
+
+        rows = self._map(_parse_chunk, changed)
+        removed = set(stored) - set(order) if prune else set()
+        if rows or removed:
+            stale = [(path,) for path in removed] + [(row[0],) for row in rows]
+            tags = [(tag, row[0]) for row in rows if row[3] for tag in row[3].split("\n")]
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                self.conn.executemany(
+                    "DELETE FROM notes WHERE path = ?", [(path,) for path in removed]
+                )
+                self.conn.executemany("DELETE FROM note_tags WHERE path = ?", stale)
+                self.conn.executemany("INSERT INTO note_tags VALUES (?, ?)", tags)
+        return order
+
+    def update(self, files):
+        """
+        Re-check individual ``files``: existing ones are synced, rows of
+        the ones that are gone are deleted. Used by the watcher.
+        """
+        existing = []
+        missing = []
+        for file in files:
+            (existing if os.path.isfile(file) else missing).append(file)
+        self.sync(existing, prune=False)
+        if self.has_text():
+            self.sync_text(existing, prune=False)
+        if self.has_links():
+            self.sync_links(existing, prune=False)
+        if missing:
+            paths = [(self._relative(file),) for file in missing]
+            with self.conn:
+                self.conn.executemany("DELETE FROM notes WHERE path = ?", paths)
+                self.conn.executemany("DELETE FROM note_tags WHERE path = ?", paths)
+                self._delete_text([path for path, in paths])
+                self.conn.executemany("DELETE FROM link_files WHERE path = ?", paths)
+                self.conn.executemany("DELETE FROM links WHERE path = ?", paths)
+
+    def sync_tasks(self, files, prune=True):
+        """
+        Bring the cached tasks of ``files`` up to date and return their
+        relative paths in the order given.
+
+        Parsed tasks are cached per file and invalidated by
+        ``(mtime_ns, size)``, so only changed files are scanned again.
+        With ``prune`` cached files not in ``files`` are dropped.
+        """
+        order, stored = self._sync_tasks(files, prune)
+        for _ in stored:
+            pass
+        return order
+
+    def _sync_tasks(self, files, prune):
+        """
+        :meth:`sync_tasks`, a chunk at a time: returns the relative paths of
+        ``files`` and a generator that parses the changed files, stores each
+        chunk and then yields the paths in it.
+        """
+        stored = {row[0]: (row[1], row[2]) for row in self.conn.execute("SELECT path, mtime_ns, size FROM task_files")}
+        order, changed = self._diff(files, stored)
+        if prune:
+            removed = [(path,) for path in set(stored) - set(order)]
+            if removed:
+                with self.conn:
+                    self.conn.executemany("DELETE FROM task_files WHERE path = ?", removed)
+                    self.conn.executemany("DELETE FROM task_tags WHERE path = ?", removed)
+        return order, self._store_tasks(changed)
+
+    def _store_tasks(self, changed):
+        for parsed in self._imap(_parse_tasks_chunk, changed):
+            stale = [(row[0],) for row, _ in parsed]
+            with self.conn:
+                self.conn.executemany("DELETE FROM task_files WHERE path = ?", stale)
+                self.conn.executemany("DELETE FROM task_tags WHERE path = ?", stale)
+                self.conn.executemany("INSERT INTO task_files VALUES (?, ?, ?, ?, ?)", [row for row, _ in parsed])
+                self.conn.executemany("INSERT INTO task_tags VALUES (?, ?, ?, ?)", [tag for _, tags in parsed for tag in tags])
+            yield [row[0] for row, _ in parsed]
+
+    def _diff(self, files, stored):
+        """
+        Stat ``files`` and compare them with the ``stored`` ``(mtime_ns,
+        size)`` of each relative path. Returns the relative paths in order
+        and ``(file, rel, mtime_ns, size)`` for the files that changed.
+        """
+        # Plain string paths: this runs for every file on each command.
+        prefix = os.path.join(self.dir, "")
+        order = []
+        changed = []
+        for file in files:
+            st = None
+            if isinstance(file, NoteFile):
+                file, st = file.path, file.stat
+            file = os.fspath(file)
+            rel = (file[len(prefix) :] if file.startswith(prefix) else file).replace(os.sep, "/")
+            try:
+                st = st or os.stat(file)
+            except FileNotFoundError:
+                continue
+            order.append(rel)
+            if stored.get(rel) != (st.st_mtime_ns, st.st_size):
+                changed.append((file, rel, st.st_mtime_ns, st.st_size))
+        return order, changed
+
+    def tasks(self, files, query=None):
+        """
+        Yield ``(path, line, task)`` for the task lines in ``files``, where
+        ``path`` is a string and ``task`` a :class:`~zettel.tasks.Task`.
+
+        With a :class:`~zettel.tasks.TaskQuery`, tag, activity and date
+        filters are answered from the ``task_tags`` postings, so only the
+        files and tasks that match are read. ``files`` is expected to be
+        filtered by the query already; the rest of the cache is kept.
+        """
+        order, stored = self._sync_tasks(files, prune=not (query and query.files))
+        terms = query.terms() if query else []
+        # Tasks are yielded as soon as the files before them are stored,
+        # so the first ones show up while later files are still parsed.
+        done = 0
+        for paths in stored:
+            end = order.index(paths[-1], done) + 1
+            yield from self._cached_tasks(order[done:end], terms, query)
+            done = end
+        yield from self._cached_tasks(order[done:], terms, query)
+
+    def _cached_tasks(self, paths, terms, query):
+        from .tasks import Task
+
+        if not paths:
+            return
+        postings = self._postings(terms) if terms else None
+        if postings is not None:
+            paths = [rel for rel in paths if rel in postings]
+        for start in range(0, len(paths), SQL_CHUNK):
+            chunk = paths[start : start + SQL_CHUNK]
+            texts = dict(self._select_tasks(chunk))
+            for rel in chunk:
+                text = texts.get(rel)
+                if text is None:
+                    continue
+                path = os.path.join(self.dir, rel)
+                positions = postings[rel] if postings is not None else None
+                for position, (line, title, status, open, task) in enumerate(json.loads(text)):
+                    if positions is not None and position not in positions:
+                        continue
+                    if query and not query.accepts_open(open):
+                        continue
+                    yield path, line, Task.from_cache(title, status, open, task)
+
+    def _postings(self, terms):
+        """Map each path to the positions of its tasks that meet all ``terms``."""
+        selects = []
+        params = []
+        for tag, operator, value in terms:
+            if operator is None:
+                selects.append("SELECT path, position FROM task_tags WHERE tag = ?")
+                params.append(tag)
+            else:
+                selects.append(f"SELECT path, position FROM task_tags WHERE tag = ? AND value {operator} ?")
+                params.extend((tag, value))
+        postings = {}
+        for path, position in self.conn.execute(" INTERSECT ".join(selects), params):
+            postings.setdefault(path, set()).add(position)
+        return postings
+
+    def _select_tasks(self, paths):
+        for start in range(0, len(paths), SQL_CHUNK):
+            chunk = paths[start : start + SQL_CHUNK]
+            placeholders = ", ".join("?" * len(chunk))
+            yield from self.conn.execute(
+                f"SELECT path, tasks FROM task_files WHERE path IN ({placeholders}) AND tasks IS NOT NULL", chunk
+            )
+
+    def sessions(self, files):
+        """
+        Yield ``(rel, sessions)`` for every file in ``files`` with clocked
+        time, where ``rel`` is its path relative to the notebook and
+        ``sessions`` the blob written by :meth:`~zettel.clock.Sessions.dumps`.
+        """
+        order = self.sync_tasks(files)
+        blobs = dict(self.conn.execute("SELECT path, sessions FROM task_files WHERE sessions IS NOT NULL"))
+        for rel in order:
+            blob = blobs.get(rel)
+            if blob is not None:
+                yield rel, blob
+
+    def sync_text(self, files, prune=True):
+        """
+        Bring the full-text index up to date with ``files``, re-reading only
+        the ones whose ``(mtime_ns, size)`` changed. Raises ``RuntimeError``
+        when SQLite was built without FTS5.
+        """
+        self._create_fulltext()
+        stored = {row[0]: (row[1], row[2]) for row in self.conn.execute("SELECT path, mtime_ns, size FROM fulltext_files")}
+        order, changed = self._diff(files, stored)
+        parsed = self._map(_parse_text_chunk, changed)
+        removed = set(stored) - set(order) if prune else set()
+        if parsed or removed:
+            with self.conn:
+                self._delete_text(list(removed) + [row[0] for row in parsed if row[0] in stored])
+                for rel, mtime_ns, size, title, body, blob in parsed:
+                    docid = self.conn.execute(
+                        "INSERT INTO fulltext_files (path, mtime_ns, size, title, body) VALUES (?, ?, ?, ?, ?)",
+                        (rel, mtime_ns, size, title, blob),
+                    ).lastrowid
+                    self.conn.execute("INSERT INTO fulltext (rowid, title, body) VALUES (?, ?, ?)", (docid, title, body))
+        return order
+
+    def _create_fulltext(self):
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'fulltext'").fetchone() is not None:
+            return
+        try:
+            self.conn.executescript(FULLTEXT_SCHEMA)
+        except sqlite3.OperationalError as err:
+            raise RuntimeError(f"Full-text search needs SQLite with FTS5 ({err})") from None
+
+    def has_text(self):
+        """Whether the full-text index has been built."""
+        return self.conn.execute("SELECT 1 FROM fulltext_files LIMIT 1").fetchone() is not None
+
+    def _delete_text(self, paths):
+        # The full-text table stores no content, so removing a document
+        # means handing it back the exact text that was indexed.
+        for path in paths:
+            row = self.conn.execute("SELECT docid, title, body FROM fulltext_files WHERE path = ?", (path,)).fetchone()
+            if row is None:
+                continue
+            docid, title, blob = row
+            self.conn.execute(
+                "INSERT INTO fulltext (fulltext, rowid, title, body) VALUES ('delete', ?, ?, ?)",
+                (docid, title, zlib.decompress(blob).decode("utf-8")),
+            )
+            self.conn.execute("DELETE FROM fulltext_files WHERE docid = ?", (docid,))
+
+    def search(self, expression, limit=20):
+        """
+        Yield ``(path, title, body)`` for the ``limit`` notes that best
+        match the FTS5 ``expression``, ranked by BM25 with title matches
+        weighted over body matches. ``path`` is relative to the notebook.
+        """
+        rows = self.conn.execute(
+            "SELECT fulltext_files.path, fulltext_files.title, fulltext_files.body"
+            " FROM (SELECT rowid, rank FROM fulltext WHERE fulltext MATCH ? ORDER BY rank LIMIT ?) AS hits"
+            " JOIN fulltext_files ON fulltext_files.docid = hits.rowid ORDER BY hits.rank",
+            (expression, limit),
+        )
+        for path, title, blob in rows:
+            yield path, title, zlib.decompress(blob).decode("utf-8")
+
+    def sync_links(self, files, prune=True):
+        """
+        Bring the wikilinks of ``files`` up to date, re-reading only the
+        files whose ``(mtime_ns, size)`` changed, and return their relative
+        paths in the order given.
+        """
+        stored = {row[0]: (row[1], row[2]) for row in self.conn.execute("SELECT path, mtime_ns, size FROM link_files")}
+        order, changed = self._diff(files, stored)
+        parsed = self._map(_parse_links_chunk, changed)
+        removed = set(stored) - set(order) if prune else set()
+        if parsed or removed:
+            stale = [(path,) for path in removed] + [(row[0],) for row, _ in parsed]
+            links = [link for _, links in parsed for link in links]
+            with self.conn:
+                # Every note gets a key, so that notes without links are graph nodes too.
+                ids = {Note._extract_id(Path(row[0])) for row, _ in parsed}
+                keys = self._note_keys(ids.union(id for link in links for id in link[:2]))
+                self.conn.executemany("DELETE FROM link_files WHERE path = ?", stale)
+                self.conn.executemany("DELETE FROM links WHERE path = ?", stale)
+                self.conn.executemany("INSERT INTO link_files VALUES (?, ?, ?)", [row for row, _ in parsed])
+                self.conn.executemany(
+                    "INSERT INTO links VALUES (?, ?, ?, ?, ?)",
+                    [(keys[source], keys[target], *rest) for source, target, *rest in links],
+                )
+        return order
+
+    def _note_keys(self, ids):
+        """
+        Map each note id in ``ids`` to its integer key, assigning keys to new
+        ids. Keys are never reused, so links can store them in place of ids.
+        """
+        ids = list(ids)
+        self.conn.executemany("INSERT OR IGNORE INTO note_keys (id) VALUES (?)", [(id,) for id in ids])
+        keys = {}
+        for start in range(0, len(ids), SQL_CHUNK):
+            chunk = ids[start : start + SQL_CHUNK]
+            placeholders = ", ".join("?" * len(chunk))
+            keys.update(self.conn.execute(f"SELECT id, key FROM note_keys WHERE id IN ({placeholders})", chunk))
+        return keys
+
+    def has_links(self):
+        """Whether the link index has been built."""
+        return self.conn.execute("SELECT 1 FROM link_files LIMIT 1").fetchone() is not None
+
+    def links(self, id):
+        """
+        Yield ``(target, title, alias)`` for the wikilinks in note ``id``, in
+        the order they appear. ``title`` is the display title of the linked
+        note, or ``None`` when no note has that id.
+        """
+        yield from self.conn.execute(
+            "SELECT note_keys.id, notes.display_title, links.alias FROM links"
+            " JOIN note_keys ON note_keys.key = links.target"
+            " LEFT JOIN notes ON notes.id = note_keys.id"
+            " WHERE links.source = (SELECT key FROM note_keys WHERE id = ?)"
+            " GROUP BY links.rowid ORDER BY links.path, links.line, links.rowid",
+            (id,),
+        )
+
+    def backlinks(self, id):
+        """Yield ``(source, title)`` for every note linking to note ``id``, most recent first."""
+        yield from self.conn.execute(
+            "SELECT DISTINCT notes.id, notes.display_title FROM links"
+            " JOIN notes ON notes.path = links.path"
+            " WHERE links.target = (SELECT key FROM note_keys WHERE id = ?)"
+            " ORDER BY notes.mtime_ns DESC, notes.path DESC",
+            (id,),
+        )
+
+    def graph_nodes(self):
+        """
+        ``(key, id, is_note)`` for every id that is or was a note or a link
+        target, by key. ``is_note`` is false for links to missing notes.
+        """
+        return self.conn.execute(
+            "SELECT key, id, EXISTS (SELECT 1 FROM notes WHERE notes.id = note_keys.id) FROM note_keys ORDER BY key"
+        )
+
+    def graph_edges(self):
+        """Distinct ``(source, target)`` key pairs between different notes, ordered."""
+        return self.conn.execute(
+            "SELECT DISTINCT source, target FROM links WHERE source != target ORDER BY source, target"
+        )
+
+    def graph_signature(self):
+        """Changes whenever a note file is added, removed or modified."""
+        return repr(self.conn.execute("SELECT count(*), total(mtime_ns), total(size) FROM link_files").fetchone())
+
+    def store_ranks(self, signature, ranks):
+        """Replace the cached note ranks with ``(id, rank)`` pairs computed for ``signature``."""
+        with self.conn:
+            self.conn.execute("DELETE FROM ranks")
+            self.conn.executemany("INSERT OR REPLACE INTO ranks VALUES (?, ?)", ranks)
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('ranks', ?)", (signature,))
+
+    def ranks_signature(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'ranks'").fetchone()
+        return None if row is None else row[0]
+
+    def ranked_records(self, limit=None):
+        """Yield cached records by descending rank, then most recently modified first."""
+        rows = self.conn.execute(
+            "SELECT notes.path, notes.id, title, tags, status, display_title, mtime_ns FROM notes"
+            " LEFT JOIN ranks ON ranks.id = notes.id"
+            " ORDER BY coalesce(ranks.rank, 0) DESC, mtime_ns DESC, notes.path DESC LIMIT ?",
+            (-1 if limit is None else limit,),
+        )
+        for row in rows:
+            yield self._record(row)
+
+    def trigrams(self, digest):
+        """The cached :class:`~zettel.fuzzy.TrigramIndex` blob for ``digest``, if any."""
+        row = self.conn.execute("SELECT blob FROM trigrams WHERE digest = ?", (digest,)).fetchone()
+        return None if row is None else row[0]
+
+    def store_trigrams(self, digest, blob):
+        """Cache a trigram index, replacing the one of an older notebook state."""
+        with self.conn:
+            self.conn.execute("DELETE FROM trigrams")
+            self.conn.execute("INSERT INTO trigrams VALUES (?, ?)", (digest, blob))
+
+    def preview(self, id, width):
+        """The cached ``(mtime_ns, size, text)`` preview of note ``id`` at ``width``, if any."""
+        return self.conn.execute(
+            "SELECT mtime_ns, size, text FROM previews WHERE id = ? AND width = ?", (id, width)
+        ).fetchone()
+
+    def store_previews(self, rows):
+        """Cache ``(id, width, mtime_ns, size, text)`` previews."""
+        if rows:
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO previews VALUES (?, ?, ?, ?, ?)", rows)
+
+    def _map(self, parse, changed):
+        """
+        Apply ``parse`` to chunks of ``changed`` files, across ``self.jobs``
+        processes when there are enough of them to pay for the pool.
+        """
+        if self.jobs == 1 or len(changed) < MIN_PARALLEL_FILES:
+            return parse(changed)
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksize = max(64, len(changed) // (self.jobs * 4))
+        chunks = [changed[start : start + chunksize] for start in range(0, len(changed), chunksize)]
+        with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+            return [row for rows in pool.map(parse, chunks) for row in rows]
+
+    def _imap(self, parse, changed):
+        """
+        :meth:`_map` that yields the parsed rows a chunk at a time, in
+        order, as soon as each chunk is done.
+        """
+        if self.jobs == 1 or len(changed) < MIN_PARALLEL_FILES:
+            for start in range(0, len(changed), SQL_CHUNK):
+                yield parse(changed[start : start + SQL_CHUNK])
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksize = max(64, len(changed) // (self.jobs * 4))
+        chunks = [changed[start : start + chunksize] for start in range(0, len(changed), chunksize)]
+        pool = ProcessPoolExecutor(max_workers=self.jobs)
+        try:
+            yield from pool.map(parse, chunks)
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def _record(self, row):
+        path, id, title, tags, status, display_title, mtime_ns = row
+        return NoteRecord(
+            self._absolute(path),
+            id,
+            title,
+            tags.split("\n") if tags else [],
+            status,
+            display_title,
+            mtime_ns,
+        )
+
+    def records(self, paths=None, limit=None):
+        """
+        Yield cached records, most recently modified first, at most ``limit``.
+
+        When ``paths`` (relative paths as returned by :meth:`sync`) is given,
+        only those records are returned, in that order.
+        """
+        columns = "path, id, title, tags, status, display_title, mtime_ns"
+        if paths is None:
+            for row in self._select(columns, limit=limit):
+                yield self._record(row)
+            return
+
+        rows = {row[0]: row for row in self._select(columns, paths)}
+        for path in paths:
+            if path in rows:
+                yield self._record(rows[path])
+
+    def tag_counts(self, prefix=None):
+        """
+        ``(tag, count)`` for every note tag, most used first. With
+        ``prefix`` only the tags starting with it.
+        """
+        if not prefix:
+            return self.conn.execute(
+                "SELECT tag, count(*) AS n FROM note_tags GROUP BY tag ORDER BY n DESC, tag"
+            ).fetchall()
+        # A range over the tag index rather than LIKE, which is case-insensitive.
+        return self.conn.execute(
+            "SELECT tag, count(*) AS n FROM note_tags WHERE tag >= ? AND tag < ? GROUP BY tag ORDER BY n DESC, tag",
+            (prefix, prefix + "\U0010ffff"),
+        ).fetchall()
+
+    def tagged_records(self, tags, limit=None):
+        """Yield the records of notes with all of ``tags``, most recently modified first."""
+        tags = list(dict.fromkeys(tags))
+        postings = " INTERSECT ".join(["SELECT path FROM note_tags WHERE tag = ?"] * len(tags))
+        rows = self.conn.execute(
+            "SELECT path, id, title, tags, status, display_title, mtime_ns FROM notes"
+            f" WHERE path IN ({postings}) ORDER BY mtime_ns DESC, path DESC LIMIT ?",
+            (*tags, -1 if limit is None else limit),
+        )
+        for row in rows:
+            yield self._record(row)
+
+    def _select(self, columns, paths=None, limit=None):
+        if paths is None:
+            yield from self.conn.execute(
+                f"SELECT {columns} FROM notes ORDER BY mtime_ns DESC, path DESC LIMIT ?",
+                (-1 if limit is None else limit,),
+            )
+            return
+        paths = list(paths)
+        for start in range(0, len(paths), SQL_CHUNK):
+            chunk = paths[start : start + SQL_CHUNK]
+            placeholders = ", ".join("?" * len(chunk))
+            yield from self.conn.execute(
+                f"SELECT {columns} FROM notes WHERE path IN ({placeholders})", chunk
+            )
@@ -0,0 +1,61 @@
+"""
+Wikilinks between notes, as written by ``zt copy``: ``[[id|title]]`` and
+``[[id/index|title]]`` for folder notes. ``[[id]]``, ``[[id#heading]]`` and
+``[[Folder/id.md|alias]]`` resolve to the same note id.
+
+Links are extracted per file into the note index and refreshed by
+``(mtime_ns, size)``, with forward edges indexed by source id and reverse
+edges by target id.
+"""
+import re
+
+WIKILINK = re.compile(r"\[\[([^\[\]|#\n]+)(?:#[^\[\]|\n]*)?(?:\|([^\[\]\n]*))?\]\]")
+
+
+def link_target(target):
+    """The note id a wikilink ``target`` points to."""
+    target = target.strip().rstrip("/")
+    if target.endswith(".md"):
+        target = target[:-3]
+    if target.endswith("/index"):
+        target = target[: -len("/index")]
+    return target.rpartition("/")[2]
+
+
+def extract_links(text):
+    """Yield ``(line, target, alias)`` for each wikilink in ``text``."""
+    line = 1
+    position = 0
+    for match in WIKILINK.finditer(text):
+        line += text.count("\n", position, match.start())
+        position = match.start()
+        target = link_target(match.group(1))
+        if target:
+            alias = match.group(2)
+            yield line, target, alias.strip() if alias else None
+
+
+def _link_index(dir, jobs=None):
+    """The note index of ``dir`` with notes and links up to date."""
+    from .fzf import scan_files
+    from .index import NoteIndex
+    from .watch import watching
+
+    index = NoteIndex(dir, jobs=jobs)
+    if not (watching(dir) and index.has_links()):
+        files = list(scan_files(dir))
+        index.sync(files)
+        index.sync_links(files)
+    return index
+
+
+def links(dir, id, jobs=None):
+    """``(target, title, alias)`` for each wikilink in note ``id``; see :meth:`NoteIndex.links`."""
+    with _link_index(dir, jobs) as index:
+        return list(index.links(id))
+
+
+def backlinks(dir, id, jobs=None):
+    """``(source, title)`` for each note linking to note ``id``, most recent first."""
+    with _link_index(dir, jobs) as index:
+        return list(index.backlinks(id))
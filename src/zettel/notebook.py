@@ -1,54 +1,109 @@
+import os
 from pathlib import Path
-from .notes import Note
-from .tasks import Task, TASK_STATUS
-from .utils import unpack_fzf_prompt
-import subprocess
-import json
-from fzf import fzf_prompt
-from pathlib import Path
+from .fzf import Note, select_files
+from .index import NoteIndex
+from .table import NoteTable
 
 class Notebook:
-    def __init__(self, dir, notes=None):
+    def __init__(self, dir, notes=None, jobs=None):
         if not Path(dir).is_dir():
             raise NotADirectoryError(f'{dir} is not a directory.') 
         self.dir = Path(dir)
-        files = (
-            [Path(self.dir, note) for note in notes]
-            if notes
-            else [
-                f
-                for subdir in [self.dir / "Actions", self.dir / "Reference"]
-                if subdir.is_dir()
-                for f in list(subdir.glob('*.md')) + list(subdir.glob('*/index.md'))
-            ]
-        )
-        self.notes = self.read_notes(files)
+        self.jobs = jobs
+        self._signature = None
+        self._notes = None
+        self._trigrams = None
+        if notes:
+            self.notes = self.read_notes([Path(self.dir, note) for note in notes])
     
     def __repr__(self):
         return(f'<Notebook at {self.dir}>')
 
-    def read_notes(self, files):
-        return [(note.id, note) for note in (Note(f) for f in files)]
+    @property
+    def notes(self):
+        """Loaded on first use, so commands that only need tasks skip it."""
+        if self._notes is None:
+            self.refresh()
+        return self._notes
+
+    @notes.setter
+    def notes(self, notes):
+        self._notes = notes
+        self._trigrams = None
+
+    def refresh(self):
+        """
+        Re-scan the notebook and reload notes if any file was added, removed
+        or modified since the last load. Returns whether notes were reloaded.
+        """
+        files = select_files(self.dir)
+        signature = hash(tuple((file.path, file.stat.st_mtime_ns, file.stat.st_size) for file in files))
+        if signature == self._signature:
+            return False
+        self.notes = self.read_notes(files, prune=True)
+        self._signature = signature
+        return True
+
+    def reload(self):
+        """
+        Reload notes straight from the index without looking at the files,
+        for when a watcher keeps the index up to date.
+        """
+        with NoteIndex(self.dir, jobs=self.jobs) as index:
+            self.notes = NoteTable.from_records(self.dir, index.records())
+        self._signature = None
+
+    def read_notes(self, files, prune=False):
+        with NoteIndex(self.dir, jobs=self.jobs) as index:
+            paths = index.sync(files, prune=prune)
+            return NoteTable.from_records(self.dir, index.records(paths))
 
     def get_note_by_title(self, title):
         if not title:
             return None
 
-        display_match = self._match_note(lambda note: title == getattr(note, "display_title", note.title))
-        if display_match:
-            return display_match
-
-        normalized_query = self._normalize_display_title(title)
-        if normalized_query is None:
-            return None
-
-        return self._match_note(lambda note: normalized_query == note.title)
-
-    def _match_note(self, predicate):
-        for _, note in self.notes:
-            if predicate(note):
-                return note
-        return None
+        row = self.notes.row_by_display_title(title)
+        if row is None:
+            normalized_query = self._normalize_display_title(title)
+            if normalized_query is None:
+                return None
+            row = self.notes.row_by_title(normalized_query)
+
+        return None if row is None else self.notes[row]
+
+    def get_note_by_id(self, id):
+        row = self.notes.row_by_id(id)
+        return None if row is None else self.notes[row]
+
+    def find_fuzzy(self, query, top=10, threshold=None):
+        """
+        The ``top`` notes whose title and tags best match ``query`` by
+        trigram similarity, as ``(record, similarity)``, best first. See
+        :meth:`~zettel.fuzzy.TrigramIndex.search` for ``threshold``.
+        """
+        return [(self.notes[row], score) for row, score in self.trigrams.search(query, top, threshold)]
+
+    @property
+    def trigrams(self):
+        """
+        Trigram index of the loaded titles and tags, read from the note index
+        while the titles and tags it was built from are unchanged.
+        """
+        if self._trigrams is None:
+            from .fuzzy import TrigramIndex
+
+            notes = self.notes
+            digest = notes.digest()
+            with NoteIndex(self.dir, jobs=self.jobs) as index:
+                blob = index.trigrams(digest)
+                if blob is not None:
+                    self._trigrams = TrigramIndex.loads(blob)
+                else:
+                    self._trigrams = TrigramIndex.build(
+                        " ".join([notes.title(row), *notes.tags(row)]) for row in range(len(notes))
+                    )
+                    index.store_trigrams(digest, self._trigrams.dumps())
+        return self._trigrams
 
     @staticmethod
     def _normalize_display_title(title):
@@ -69,20 +124,74 @@ class Notebook:
 
         return trimmed
     
-    def get_tasks(self):
-        command = ["rg", "--json", TASK_STATUS, self.dir]
-        result = subprocess.run(command, stdout=subprocess.PIPE, text=True)
-
-        matches = []
-        for line in result.stdout.splitlines():
-            data = json.loads(line)
-            if data["type"] == "match":
-                match_data = {
-                    "path": Path(data["data"]["path"]["text"]).stem,
-                    "line": data["data"]["line_number"],
-                    "task": Task(data["data"]["lines"]["text"])
-                }
-                matches.append(match_data)
+    def find_tasks(self, scanner="auto", query=None):
+        """
+        Yield the tasks in the notebook that match ``query`` (a
+        :class:`~zettel.tasks.TaskQuery`, all tasks by default). With
+        ``scanner="auto"`` parsed tasks come from the index and only changed
+        files are scanned; ``rg`` and ``native`` force a full scan with that
+        scanner, filtering tasks as they are parsed. Each task's ``path`` is
+        its note's id, so folder notes are named after their folder.
+        """
+        from .scanner import find_tasks, note_paths
+        from .tasks import Task, TaskQuery, file_date
+
+        query = query or TaskQuery()
+        if scanner == "auto":
+            paths = note_paths(self.dir)
+            if query.files:
+                paths = [path for path in paths if query.accepts_file(self._relative(path))]
+            with NoteIndex(self.dir, jobs=self.jobs) as index:
+                path = id = None
+                for file, line, task in index.tasks(paths, query):
+                    if file != path:
+                        path, id = file, Note._extract_id(Path(file))
+                    yield {
+                        "path": id,
+                        "line": line,
+                        "task": task
+                    }
+            return
+
+        for path, line, text in find_tasks(self.dir, jobs=self.jobs, scanner=scanner):
+            if not query.accepts_file(self._relative(path)):
+                continue
+            task = Task(text)
+            if not query.matches(task.task, file_date(path)):
+                continue
+            yield {
+                "path": Note._extract_id(Path(path)),
+                "line": line,
+                "task": task
+            }
+
+    def _relative(self, path):
+        return os.path.relpath(path, self.dir).replace(os.sep, "/")
+
+    def write_tasks(self, file, format="jsonl", scanner="auto", query=None):
+        """
+        Write one task per line to ``file`` as it is read, in notebook
+        order: JSON objects for ``jsonl``, ``path, line, status, duration,
+        title`` columns for ``tsv``.
+        """
+        import json
+
+        from .tasks import json_default, task_row
+
+        for match in self.find_tasks(scanner, query):
+            if format == "tsv":
+                file.write("\t".join(task_row(match)) + "\n")
+            else:
+                file.write(json.dumps(match, default=json_default, ensure_ascii=False) + "\n")
+
+    def get_tasks(self, scanner="auto", dump_json=None, query=None):
+        import json
+
+        from .fzf import fzf_prompt
+        from .tasks import json_default
+        from .utils import unpack_fzf_prompt
+
+        matches = list(self.find_tasks(scanner, query))
 
         status_order = {
             '@focus': 0, 
@@ -97,10 +206,11 @@ class Notebook:
             '@done': 90,
             '@wontfix': 99
         }
-        sorted_tasks = sorted(matches, key=lambda x: status_order.get(x['task'].task['status'], 6))
-        with open('data.json', 'w') as fs:
-            json.dump(sorted_tasks, fs, indent=2)
-        tasks_fmt = [f"{task['task'].task['title']} [{task['task'].task['status']}]" for task in sorted_tasks if task['task'].task['open']]
+        sorted_tasks = sorted(matches, key=lambda x: status_order.get(x['task'].status, 6))
+        if dump_json:
+            with open(dump_json, 'w') as fs:
+                json.dump(sorted_tasks, fs, indent=2, default=json_default)
+        tasks_fmt = [f"{task['task'].title} [{task['task'].status}]" for task in sorted_tasks]
         result = fzf_prompt(tasks_fmt, reversed_layout=True, print_query=True, match_exact=True)
 
         task_path = None
@@ -108,7 +218,7 @@ class Notebook:
         query, task_title = unpack_fzf_prompt(result)
 
         for task in sorted_tasks:
-            if task_title and (task['task'].task['title'] in task_title):
+            if task_title and (task['task'].title in task_title):
                 task_path = f'{task["path"]}:{task["line"]}'
                 break
         
@@ -0,0 +1,117 @@
+"""
+Rendered note previews for the ``zt search`` preview pane (``zt preview``).
+
+A preview is the note without its frontmatter, capped to ``MAX_LINES`` lines,
+rendered to ANSI text with rich at a given width. Previews are cached in the
+note index by note id and width, and used while the note's ``(mtime_ns,
+size)`` is unchanged, so a cached preview costs one ``stat`` and one query.
+
+:func:`warm` renders the previews of the most recent notes ahead of time. It
+holds ``.zettel/preview.lock`` while it runs, and returns at once when
+another warm-up already holds it.
+"""
+import os
+
+from .fzf import Note, find_note_file, select_files
+from .index import NoteIndex, cache_path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+DEFAULT_WIDTH = 80
+MAX_LINES = 200
+MAX_CHARS = 20_000
+WARM_COUNT = 200
+WARM_BATCH = 20
+
+
+def lock_path(dir):
+    return cache_path(dir).with_name("preview.lock")
+
+
+def markdown(path):
+    """The text of the note at ``path`` to render: titled, without frontmatter, capped."""
+    note = Note(path)
+    body = note.body.lstrip("\n")
+    if not body.startswith("# "):
+        body = f"# {note.title}\n\n{body}"
+    lines = body[:MAX_CHARS].splitlines()
+    if len(lines) > MAX_LINES or len(body) > MAX_CHARS:
+        lines = lines[:MAX_LINES] + ["", "…"]
+    return "\n".join(lines)
+
+
+def render(path, width=DEFAULT_WIDTH):
+    """Render the note at ``path`` to ANSI text ``width`` columns wide."""
+    import io
+
+    from rich.console import Console
+    from rich.markdown import Markdown
+
+    console = Console(file=io.StringIO(), force_terminal=True, color_system="256", width=width)
+    console.print(Markdown(markdown(path)))
+    return console.file.getvalue()
+
+
+def preview(dir, id, width=DEFAULT_WIDTH):
+    """The rendered preview of note ``id``, from the cache when it is current."""
+    path = find_note_file(dir, id)
+    if path is None:
+        return None
+    st = os.stat(path)
+    with NoteIndex(dir) as index:
+        cached = index.preview(id, width)
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+        text = render(path, width)
+        index.store_previews([(id, width, st.st_mtime_ns, st.st_size, text)])
+    return text
+
+
+def warm(dir, count=WARM_COUNT, width=DEFAULT_WIDTH):
+    """
+    Render and cache the previews of the ``count`` most recently modified
+    notes that are missing or stale. Returns how many were rendered, or
+    ``None`` when another warm-up is already running.
+    """
+    lock = _acquire_lock(dir)
+    if lock is False:
+        return None
+    try:
+        rendered = 0
+        with NoteIndex(dir) as index:
+            batch = []
+            for file in select_files(dir, limit=count):
+                cached = index.preview(file.id, width)
+                if cached is not None and cached[:2] == (file.stat.st_mtime_ns, file.stat.st_size):
+                    continue
+                batch.append((file.id, width, file.stat.st_mtime_ns, file.stat.st_size, render(file.path, width)))
+                if len(batch) == WARM_BATCH:
+                    index.store_previews(batch)
+                    rendered += len(batch)
+                    batch = []
+            index.store_previews(batch)
+            rendered += len(batch)
+        return rendered
+    finally:
+        if lock is not None:
+            os.close(lock)
+
+
+def _acquire_lock(dir):
+    """The locked file descriptor, ``None`` when locking is unavailable, or ``False`` when taken."""
+    if fcntl is None:
+        return None
+    try:
+        os.makedirs(cache_path(dir).parent, exist_ok=True)
+        fd = os.open(lock_path(dir), os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
+        return None
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    return fd
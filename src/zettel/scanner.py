@@ -0,0 +1,125 @@
+"""
+Find task lines (``- @status ...``) in a notebook.
+
+``find_tasks`` uses ripgrep when it is installed and otherwise the built-in
+scanner, which reads (or, for large files, memory-maps) each note, skips
+files without ``- @`` and runs the task regex over the rest. Both yield
+``(path, line_number, text)`` tuples as they are found.
+"""
+import json
+import mmap
+import os
+import re
+import shutil
+import subprocess
+
+from .index import MIN_PARALLEL_FILES, resolve_jobs
+from .tasks import TASK_STATUS
+
+MMAP_THRESHOLD = 1 << 16
+TASK_PREFIX = b"- @"
+TASK_LINE = re.compile(rb"^- (?:" + TASK_STATUS.encode() + rb") ", re.MULTILINE)
+RG_TASK_LINE = "^- (?:" + TASK_STATUS + ") "
+
+
+def note_paths(dir):
+    """Every ``*.md`` file under ``dir``, skipping hidden files and folders."""
+    for root, dirs, files in os.walk(dir):
+        dirs[:] = sorted(name for name in dirs if not name.startswith("."))
+        for name in sorted(files):
+            if name.endswith(".md") and not name.startswith("."):
+                yield os.path.join(root, name)
+
+
+def scan_file(path):
+    """
+    Return ``(line_number, text)`` for every task line in ``path``.
+
+    Files up to ``MMAP_THRESHOLD`` bytes are read with a single ``read``,
+    which is cheaper than mapping them; larger ones are memory-mapped.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return []
+    try:
+        buffer = os.read(fd, MMAP_THRESHOLD)
+        if len(buffer) == MMAP_THRESHOLD:
+            buffer = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return []
+    finally:
+        os.close(fd)
+
+    try:
+        return scan_buffer(buffer)
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+
+
+def scan_buffer(buffer):
+    if buffer.find(TASK_PREFIX) == -1:
+        return []
+    tasks = []
+    line_number = 1
+    position = 0
+    for match in TASK_LINE.finditer(buffer):
+        start = match.start()
+        line_number += buffer[position:start].count(b"\n")
+        position = start
+        end = buffer.find(b"\n", start)
+        text = buffer[start : len(buffer) if end == -1 else end].rstrip(b"\r")
+        tasks.append((line_number, text.decode("utf-8", errors="replace")))
+    return tasks
+
+
+def _scan_chunk(paths):
+    return [(path, line, text) for path in paths for line, text in scan_file(path)]
+
+
+def scan_tasks(dir, jobs=None):
+    """
+    Built-in scanner. Files are split across ``jobs`` processes when there
+    are enough of them; matches are yielded in file order either way.
+    """
+    paths = list(note_paths(dir))
+    jobs = resolve_jobs(jobs)
+    if jobs == 1 or len(paths) < MIN_PARALLEL_FILES:
+        for path in paths:
+            for line, text in scan_file(path):
+                yield path, line, text
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(64, len(paths) // (jobs * 4))
+    chunks = [paths[start : start + chunksize] for start in range(0, len(paths), chunksize)]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for matches in pool.map(_scan_chunk, chunks):
+            yield from matches
+
+
+def rg_tasks(dir):
+    """Task lines as reported by ``rg --json``."""
+    command = ["rg", "--json", RG_TASK_LINE, str(dir)]
+    with subprocess.Popen(command, stdout=subprocess.PIPE, text=True) as process:
+        for line in process.stdout:
+            data = json.loads(line)
+            if data["type"] == "match":
+                yield (
+                    data["data"]["path"]["text"],
+                    data["data"]["line_number"],
+                    data["data"]["lines"]["text"].rstrip("\r\n"),
+                )
+
+
+def find_tasks(dir, jobs=None, scanner="auto"):
+    """Yield ``(path, line_number, text)`` for each task line under ``dir``."""
+    if scanner == "auto":
+        scanner = "rg" if shutil.which("rg") else "native"
+    if scanner == "rg":
+        return rg_tasks(dir)
+    if scanner == "native":
+        return scan_tasks(dir, jobs=jobs)
+    raise ValueError(f"Unknown task scanner: {scanner}")
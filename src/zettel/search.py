@@ -0,0 +1,80 @@
+"""
+Full-text search over note bodies for ``zt grep``.
+
+Titles and bodies (without frontmatter) are kept in an SQLite FTS5 table in
+the note index, whose doclists are the compressed postings, and synced by
+``(mtime_ns, size)`` like the rest of the index; while a watcher runs it
+keeps them current instead. Results are ranked by BM25 and shown with a
+snippet around the first match.
+"""
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+from .fzf import scan_files
+from .index import NoteIndex
+from .watch import watching
+
+TERM = re.compile(r"\w+\*?")
+SNIPPET_WIDTH = 160
+HIGHLIGHT = "\033[1;31m{}\033[0m"
+
+
+class Hit(NamedTuple):
+    path: Path
+    title: str
+    snippet: str
+
+
+def query_terms(query):
+    """The words of ``query``; a trailing ``*`` makes a word a prefix."""
+    return TERM.findall(query)
+
+
+def match_expression(terms):
+    """
+    FTS5 expression matching notes that contain every term. Words are quoted
+    so that FTS5 operators and column filters in the query are taken
+    literally.
+    """
+    return " ".join(f'"{term[:-1]}"*' if term.endswith("*") else f'"{term}"' for term in terms)
+
+
+def term_pattern(terms):
+    words = sorted({term.rstrip("*") for term in terms}, key=len, reverse=True)
+    alternatives = [re.escape(word) + (r"\w*" if f"{word}*" in terms else r"\b") for word in words]
+    return re.compile(r"\b(?:" + "|".join(alternatives) + ")", re.IGNORECASE)
+
+
+def snippet(body, terms, width=SNIPPET_WIDTH):
+    """
+    About ``width`` characters of ``body`` around the first match of
+    ``terms``, on one line. Falls back to the start of the body when no term
+    matches literally (FTS5 also ignores diacritics).
+    """
+    match = term_pattern(terms).search(body) if terms else None
+    start = 0 if match is None else max(0, match.start() - width // 3)
+    if start:
+        space = body.find(" ", start, match.start())
+        start = space + 1 if space != -1 else start
+    end = start + width
+    text = " ".join(body[start:end].split())
+    return ("…" if start else "") + text + ("…" if end < len(body.rstrip()) else "")
+
+
+def highlight(text, terms):
+    return term_pattern(terms).sub(lambda match: HIGHLIGHT.format(match.group()), text)
+
+
+def grep(dir, query, limit=20, jobs=None):
+    """The ``limit`` notes under ``dir`` that best match ``query``."""
+    terms = query_terms(query)
+    if not terms:
+        return []
+    with NoteIndex(dir, jobs=jobs) as index:
+        if not (watching(dir) and index.has_text()):
+            index.sync_text(scan_files(dir))
+        return [
+            Hit(index._absolute(path), title, snippet(body, terms))
+            for path, title, body in index.search(match_expression(terms), limit)
+        ]
@@ -0,0 +1,161 @@
+"""
+``zt serve``: keep a notebook loaded and answer ``zt`` commands over a Unix
+domain socket.
+
+Each request is one JSON line ``{"command": ..., "args": {...}}`` and gets
+one JSON reply ``{"ok": true, "result": ...}``. The work is done by the same
+functions the commands use in-process, so output is identical either way.
+
+With ``watch`` a :class:`~zettel.watch.Watcher` thread applies file changes
+to the index and the notebook is reloaded from it only after a change,
+instead of stat'ing every note on each request.
+"""
+import json
+import os
+import socketserver
+import threading
+from pathlib import Path
+
+from .client import send, socket_path
+from .fzf import _colorize_display, get_titles
+from .notebook import Notebook
+from .watch import Watcher
+
+
+def record_to_dict(note, dir):
+    return {
+        "path": note.path.relative_to(dir).as_posix(),
+        "id": note.id,
+        "title": note.title,
+        "tags": list(note.tags),
+        "status": note.status,
+        "display_title": note.display_title,
+        "mtime_ns": note.mtime_ns,
+    }
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            payload = json.loads(self.rfile.readline())
+            result = self.server.dispatch(payload["command"], payload.get("args") or {})
+            response = {"ok": True, "result": result}
+        except Exception as err:
+            response = {"ok": False, "error": f"{type(err).__name__}: {err}"}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class NotebookServer(socketserver.UnixStreamServer):
+    def __init__(self, dir, jobs=None, watch=False, backend="auto", interval=1.0):
+        self.dir = Path(dir)
+        self.path = socket_path(self.dir)
+        self._claim(self.path)
+        self.watcher = None
+        if watch:
+            self._start_watcher(Watcher(self.dir, backend=backend, interval=interval, jobs=jobs))
+        self.notebook = Notebook(self.dir, jobs=jobs)
+        self.notebook.refresh()
+        super().__init__(self.path, RequestHandler)
+
+    def __repr__(self):
+        return f"<NotebookServer for {self.dir} on {self.path}>"
+
+    @staticmethod
+    def _claim(path):
+        if not os.path.exists(path):
+            return
+        try:
+            send(path, {"command": "ping", "args": {}}, timeout=1)
+        except OSError:
+            os.unlink(path)
+        else:
+            raise RuntimeError(f"zt serve is already running on {path}")
+
+    def _start_watcher(self, watcher):
+        self._changed = threading.Event()
+        self._stop = threading.Event()
+        started = threading.Event()
+        errors = []
+        watcher.on_change = lambda changed: self._changed.set()
+
+        def run():
+            # The watcher's index connection must live in this thread.
+            try:
+                watcher.start()
+                # The notebook is loaded after the initial scan.
+                self._changed.clear()
+            except OSError as err:
+                errors.append(err)
+                return
+            finally:
+                started.set()
+            try:
+                watcher.run(self._stop)
+            finally:
+                watcher.close()
+
+        self._thread = threading.Thread(target=run, name="zt-watch", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise RuntimeError(f"Cannot watch {self.dir}: {errors[0]}")
+        self.watcher = watcher
+
+    def _refresh(self):
+        if self.watcher is None:
+            self.notebook.refresh()
+        elif self._changed.is_set():
+            self._changed.clear()
+            self.notebook.reload()
+
+    def server_close(self):
+        super().server_close()
+        if self.watcher is not None:
+            self._stop.set()
+            self._thread.join()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def dispatch(self, command, args):
+        handler = getattr(self, f"do_{command}", None)
+        if handler is None:
+            raise ValueError(f"Unknown command: {command}")
+        return handler(**args)
+
+    def do_ping(self):
+        return str(self.dir)
+
+    def do_list(self, sort="mtime", limit=None, with_id=False, tags=None):
+        if sort != "mtime" or tags:
+            return list(get_titles(self.dir, sort=sort, limit=limit, with_id=with_id, tags=tags))
+        self._refresh()
+        notes = self.notebook.notes
+        rows = range(len(notes) if limit is None else min(limit, len(notes)))
+        lines = []
+        for row in rows:
+            note = notes[row]
+            title = _colorize_display(note.display_title, note.tags, note.status)
+            lines.append(f"{note.id}\t{title}" if with_id else title)
+        return lines
+
+    def do_note(self, title=None):
+        self._refresh()
+        note = self.notebook.get_note_by_title(title)
+        return {"note": None if note is None else record_to_dict(note, self.dir)}
+
+    def do_fuzzy(self, query, top=10, threshold=None):
+        self._refresh()
+        return [
+            {**record_to_dict(note, self.dir), "similarity": score}
+            for note, score in self.notebook.find_fuzzy(query, top, threshold)
+        ]
+
+
+def serve(dir, jobs=None, watch=False, backend="auto"):
+    with NotebookServer(dir, jobs=jobs, watch=watch, backend=backend) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,172 @@
+import hashlib
+import os
+import sys
+from array import array
+from pathlib import Path
+
+from .fzf import Note
+from .index import NoteRecord
+
+LAYOUTS = (
+    "Actions/{}.md",
+    "Reference/{}.md",
+    "Actions/{}/index.md",
+    "Reference/{}/index.md",
+)
+OTHER_LAYOUT = 255
+
+
+class NoteTable:
+    """
+    Columnar, append-only store of note metadata.
+
+    Ids and tags are interned, status is a small integer into a shared
+    vocabulary, titles live in one UTF-8 buffer and paths are reduced to a
+    layout code whenever they follow the notebook layout. ``NoteRecord``
+    objects are only built when a row is accessed; ``display_title`` is
+    derived on the fly.
+
+    Iterating yields ``(id, record)`` pairs, like the list it replaces.
+
+    Rows are also hashed by id, title and display title as they are
+    appended. When several notes share a key the first one appended wins,
+    which for a notebook load is the most recently modified.
+    """
+
+    def __init__(self, dir):
+        self.dir = Path(dir)
+        self._prefix = "" if str(self.dir) == "." else os.path.join(self.dir, "")
+        self.ids = []
+        self._layouts = array("B")
+        self._other_paths = {}
+        self._titles = bytearray()
+        self._title_offsets = array("Q", [0])
+        self._tag_vocabulary = []
+        self._tag_codes = {}
+        self._tags = array("I")
+        self._tag_offsets = array("Q", [0])
+        self._status_vocabulary = [None]
+        self._status_codes = {None: 0}
+        self._statuses = array("H")
+        self._mtimes = array("q")
+        self._by_id = {}
+        self._by_title = {}
+        self._by_display_title = {}
+
+    def __repr__(self):
+        return f"<NoteTable of {len(self)} notes at {self.dir}>"
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.ids[row], self[row]
+
+    def __getitem__(self, row):
+        title, tags, status = self.title(row), self.tags(row), self.status(row)
+        return NoteRecord(
+            self.path(row),
+            self.ids[row],
+            title,
+            tags,
+            status,
+            Note._format_display_title(title, tags, status),
+            self._mtimes[row],
+        )
+
+    @classmethod
+    def from_records(cls, dir, records):
+        table = cls(dir)
+        for record in records:
+            table.append(record)
+        return table
+
+    def append(self, record):
+        row = len(self.ids)
+        id = sys.intern(record.id)
+        self.ids.append(id)
+
+        rel = self._relative(record.path)
+        for code, layout in enumerate(LAYOUTS):
+            if rel == layout.format(id):
+                self._layouts.append(code)
+                break
+        else:
+            self._layouts.append(OTHER_LAYOUT)
+            self._other_paths[row] = rel
+
+        self._titles += record.title.encode("utf-8")
+        self._title_offsets.append(len(self._titles))
+
+        for tag in record.tags:
+            code = self._tag_codes.get(tag)
+            if code is None:
+                code = self._tag_codes[tag] = len(self._tag_vocabulary)
+                self._tag_vocabulary.append(sys.intern(tag))
+            self._tags.append(code)
+        self._tag_offsets.append(len(self._tags))
+
+        status = self._status_codes.get(record.status)
+        if status is None:
+            status = self._status_codes[record.status] = len(self._status_vocabulary)
+            self._status_vocabulary.append(sys.intern(record.status))
+        self._statuses.append(status)
+
+        self._mtimes.append(record.mtime_ns)
+
+        self._by_id.setdefault(id, row)
+        self._by_title.setdefault(record.title, row)
+        display_title = Note._format_display_title(record.title, record.tags, record.status)
+        self._by_display_title.setdefault(display_title, row)
+        return row
+
+    def _relative(self, path):
+        path = os.fspath(path)
+        if path.startswith(self._prefix):
+            path = path[len(self._prefix) :]
+        return path.replace(os.sep, "/")
+
+    def path(self, row):
+        code = self._layouts[row]
+        if code == OTHER_LAYOUT:
+            return self.dir / self._other_paths[row]
+        return self.dir / LAYOUTS[code].format(self.ids[row])
+
+    def title(self, row):
+        start, end = self._title_offsets[row], self._title_offsets[row + 1]
+        return self._titles[start:end].decode("utf-8")
+
+    def tags(self, row):
+        start, end = self._tag_offsets[row], self._tag_offsets[row + 1]
+        return [self._tag_vocabulary[code] for code in self._tags[start:end]]
+
+    def status(self, row):
+        return self._status_vocabulary[self._statuses[row]]
+
+    def row_by_id(self, id):
+        return self._by_id.get(id)
+
+    def row_by_title(self, title):
+        return self._by_title.get(title)
+
+    def row_by_display_title(self, display_title):
+        return self._by_display_title.get(display_title)
+
+    def digest(self):
+        """A hash of every title and tag list, in row order."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self._title_offsets.tobytes())
+        digest.update(self._titles)
+        digest.update(self._tag_offsets.tobytes())
+        digest.update(self._tags.tobytes())
+        digest.update("\n".join(self._tag_vocabulary).encode("utf-8"))
+        return digest.hexdigest()
+
+    def records(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def load(self, row):
+        """Parse the note file behind ``row`` into a full ``Note``."""
+        return Note(self.path(row), lazy=True)
@@ -1,17 +1,193 @@
+import json
+import os
 import re
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
 import logging
-import humanize
+
+from .fzf import Note
 
 logger = logging.getLogger()
 
 TASK_STATUS = "@project|@wip|@focus|@todo|@next|@later|@someday|@waiting|@review|@wonftix|@done"
+TASK_LINE = re.compile(rf'- ({TASK_STATUS}) (.*)')
+TAGS = re.compile(r'@([a-zA-Z0-9_]+)(?:\((.*?)\))?')
+CLOCK_SEPARATOR = re.compile('[,;]')
+DATE = re.compile(r'\d{8}')
+TIMESTAMP = re.compile(r'(\d{4})(\d{2})(\d{2})T(\d{2})(\d{2})(\d{2})')
+
+
+def parse_timestamp(value):
+    """``datetime.strptime(value, '%Y%m%dT%H%M%S')``, without the format parsing."""
+    match = TIMESTAMP.fullmatch(value)
+    if match is None:
+        raise ValueError(f'Invalid timestamp: {value!r}')
+    return datetime(*map(int, match.groups()))
+
+
+@lru_cache(maxsize=4096)
+def precisedelta(duration):
+    import humanize
+
+    return humanize.precisedelta(duration, suppress=['seconds'])
+
+def file_date(file):
+    """Ordinal of the ``YYYYMMDD`` date in the name of ``file``, or 0."""
+    match = DATE.search(os.path.basename(file))
+    if match is None:
+        return 0
+    value = match.group(0)
+    try:
+        return date(int(value[:4]), int(value[4:6]), int(value[6:])).toordinal()
+    except ValueError:
+        return 0
+
+
+def task_tags(task, fallback=0):
+    """
+    The ``(tag, value)`` pairs of a parsed ``task`` that filters look at:
+    string values as is, ``None`` for bare tags and, for ``clock``, the ISO
+    date of the latest session. Sessions without a start count as the
+    ``fallback`` day ordinal (see :func:`file_date`).
+    """
+    for key, value in task['tags'].items():
+        if key == 'clock':
+            if value:
+                day = max(session['start'].toordinal() if session['start'] else fallback for session in value)
+                yield key, date.fromordinal(day).isoformat() if day else None
+        else:
+            yield key, value if isinstance(value, str) else None
+
+
+class TaskQuery(NamedTuple):
+    """Filters for ``zt tasks``. The defaults match every task."""
+
+    status: str = 'all'
+    tags: Tuple[str, ...] = ()
+    activity: Optional[str] = None
+    since: Optional[str] = None
+    files: Tuple[str, ...] = ()
+
+    def accepts_open(self, open):
+        return self.status == 'all' or open == (self.status == 'open')
+
+    def accepts_file(self, rel):
+        """Whether ``rel`` is one of ``files``, given as a relative path or a note id."""
+        if not self.files:
+            return True
+        return rel in self.files or Note._extract_id(Path(rel)) in self.files
+
+    def terms(self):
+        """``(tag, operator, value)`` conditions every matching task meets."""
+        terms = [(tag.lstrip('@'), None, None) for tag in self.tags]
+        if self.activity is not None:
+            terms.append(('activity', '=', self.activity))
+        if self.since is not None:
+            terms.append(('clock', '>=', self.since))
+        return terms
+
+    def matches(self, task, fallback=0):
+        """Whether a parsed ``task`` passes every filter but ``files``."""
+        if not self.accepts_open(task['open']):
+            return False
+        tags = dict(task_tags(task, fallback))
+        for key, operator, value in self.terms():
+            if key not in tags:
+                return False
+            if operator == '=' and tags[key] != value:
+                return False
+            if operator == '>=' and (tags[key] is None or tags[key] < value):
+                return False
+        return True
+
+
+def json_default(value):
+    """``json.dump`` fallback: ISO 8601 datetimes, durations in seconds and tasks as dicts."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, Task):
+        return value.task
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps_task(task):
+    """
+    ``task`` as JSON for the index, with clock session times in ISO 8601
+    and durations in whole seconds. Read back by :func:`loads_task`.
+    """
+    clock = task['tags'].get('clock')
+    if clock:
+        sessions = [
+            {
+                'start': session['start'] and session['start'].isoformat(),
+                'end': session['end'] and session['end'].isoformat(),
+                'duration': int(session['duration'].total_seconds()),
+            }
+            for session in clock
+        ]
+        task = {**task, 'tags': {**task['tags'], 'clock': sessions}}
+    return json.dumps(task, separators=(',', ':'))
+
+
+def loads_task(text):
+    """The ``task`` dict written by :func:`dumps_task`."""
+    task = json.loads(text)
+    for session in task['tags'].get('clock') or ():
+        session['start'] = session['start'] and datetime.fromisoformat(session['start'])
+        session['end'] = session['end'] and datetime.fromisoformat(session['end'])
+        session['duration'] = timedelta(seconds=session['duration'])
+    return task
+
+
+def task_row(match):
+    """The TSV columns of a ``{path, line, task}`` match."""
+    task = match['task'].task
+    title = ' '.join(task['title'].split())
+    return [match['path'], str(match['line']), task['status'], task['duration'] or '', title]
+
 
 class Task():
 
     def __init__(self, line):
         self.task = self.parse_task(line)
 
+    @classmethod
+    def from_cache(cls, title, status, open, text):
+        """
+        A task read from the index. Only the fields needed to list it are
+        at hand; the full ``task`` dict is decoded from the JSON ``text``
+        (see :func:`dumps_task`) when used.
+        """
+        self = cls.__new__(cls)
+        self._cached = (title, status, open, text)
+        return self
+
+    def __getattr__(self, name):
+        cached = self.__dict__.get('_cached')
+        if name == 'task' and cached is not None:
+            self.task = loads_task(cached[3])
+            return self.task
+        raise AttributeError(name)
+
+    @property
+    def title(self):
+        cached = self.__dict__.get('_cached')
+        return cached[0] if cached else self.task['title']
+
+    @property
+    def status(self):
+        cached = self.__dict__.get('_cached')
+        return cached[1] if cached else self.task['status']
+
+    @property
+    def open(self):
+        cached = self.__dict__.get('_cached')
+        return cached[2] if cached else self.task['open']
+
     def __repr__(self) -> str:
         return str(self.task)
 
@@ -33,7 +209,7 @@ class Task():
             return f"{minutes:02d}:{seconds:02d}"
 
     def extract_date(self, filename):
-        match = re.search(r'\d{8}', filename)
+        match = DATE.search(filename)
         if match:
             date_str = match.group(0)
             return date_str
@@ -58,8 +234,7 @@ class Task():
         return result
 
     def split_task(self, line):
-        pattern = re.compile(rf'- ({TASK_STATUS}) (.*)')
-        match = pattern.match(line)
+        match = TASK_LINE.match(line)
         if match:
             status, task = match.groups()
             return [status, task]
@@ -69,19 +244,18 @@ class Task():
     def parse_task(self, task):
         status, body = self.split_task(task)
 
-        tags_re = re.compile(r'@([a-zA-Z0-9_]+)(?:\((.*?)\))?')
-        matches = tags_re.findall(body)
+        matches = TAGS.findall(body)
 
         tags = {key: value if value != '' else True for key, value in matches}
 
         if 'clock' in tags.keys():
             tags['clock'] = self.parse_clock(tags['clock'])
-            task_duration = humanize.precisedelta(sum([session['duration'] for session in tags['clock']], timedelta()), suppress=['seconds'])
+            task_duration = precisedelta(sum([session['duration'] for session in tags['clock']], timedelta()))
         else:
             tags['clock'] = None
             task_duration = None
         
-        title = tags_re.sub('', body).strip()
+        title = TAGS.sub('', body).strip()
 
         output = {
             "title": title,
@@ -95,14 +269,14 @@ class Task():
     
     def parse_clock(self, sessions):
         result = []
-        sessions = re.split('[,;]', sessions)
+        sessions = CLOCK_SEPARATOR.split(sessions)
         for session in sessions:
             try:
                 start, end = session.split('/')
                 start = start.strip()
                 end = end.strip()
                 duration = timedelta(seconds=self.parse_duration(end))
-                start_ts = datetime.strptime(start, '%Y%m%dT%H%M%S')
+                start_ts = parse_timestamp(start)
                 end_ts = start_ts + duration
             except ValueError:
                 end = session
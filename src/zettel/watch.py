@@ -0,0 +1,344 @@
+"""
+Keep the note index up to date as files change.
+
+A :class:`Watcher` turns filesystem events under ``Actions/`` and
+``Reference/`` into index updates: new and edited notes are parsed again,
+deleted ones dropped, and a rename is both. Once ``zt grep`` or ``zt links``
+have built the full-text or link index, those are kept up to date as well.
+Watchers use inotify on Linux and otherwise poll the ``(mtime_ns, size)``
+of every note, so adds, removes, renames and in-place edits all show up
+on the next poll.
+
+While a watcher runs it holds an exclusive lock on ``.zettel/watch.lock``;
+:func:`watching` lets listings trust the index instead of stat'ing every
+file.
+"""
+import os
+import select
+import struct
+import time
+from pathlib import Path
+
+from .fzf import scan_files
+from .index import NoteIndex, cache_enabled, cache_path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+NOTE_DIRS = ("Actions", "Reference")
+FULL_SCAN = None
+DEBOUNCE = 0.05
+POLL_INTERVAL = 1.0
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def lock_path(dir):
+    return cache_path(dir).with_name("watch.lock")
+
+
+def watching(dir):
+    """Whether a watcher is keeping the index of ``dir`` up to date."""
+    if fcntl is None or not cache_enabled():
+        return False
+    try:
+        fd = os.open(lock_path(dir), os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+    except OSError:
+        return True
+    finally:
+        os.close(fd)
+    return False
+
+
+def is_note_path(rel):
+    """Whether the relative posix path ``rel`` is a note in the notebook layout."""
+    parts = rel.split("/")
+    if parts[0] not in NOTE_DIRS:
+        return False
+    if len(parts) == 2:
+        return parts[1].endswith(".md")
+    return len(parts) == 3 and parts[2] == "index.md"
+
+
+class PollingBackend:
+    """Detect changes by comparing the ``(mtime_ns, size)`` of every note between polls."""
+
+    def __init__(self, dir, interval=POLL_INTERVAL):
+        self.dir = Path(dir)
+        self.interval = interval
+        self._files = {}
+
+    def __repr__(self):
+        return f"<PollingBackend for {self.dir}>"
+
+    def start(self):
+        self._files = self._snapshot()
+
+    def close(self):
+        pass
+
+    def _snapshot(self):
+        return {file.path: (file.stat.st_mtime_ns, file.stat.st_size) for file in scan_files(self.dir)}
+
+    def changes(self, timeout=None):
+        """
+        Wait one ``interval`` and return the paths that changed. ``timeout``
+        is ignored: polling more often than asked would only cost stats.
+        """
+        time.sleep(self.interval)
+        return self.poll()
+
+    def poll(self):
+        files = self._snapshot()
+        changed = {path for path in files.keys() | self._files.keys() if files.get(path) != self._files.get(path)}
+        self._files = files
+        return changed
+
+
+class InotifyBackend:
+    """Linux inotify watches on the note folders and every folder note."""
+
+    def __init__(self, dir):
+        self.dir = Path(dir)
+        self.fd = None
+        self._watches = {}
+        self._libc = None
+
+    def __repr__(self):
+        return f"<InotifyBackend for {self.dir}>"
+
+    @staticmethod
+    def available():
+        return hasattr(os, "uname") and os.uname().sysname == "Linux"
+
+    def start(self):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watch(str(self.dir))
+        for name in NOTE_DIRS:
+            self._watch_tree(os.path.join(self.dir, name))
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        self._watches.clear()
+
+    def _watch(self, path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            self._watches[wd] = path
+        return wd
+
+    def _unwatch(self, path):
+        # A watch follows its folder when it is renamed; drop it so the
+        # folder is watched again under its new name.
+        for wd, watched in list(self._watches.items()):
+            if watched == path:
+                self._libc.inotify_rm_watch(self.fd, wd)
+                del self._watches[wd]
+
+    def _watch_tree(self, top):
+        if self._watch(top) < 0:
+            return
+        try:
+            entries = os.scandir(top)
+        except (FileNotFoundError, NotADirectoryError):
+            return
+        with entries:
+            for entry in entries:
+                if entry.is_dir():
+                    self._watch(entry.path)
+
+    def changes(self, timeout=None):
+        """Wait up to ``timeout`` seconds and return the paths that may have changed."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while ready:
+            if self._read(changed) is FULL_SCAN:
+                return FULL_SCAN
+            ready, _, _ = select.select([self.fd], [], [], DEBOUNCE)
+        return changed
+
+    def _read(self, changed):
+        try:
+            buffer = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return FULL_SCAN
+            if self._event(wd, mask, name, changed) is FULL_SCAN:
+                return FULL_SCAN
+        return changed
+
+    def _event(self, wd, mask, name, changed):
+        parent = self._watches.get(wd)
+        if parent is None:
+            return changed
+        if mask & IN_IGNORED:
+            del self._watches[wd]
+            return changed
+        if not name:
+            return changed
+
+        path = os.path.join(parent, name)
+        depth = len(Path(path).relative_to(self.dir).parts)
+        if depth == 1:
+            # Actions/ or Reference/ itself appeared, vanished or was renamed.
+            if name in NOTE_DIRS and mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_tree(path)
+                return FULL_SCAN
+        elif depth == 2:
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch(path)
+                elif mask & IN_MOVED_FROM:
+                    self._unwatch(path)
+                changed.add(os.path.join(path, "index.md"))
+            elif name.endswith(".md"):
+                changed.add(path)
+        elif depth == 3 and name == "index.md":
+            changed.add(path)
+        return changed
+
+
+def make_backend(dir, backend="auto", interval=POLL_INTERVAL):
+    if backend == "auto":
+        backend = "inotify" if InotifyBackend.available() else "poll"
+    if backend == "inotify":
+        return InotifyBackend(dir)
+    if backend == "poll":
+        return PollingBackend(dir, interval=interval)
+    raise ValueError(f"Unknown watch backend: {backend}")
+
+
+class Watcher:
+    """
+    Apply filesystem changes under ``dir`` to its :class:`NoteIndex`.
+
+    ``on_change`` is called with the set of changed paths (or ``None``
+    after a full rescan) once they are in the index.
+    """
+
+    def __init__(self, dir, backend="auto", interval=POLL_INTERVAL, jobs=None, on_change=None):
+        self.dir = Path(dir)
+        self.backend = make_backend(self.dir, backend, interval) if isinstance(backend, str) else backend
+        self.jobs = jobs
+        self.on_change = on_change
+        self.index = None
+        self._lock = None
+
+    def __repr__(self):
+        return f"<Watcher {self.backend!r}>"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        """Start watching, then bring the index up to date with a full scan."""
+        self.backend.start()
+        self.index = NoteIndex(self.dir, jobs=self.jobs)
+        self.apply(FULL_SCAN)
+        self._acquire_lock()
+
+    def close(self):
+        self.backend.close()
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+        if self._lock is not None:
+            os.close(self._lock)
+            self._lock = None
+
+    def _acquire_lock(self):
+        if fcntl is None or not cache_enabled():
+            return
+        try:
+            fd = os.open(lock_path(self.dir), os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return
+        self._lock = fd
+
+    def apply(self, changed):
+        if changed is FULL_SCAN:
+            files = list(scan_files(self.dir))
+            self.index.sync(files)
+            if self.index.has_text():
+                self.index.sync_text(files)
+            if self.index.has_links():
+                self.index.sync_links(files)
+        else:
+            notes = [path for path in changed if is_note_path(self.index._relative(path))]
+            if not notes:
+                return
+            self.index.update(notes)
+        if self.on_change is not None:
+            self.on_change(changed)
+
+    def step(self, timeout=None):
+        """Wait for one batch of changes and apply it."""
+        changed = self.backend.changes(timeout)
+        if changed is FULL_SCAN or changed:
+            self.apply(changed)
+        return changed
+
+    def run(self, stop=None):
+        """Apply changes until ``stop`` (a ``threading.Event``) is set."""
+        while stop is None or not stop.is_set():
+            self.step(timeout=POLL_INTERVAL)
+
+
+def watch(dir, backend="auto", interval=POLL_INTERVAL, jobs=None):
+    with Watcher(dir, backend=backend, interval=interval, jobs=jobs) as watcher:
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
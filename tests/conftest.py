@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from zettel import index as index_module
+
+
+def write_note(path, content, mtime=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def notes():
+    """``{relative path: content}`` of the notes in ``notebook_dir``; test files override it."""
+    return {}
+
+
+@pytest.fixture
+def notebook_dir(tmp_path, notes):
+    """``notes`` written under ``tmp_path``, modified at 1000, 2000, ... seconds in order."""
+    for mtime, (path, content) in enumerate(notes.items(), start=1):
+        write_note(tmp_path / path, content, mtime * 1_000)
+    return tmp_path
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """Relative paths of the notes the index parses for tasks, in order."""
+    calls = []
+    original = index_module.parse_tasks
+
+    def counting_parse(file, rel, mtime_ns, size):
+        calls.append(rel)
+        return original(file, rel, mtime_ns, size)
+
+    monkeypatch.setattr(index_module, "parse_tasks", counting_parse)
+    return calls
@@ -0,0 +1,103 @@
+import re
+from datetime import datetime
+
+import pytest
+from typer.testing import CliRunner
+
+from zettel.capture import Draft, NoteIds, create_note, parse_line, parse_query
+from zettel.cli import app
+from zettel.notes import Note
+
+
+def clock(*seconds):
+    times = iter(datetime(2024, 1, 2, 3, 4, second, 500) for second in seconds)
+    return lambda: next(times)
+
+
+def test_parse_query():
+    assert parse_query("Buy milk") == Draft("buy milk")
+    assert parse_query("@ Call Bob") == Draft("call bob", "inbox")
+    assert parse_query("Write report @wip #work, #client=acme #42") == Draft(
+        "write report #42", "wip", ["work"], {"client": "acme"}
+    )
+    assert parse_query("Paper [#reading #ml]").tags == ["reading", "ml"]
+
+
+def test_parse_json_line():
+    line = '{"title": "RSS: New post", "tags": "feed, #rss", "url": "https://x.org/a", "body": "Summary\\n"}'
+    assert parse_line(line) == Draft("RSS: New post", None, ["feed", "rss"], {"url": "https://x.org/a"}, "Summary\n")
+    assert parse_line('{"query": "Reply @todo #email"}') == Draft("reply", "todo", ["email"])
+
+
+def test_ids_are_unique_and_increasing():
+    ids = NoteIds(clock(5, 5, 5, 6, 4))
+    assert [next(ids) for _ in range(5)] == [
+        "20240102T030405",
+        "20240102T030405-001",
+        "20240102T030405-002",
+        "20240102T030406",
+        "20240102T030406-001",
+    ]
+
+
+def test_ids_move_to_the_next_second_after_999():
+    ids = NoteIds(lambda: datetime(2024, 1, 2, 3, 4, 5))
+    made = [next(ids) for _ in range(1002)]
+    assert made[999] == "20240102T030405-999"
+    assert made[1000:] == ["20240102T030406", "20240102T030406-001"]
+    assert made == sorted(set(made))
+
+
+def test_create_note_never_overwrites(tmp_path):
+    existing = tmp_path / "Actions" / "20240102T030405.md"
+    existing.parent.mkdir()
+    existing.write_text("keep me")
+    (tmp_path / "Reference" / "20240102T030405-001").mkdir(parents=True)
+    ids = NoteIds(clock(5, 5, 5))
+    assert create_note(tmp_path, Draft("new", "todo"), ids) == "20240102T030405-002"
+    assert existing.read_text() == "keep me"
+    note = Note(tmp_path / "Actions" / "20240102T030405-002.md")
+    assert (note.title, note.status) == ("new", "todo")
+
+
+def test_cli_add_batch(tmp_path):
+    lines = "Read paper #ml\n\nReply @todo #email\nnot json {\n{\"title\": \"Post\", \"status\": \"inbox\"}\n{oops\n"
+    result = CliRunner().invoke(app, ["add", "--batch", "--dir", str(tmp_path)], input=lines * 50)
+    assert result.exit_code == 1
+    assert result.stderr.count("Expecting property name") == 50
+    created = result.stdout.splitlines()
+    assert len(created) == 200
+    assert len({line.split("\t")[0] for line in created}) == 200
+    assert [line.split("\t")[1] for line in created[:4]] == ["read paper", "reply", "not json {", "Post"]
+    assert len(list((tmp_path / "Actions").iterdir())) == 100
+    assert len(list((tmp_path / "Reference").iterdir())) == 100
+
+
+def test_cli_open_query_creates_note(tmp_path):
+    result = CliRunner().invoke(app, ["open", "--dir", str(tmp_path), "--query", "@Buy milk #home"])
+    assert result.exit_code == 0, result.output
+    assert result.stdout == "buy milk\n"
+    [path] = (tmp_path / "Actions").iterdir()
+    assert path.read_text() == "---\ntitle: buy milk\nstatus: inbox\ntags:\n  - home\n---\n"
+
+
+@pytest.mark.parametrize(
+    "line,error",
+    [
+        ('{"title": "x", "status": "a: b"}', "invalid status 'a: b'"),
+        ('{"title": "x", "status": 5}', "status must be a string"),
+        ('{"title": "x", "tags": ["ok", "c: d"]}', "invalid tag 'c: d'"),
+        ('{"title": "x", "tags": [1]}', "tags must be a string or a list of strings"),
+        ('{"title": "x", "bad key\\nevil": "v"}', "invalid property name 'bad key\\nevil'"),
+        ('{"title": "x", "count": 3}', "property 'count' must be a string"),
+        ("note #title=other", "invalid property name 'title'"),
+    ],
+)
+def test_invalid_frontmatter_is_reported(tmp_path, line, error):
+    with pytest.raises(ValueError, match=re.escape(error)):
+        parse_line(line)
+    result = CliRunner().invoke(app, ["add", "--batch", "--dir", str(tmp_path)], input=line + "\n")
+    assert result.exit_code == 1
+    assert result.stdout == ""
+    assert f"line 1: {error}" in result.stderr
+    assert not tmp_path.joinpath("Actions").exists() and not list(tmp_path.glob("Reference/*"))
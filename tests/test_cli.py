@@ -0,0 +1,75 @@
+import pytest
+from typer.testing import CliRunner
+
+from zettel.cli import app
+from zettel.notebook import Notebook
+
+
+@pytest.fixture
+def notes():
+    return {
+        "Actions/20240101T101010.md": "---\ntitle: First\nstatus: todo\n---\n",
+        "Reference/20240102T101010/index.md": "---\ntitle: Folder\n---\n",
+    }
+
+
+@pytest.fixture
+def no_notebook(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("the notebook should not be loaded")
+
+    monkeypatch.setattr(Notebook, "__init__", fail)
+
+
+def test_list_with_id(notebook_dir):
+    result = CliRunner().invoke(app, ["list", "--dir", str(notebook_dir), "--with-id"])
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == [
+        "20240102T101010\tFolder",
+        "20240101T101010\tFirst \033[36m@todo\033[0m",
+    ]
+
+
+def test_find_by_id_does_not_load_notebook(notebook_dir, no_notebook):
+    runner = CliRunner()
+    result = runner.invoke(app, ["find", "--dir", str(notebook_dir), "--id", "20240102T101010"])
+    assert result.exit_code == 0
+    assert result.stdout.strip() == str(notebook_dir / "Reference" / "20240102T101010" / "index.md")
+
+    result = runner.invoke(app, ["find", "--dir", str(notebook_dir), "--id", "missing"])
+    assert result.stdout == ""
+
+
+def test_copy_by_id_does_not_load_notebook(notebook_dir, no_notebook, monkeypatch):
+    captured = {}
+    monkeypatch.setattr("zettel.cli.copy_to_clipboard", lambda text: captured.setdefault("text", text))
+
+    result = CliRunner().invoke(app, ["copy", "--dir", str(notebook_dir), "--id", "20240102T101010"])
+
+    assert result.exit_code == 0
+    assert captured["text"] == "[[20240102T101010/index|Folder]]"
+
+
+def test_open_by_id_does_not_load_notebook(notebook_dir, no_notebook, monkeypatch):
+    calls = []
+    monkeypatch.setattr("subprocess.run", lambda args: calls.append(args))
+
+    result = CliRunner().invoke(app, ["open", "--dir", str(notebook_dir), "--id", "20240101T101010"])
+
+    assert result.exit_code == 0
+    assert "filename=Actions%2F20240101T101010" in calls[0][1]
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["tasks", "--status", "pending"],
+        ["list", "--sort", "title"],
+        ["watch", "--backend", "fsevents"],
+        ["clock", "report", "--by", "month"],
+    ],
+)
+def test_options_reject_unknown_choices(args):
+    result = CliRunner().invoke(app, args)
+    assert result.exit_code == 2
+    assert "Invalid option" in result.output
@@ -0,0 +1,118 @@
+import json
+from array import array
+from datetime import date
+
+import pytest
+from typer.testing import CliRunner
+
+from zettel.cli import app
+from zettel.clock import ClockLog, Sessions, file_date
+from zettel.tasks import Task
+
+
+@pytest.fixture
+def notebook_dir(tmp_path):
+    (tmp_path / "daily-20230528.md").write_text(
+        "- @wip Publish data @activity(research) @clock(20231105T201542/50:00; 20231210T202307/01:10:15)\n"
+        "- @todo Main task @clock(25:00)\n"
+        "- @done No clock\n"
+    )
+    (tmp_path / "Reference").mkdir()
+    (tmp_path / "Reference" / "notes.md").write_text("- @done Review @activity(review) @clock(09:14, 20231106T090000/10:00)\n")
+    return tmp_path
+
+
+def run(*args):
+    result = CliRunner().invoke(app, ["clock", "report", *args])
+    assert result.exit_code == 0, result.output
+    return result.stdout
+
+
+def test_sessions_fall_back_to_file_date():
+    sessions = Sessions("Reference/daily-20230528.md")
+    sessions.add(Task("- @todo Task @activity(ops) @clock(20231105T201542/50:00, 25:00)").task)
+    log = ClockLog()
+    log.load("daily-20230528", sessions.dumps())
+    assert list(log.days) == [date(2023, 11, 5).toordinal(), date(2023, 5, 28).toordinal()]
+    assert list(log.seconds) == [3000, 1500]
+    assert log.activity_names == ["ops"]
+    assert Sessions("notes.md").dumps() is None
+    assert file_date("notes.md") == 0
+    assert file_date("daily-20231399.md") == 0
+
+
+def test_log_holds_more_activities_than_fit_in_16_bits():
+    count = 70_000
+    blob = b"".join(
+        [
+            count.to_bytes(4, "little"),
+            array("i", [1] * count).tobytes(),
+            array("q", range(count)).tobytes(),
+            "\n".join(f"a{n}" for n in range(count)).encode("utf-8"),
+        ]
+    )
+    log = ClockLog()
+    log.load("note", blob)
+    assert len(log.activity_names) == count
+    assert log.report("activity")[0] == ("a69999", 1, 69_999)
+
+
+def test_report_groups(notebook_dir):
+    log = ClockLog.from_index(notebook_dir)
+    assert len(log) == 5
+    assert log.report("day") == [
+        ("2023-05-28", 1, 1500),
+        ("2023-11-05", 1, 3000),
+        ("2023-11-06", 1, 600),
+        ("2023-12-10", 1, 4215),
+        ("unknown", 1, 554),
+    ]
+    assert log.report("week") == [("2023-W21", 1, 1500), ("2023-W44", 1, 3000), ("2023-W45", 1, 600), ("2023-W49", 1, 4215), ("unknown", 1, 554)]
+    assert log.report("activity") == [("research", 2, 7215), ("unknown", 1, 1500), ("review", 2, 1154)]
+    assert log.report("note") == [("daily-20230528", 3, 8715), ("notes", 2, 1154)]
+
+
+def test_report_keys_folder_notes_by_id(tmp_path):
+    for id, clock in [("20231105T100000", "10:00"), ("20231106T100000", "20:00; 05:00")]:
+        (tmp_path / "Actions" / id).mkdir(parents=True)
+        (tmp_path / "Actions" / id / "index.md").write_text(f"- @done Task @clock({clock})\n")
+    log = ClockLog.from_index(tmp_path)
+    assert log.report("note") == [("20231106T100000", 2, 1500), ("20231105T100000", 1, 600)]
+    assert sorted(log.note_names) == ["20231105T100000", "20231106T100000"]
+
+
+def test_report_date_range_excludes_undated_sessions(notebook_dir):
+    log = ClockLog.from_index(notebook_dir)
+    assert log.report("note", date(2023, 11, 1).toordinal(), date(2023, 11, 30).toordinal()) == [
+        ("daily-20230528", 1, 3000),
+        ("notes", 1, 600),
+    ]
+
+
+def test_cli_formats(notebook_dir):
+    assert run("--dir", str(notebook_dir), "--by", "activity", "--format", "json") == (
+        json.dumps(
+            [
+                {"activity": "research", "sessions": 2, "seconds": 7215},
+                {"activity": "unknown", "sessions": 1, "seconds": 1500},
+                {"activity": "review", "sessions": 2, "seconds": 1154},
+            ]
+        )
+        + "\n"
+    )
+    assert run("--dir", str(notebook_dir), "--by", "week", "--format", "csv", "--from", "2023-11-01").splitlines() == [
+        "week,sessions,seconds,hours",
+        "2023-W44,1,3000,0.83",
+        "2023-W45,1,600,0.17",
+        "2023-W49,1,4215,1.17",
+    ]
+    assert run("--dir", str(notebook_dir), "--to", "20230531").splitlines() == [
+        "day         sessions      time",
+        "2023-05-28         1      0:25",
+        "total              1      0:25",
+    ]
+
+
+def test_cli_rejects_bad_dates(notebook_dir):
+    result = CliRunner().invoke(app, ["clock", "report", "--dir", str(notebook_dir), "--from", "yesterday"])
+    assert result.exit_code != 0
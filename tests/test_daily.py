@@ -0,0 +1,35 @@
+from datetime import date
+
+from typer.testing import CliRunner
+
+from zettel.cli import app
+from zettel.daily import create_daily_notes, missing_days
+from zettel.notes import Note
+
+
+def test_creates_missing_daily_notes_only(tmp_path):
+    existing = tmp_path / "Reference" / "daily-20230102.md"
+    existing.parent.mkdir()
+    existing.write_text("# daily 02/01/2023\n\nkeep me\n")
+    (tmp_path / "Reference" / "daily-20230103").mkdir()
+    assert missing_days(tmp_path, date(2023, 1, 1), date(2023, 1, 4)) == [date(2023, 1, 1), date(2023, 1, 4)]
+
+    assert create_daily_notes(tmp_path, date(2023, 1, 1), date(2023, 1, 4)) == [date(2023, 1, 1), date(2023, 1, 4)]
+    assert existing.read_text() == "# daily 02/01/2023\n\nkeep me\n"
+    note = Note(tmp_path / "Reference" / "daily-20230101.md")
+    assert (note.id, note.title, note.tags) == ("daily-20230101", "daily 01/01/2023", ["daily"])
+    assert create_daily_notes(tmp_path, date(2023, 1, 1), date(2023, 1, 4)) == []
+
+
+def test_cli_daily(tmp_path):
+    runner = CliRunner()
+    result = runner.invoke(app, ["daily", "--from", "2024-02-28", "--to", "2024-03-01", "--dir", str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    assert result.stdout == "daily-20240228\ndaily-20240229\ndaily-20240301\n"
+    assert (tmp_path / "Reference" / "daily-20240229.md").read_text() == (
+        "---\ntitle: daily 29/02/2024\ntags:\n  - daily\n---\n"
+    )
+    result = runner.invoke(app, ["daily", "--from", "2024-03-01", "--to", "2024-02-28", "--dir", str(tmp_path)])
+    assert result.exit_code == 1
+    result = runner.invoke(app, ["daily", "--from", "2024-02-30", "--dir", str(tmp_path)])
+    assert result.exit_code == 2
@@ -0,0 +1,181 @@
+import random
+
+import frontmatter
+import pytest
+
+from zettel import flatyaml
+from zettel.fzf import Note
+
+KEYS = ["title", "status", "tags", "url", "project", "due", "true", "on", "Title", "x-ref"]
+SCALARS = [
+    "foo", "Foo Bar", "ação rápida", "python - mock", "x:y", "https://example.com/a?b=c",
+    "a, b , #c", "a #b", "a: b", "a:", "#tag", "@inbox", "-dash", "?q", "[a, b]", "{a: b}",
+    "123", "1.5", "1_000", "0x1F", "1:20", ".inf", "2024-01-01", "2024-01-01 10:00:00",
+    "yes", "No", "null", "~", "=", "<<", "", "  padded  ", "it's", "say \"hi\"",
+    '"quoted"', '"esc \\" and \\\\"', '"tab \\t"', "'single'", "'it''s'", "'open",
+    '"open', "a | b", "|", ">", "!tag", "&anchor", "*alias", "%", "`tick`", "ends with space ",
+]
+
+
+def random_value(rng):
+    return rng.choice(SCALARS)
+
+
+def random_frontmatter(rng):
+    lines = []
+    for _ in range(rng.randint(0, 5)):
+        key = rng.choice(KEYS)
+        shape = rng.random()
+        if shape < 0.55:
+            lines.append(f"{key}: {random_value(rng)}")
+        elif shape < 0.8:
+            lines.append(f"{key}:")
+            indent = " " * rng.choice([0, 2, 2, 4])
+            for _ in range(rng.randint(0, 3)):
+                lines.append(f"{indent}- {random_value(rng)}")
+        elif shape < 0.85:
+            lines.append(f"{key}: {random_value(rng)}")
+            lines.append(f"  {random_value(rng)}")
+        elif shape < 0.9:
+            lines.append(f"# comment {random_value(rng)}")
+        elif shape < 0.95:
+            lines.append("")
+        else:
+            lines.append(f"{key}: [{random_value(rng)}, {random_value(rng)}]")
+    return lines
+
+
+def random_document(rng):
+    body = rng.choice(["", "# Header\n", "\n\n# Late header\nbody\n", "body only\n"])
+    if rng.random() < 0.1:
+        return body
+    lead = rng.choice(["", "", "\n", "  "])
+    return lead + "---\n" + "\n".join(random_frontmatter(rng)) + "\n---\n" + body
+
+
+def reference(text):
+    try:
+        return frontmatter.loads(text)
+    except Exception:
+        return None
+
+
+def fast(text):
+    try:
+        return flatyaml.loads(text)
+    except Exception:
+        return None
+
+
+def derived(post):
+    if post is None:
+        return None
+    return (
+        Note._title_from_metadata(post),
+        Note._extract_tags(post),
+        Note._extract_status(post),
+        post.content,
+    )
+
+
+def test_fast_parser_matches_python_frontmatter_on_fuzzed_corpus():
+    rng = random.Random(20240101)
+    fast_path = 0
+    for _ in range(3000):
+        text = random_document(rng)
+        assert derived(fast(text)) == derived(reference(text)), text
+        post = fast(text)
+        if post is not None and post.metadata and "---\n" in text:
+            _, fm, _ = flatyaml.FM_BOUNDARY.split(text.strip(), 2)
+            fast_path += flatyaml.parse_flat(fm) is not None
+    assert fast_path > 100
+
+
+@pytest.mark.parametrize(
+    "fm,expected",
+    [
+        ("title: foo\ntags:\n  - a\n  - b\n", {"title": "foo", "tags": ["a", "b"]}),
+        ('title: "a: b"\nstatus: todo\n', {"title": "a: b", "status": "todo"}),
+        ("tags:\n", {"tags": None}),
+        ("title: 2024-01-01\n", None),
+        ("title: foo\n  bar\n", None),
+        ("title: foo # comment\n", None),
+    ],
+)
+def test_parse_flat(fm, expected):
+    assert flatyaml.parse_flat(fm) == expected
+
+
+def legacy_quote(value):
+    """The PyYAML round trip ``zt open`` and ``migrate_notes.py`` used to quote values."""
+    import yaml
+
+    try:
+        parsed = yaml.safe_load(f"v: {value}")
+        if isinstance(parsed, dict) and parsed.get("v") == value:
+            return value
+    except yaml.YAMLError:
+        pass
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+ALPHABET = "aZ09 -?:#,[]{}&*!|>'\"%@`=<.~_+/\\\t\n\r\x85\x00\x7f\xa0\u2028\ufeff\u00e7\u00e9\U0001f600"
+
+
+def random_string(rng):
+    if rng.random() < 0.3:
+        return rng.choice(SCALARS)
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 6)))
+
+
+def test_copied_tables_match_pyyaml():
+    from yaml.reader import Reader
+    from yaml.resolver import Resolver
+
+    assert flatyaml.NON_PRINTABLE.pattern == Reader.NON_PRINTABLE.pattern
+    rng = random.Random(20240104)
+    for _ in range(4000):
+        value = random_string(rng)
+        if not value:
+            continue
+        expected = any(regexp.match(value) for _, regexp in Resolver.yaml_implicit_resolvers.get(value[0], []))
+        assert any(regexp.match(value) for regexp in flatyaml.IMPLICIT_RESOLVERS.get(value[0], ())) == expected, repr(value)
+
+
+def test_quote_matches_yaml_round_trip_on_random_strings():
+    rng = random.Random(20240102)
+    decided = 0
+    for _ in range(8000):
+        value = random_string(rng)
+        assert flatyaml.quote(value) == legacy_quote(value), repr(value)
+        decided += flatyaml._is_plain_value(value) is not None
+    assert decided > 5000
+
+
+def test_dumps_matches_legacy_frontmatter_and_reads_back():
+    rng = random.Random(20240103)
+    for _ in range(1000):
+        title = random_string(rng)
+        status = rng.choice([None, "todo", "inbox"])
+        tags = [rng.choice(["a", "work", "python-3"]) for _ in range(rng.randint(0, 3))]
+        properties = {rng.choice(["url", "project", "x-ref"]): random_string(rng) for _ in range(rng.randint(0, 2))}
+        lines = ["---", f"title: {legacy_quote(title)}"]
+        if status:
+            lines.append(f"status: {status}")
+        if tags:
+            lines.append("tags:")
+            lines.extend(f"  - {tag}" for tag in tags)
+        lines.extend(f"{key}: {legacy_quote(value)}" for key, value in properties.items())
+        lines += ["---", "body\n"]
+        text = flatyaml.dumps(title, status, tags, properties, "body\n")
+        assert text == "\n".join(lines)
+
+        # Line breaks fold and control characters do not load at all, even quoted.
+        if not any(char in value for value in [title, *properties.values()] for char in "\n\r\x85\u2028\u2029\x00\x7f\ufeff"):
+            assert reference(text).metadata == {
+                "title": title,
+                **({"status": status} if status else {}),
+                **({"tags": tags} if tags else {}),
+                **properties,
+            }
@@ -0,0 +1,92 @@
+import random
+
+import pytest
+from typer.testing import CliRunner
+
+from zettel.cli import app
+from zettel.fuzzy import TrigramIndex, trigrams
+from zettel.notebook import Notebook
+
+from conftest import write_note
+
+
+@pytest.fixture
+def notes():
+    return {
+        "Actions/20240101T101010.md": "---\ntitle: Weekly meeting\ntags:\n  - work\n---\n",
+        "Reference/20240102T101010.md": "---\ntitle: Python packaging\n---\n",
+        "Reference/20240103T101010/index.md": "# Café meetup\n",
+    }
+
+
+def test_trigrams_pad_words_and_fold_case():
+    assert trigrams("Ab") == {"  a", " ab", "ab "}
+    assert trigrams("Café, cafe") == {"  c", " ca", "caf", "afe", "fe "}
+    assert trigrams("!!") == set()
+
+
+def test_search_ranks_by_similarity():
+    index = TrigramIndex.build(["python packaging", "pandas", "python", "meeting notes"])
+    assert [row for row, _ in index.search("pyton", threshold=0)] == [2, 0, 1]
+    assert [row for row, _ in index.search("pyton")] == [2]
+    assert index.search("python", top=1) == [(2, 1.0)]
+    assert index.search("zzz") == []
+    assert index.search("") == []
+
+
+def test_search_leaves_out_unrelated_titles():
+    index = TrigramIndex.build(["First", "Folder notes"])
+    assert [row for row, _ in index.search("folde")] == [1]
+    assert [row for row, _ in index.search("folde", threshold=0.5)] == []
+
+
+def test_search_matches_brute_force():
+    rng = random.Random(0)
+    words = ["".join(rng.choice("abcdefghij") for _ in range(rng.randint(2, 6))) for _ in range(60)]
+    texts = [" ".join(rng.choices(words, k=rng.randint(1, 4))) for _ in range(300)]
+    index = TrigramIndex.loads(TrigramIndex.build(texts).dumps())
+    assert len(index.dense) > 0 and len(index.postings) > 0
+    grams = [trigrams(text) for text in texts]
+    for query in rng.sample(words, 10) + ["abc fed", "aaaa"]:
+        wanted = trigrams(query)
+        scores = [(len(wanted & row_grams) / len(wanted | row_grams), -row) for row, row_grams in enumerate(grams)]
+        for threshold in [0, 0.2, 0.3]:
+            expected = sorted((item for item in scores if item[0] > 0 and item[0] >= threshold), reverse=True)[:5]
+            assert index.search(query, top=5, threshold=threshold) == [(-row, score) for score, row in expected]
+
+
+def test_dumps_round_trip_of_empty_index():
+    index = TrigramIndex.loads(TrigramIndex.build([]).dumps())
+    assert len(index) == 0
+    assert index.search("anything") == []
+
+
+def test_notebook_matches_titles_and_tags(notebook_dir):
+    matches = Notebook(notebook_dir).find_fuzzy("meting", top=2)
+    assert [(note.title, round(score, 2)) for note, score in matches] == [("Weekly meeting", 0.3)]
+    matches = Notebook(notebook_dir).find_fuzzy("meting", top=2, threshold=0.1)
+    assert [(note.title, round(score, 2)) for note, score in matches] == [("Weekly meeting", 0.3), ("Café meetup", 0.12)]
+    assert Notebook(notebook_dir).find_fuzzy("work meeting", top=1)[0][0].title == "Weekly meeting"
+
+
+def test_trigram_index_is_cached_until_titles_change(notebook_dir, monkeypatch):
+    Notebook(notebook_dir).find_fuzzy("python")
+    build = TrigramIndex.build
+    monkeypatch.setattr(TrigramIndex, "build", lambda texts: pytest.fail("rebuilt"))
+    assert Notebook(notebook_dir).find_fuzzy("python", top=1)[0][0].title == "Python packaging"
+
+    write_note(notebook_dir / "Reference" / "20240102T101010.md", "---\ntitle: Rust packaging\n---\n", 4_000)
+    monkeypatch.setattr(TrigramIndex, "build", build)
+    assert Notebook(notebook_dir).find_fuzzy("rust", top=1)[0][0].title == "Rust packaging"
+
+
+def test_cli_find_fuzzy(notebook_dir, monkeypatch):
+    monkeypatch.setenv("ZETTEL_DAEMON", "0")
+    result = CliRunner().invoke(app, ["find", "--fuzzy", "packging", "--top", "1", "--dir", str(notebook_dir)])
+    assert result.exit_code == 0, result.output
+    assert result.stdout == f"{notebook_dir / 'Reference' / '20240102T101010.md'}\n"
+    result = CliRunner().invoke(app, ["find", "--fuzzy", "meting", "--threshold", "0.1", "--dir", str(notebook_dir)])
+    assert result.stdout.splitlines() == [
+        str(notebook_dir / "Actions" / "20240101T101010.md"),
+        str(notebook_dir / "Reference" / "20240103T101010" / "index.md"),
+    ]
@@ -142,3 +142,45 @@ def test_ss_handles_keyboard_interrupt(monkeypatch, tmp_path):
 
     # Should return without raising
     assert ss() is None
+
+
+LAZY_CASES = [
+    "---\ntitle: Lazy Title\ntags:\n  - alpha\nstatus: todo\n---\n# heading\n" + "log line\n" * 1000,
+    "---\ntags: [alpha]\n---\n\n\n  # Body Header\nrest\n",
+    "---\ntitle: 12\n---\n",
+    "---\ntitle: [unclosed\n---\n# Broken YAML\n",
+    "---\ntitle: never closed\n# Header\n",
+    "\n\n  ---\ntitle: Indented Opener\n---\n",
+    "---\n\n---\n# After Empty Frontmatter\n",
+    "{\n\"title\": \"Json Title\"\n}\nbody\n",
+    "# Plain Header\n---\nnot: frontmatter\n---\n",
+    "\n\n# Late Header\n",
+    "",
+]
+
+
+@pytest.mark.parametrize("content", LAZY_CASES)
+def test_lazy_note_matches_eager_note(tmp_path, content):
+    note_path = write_note(tmp_path, "20240107T101010.md", content)
+
+    eager = Note(note_path)
+    lazy = Note(note_path, lazy=True)
+
+    assert (lazy.id, lazy.title, lazy.tags, lazy.status, lazy.display_title) == (
+        eager.id,
+        eager.title,
+        eager.tags,
+        eager.status,
+        eager.display_title,
+    )
+
+
+def test_lazy_note_reads_content_on_access(tmp_path):
+    content = "---\ntitle: Big Note\n---\n# heading\n" + "x" * 100_000 + "\n"
+    note_path = write_note(tmp_path, "20240108T101010.md", content)
+
+    note = Note(note_path, lazy=True)
+
+    assert note._content is None
+    assert len(note._frontmatter_post.content) < 100
+    assert note.content == content
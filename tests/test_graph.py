@@ -0,0 +1,90 @@
+import pytest
+from typer.testing import CliRunner
+
+from zettel.cli import app
+from zettel.graph import Graph, ranked_records
+
+from conftest import write_note
+
+
+@pytest.fixture
+def notes():
+    return {
+        "Actions/a.md": "# A\n[[b]] [[c|C]] [[b]] [[a]]\n",
+        "Actions/b.md": "# B\n[[a]]\n",
+        "Reference/c/index.md": "# C\n[[b/index|B]]\n",
+        "Reference/d.md": "# D\n[[b]]\n",
+        "Reference/e.md": "# E\nNo links.\n",
+        "Reference/f.md": "# F\n[[missing]]\n",
+    }
+
+
+def ids(graph, nodes):
+    return {graph.ids[node] for node in nodes}
+
+
+def naive_pagerank(edges, nodes, damping=0.85, iterations=200):
+    rank = {node: 1 / len(nodes) for node in nodes}
+    for _ in range(iterations):
+        sinks = sum(rank[node] for node in nodes if not edges[node])
+        new = {node: (1 - damping + damping * sinks) / len(nodes) for node in nodes}
+        for source, targets in edges.items():
+            for target in targets:
+                new[target] += damping * rank[source] / len(targets)
+        rank = new
+    return rank
+
+
+def test_graph_metrics(notebook_dir):
+    graph = Graph.load(notebook_dir)
+    assert graph.note_count == 6
+    assert len(graph.indices) == 5  # repeated, self and dangling links are dropped
+    assert ids(graph, graph.orphans()) == {"e", "f"}
+    assert [(graph.ids[node], into, out) for node, into, out in graph.hubs(2)] == [("b", 3, 1), ("a", 1, 2)]
+    largest, *rest = graph.components()
+    assert ids(graph, largest) == {"a", "b", "c", "d"}
+    assert sorted(sorted(ids(graph, members)) for members in rest) == [["e"], ["f"]]
+    assert dict(graph.stats())["largest component"] == 4
+
+
+def test_pagerank_matches_power_iteration(notebook_dir):
+    graph = Graph.load(notebook_dir)
+    ranks = graph.pagerank(tolerance=1e-12)
+    edges = {id: [] for id in "abcdef"}
+    for source, target in [("a", "b"), ("a", "c"), ("b", "a"), ("c", "b"), ("d", "b")]:
+        edges[source].append(target)
+    expected = naive_pagerank(edges, list("abcdef"))
+    assert sum(ranks) == pytest.approx(1)
+    for node in graph.note_nodes():
+        assert ranks[node] == pytest.approx(expected[graph.ids[node]], abs=1e-9)
+    assert ranks[graph.ids.index("missing")] == 0
+
+
+def test_ranks_are_cached_until_a_note_changes(notebook_dir, monkeypatch):
+    # Equal ranks go to the most recently modified note first.
+    assert [record.id for record in ranked_records(notebook_dir)] == ["b", "a", "c", "f", "e", "d"]
+    pagerank = Graph.pagerank
+    monkeypatch.setattr(Graph, "pagerank", lambda self: pytest.fail("ranked again"))
+    assert [record.id for record in ranked_records(notebook_dir, limit=3)] == ["b", "a", "c"]
+
+    write_note(notebook_dir / "Reference" / "e.md", "# E\n[[d]] [[d]]\n", 10_000)
+    write_note(notebook_dir / "Reference" / "f.md", "# F\n[[d]]\n", 11_000)
+    monkeypatch.setattr(Graph, "pagerank", pagerank)
+    assert [record.id for record in ranked_records(notebook_dir)] == ["b", "a", "c", "d", "f", "e"]
+
+
+def test_cli_graph(notebook_dir, monkeypatch):
+    monkeypatch.setenv("ZETTEL_DAEMON", "0")
+    runner = CliRunner()
+    result = runner.invoke(app, ["graph", "stats", "--dir", str(notebook_dir)])
+    assert result.exit_code == 0, result.output
+    assert "orphans            2\n" in result.stdout
+    result = runner.invoke(app, ["graph", "hubs", "--top", "1", "--dir", str(notebook_dir)])
+    assert result.stdout == "b\t3\t1\n"
+    result = runner.invoke(app, ["graph", "components", "--dir", str(notebook_dir)])
+    assert result.stdout.splitlines()[0] == "4\tb"
+    result = runner.invoke(app, ["graph", "orphans", "--dir", str(notebook_dir)])
+    assert sorted(result.stdout.split()) == ["e", "f"]
+    result = runner.invoke(app, ["list", "--sort", "rank", "--with-id", "--limit", "2", "--dir", str(notebook_dir)])
+    assert result.exit_code == 0, result.output
+    assert [line.split("\t")[0] for line in result.stdout.splitlines()] == ["b", "a"]
@@ -0,0 +1,112 @@
+import os
+import sqlite3
+
+import pytest
+from typer.testing import CliRunner
+
+from zettel import index as index_module
+from zettel.cli import app
+from zettel.index import NoteIndex, cache_path
+from zettel.search import grep, match_expression, query_terms, snippet
+from zettel.watch import PollingBackend, Watcher
+
+from conftest import write_note
+
+
+@pytest.fixture
+def notes():
+    return {
+        "Actions/20240101T101010.md": "---\ntitle: Café notes\ntags:\n  - coffee\n---\n\n# Café\nI like coffee and espresso a lot.\n",
+        "Reference/20240102T101010.md": "# Tea\nTea is not coffee. Coffee, coffee!\n",
+        "Reference/20240103T101010/index.md": "# Coffee\nBrewing notes.\n",
+    }
+
+
+def titles(dir, query, **kwargs):
+    return [hit.title for hit in grep(dir, query, **kwargs)]
+
+
+def test_grep_ranks_title_matches_first(notebook_dir):
+    assert titles(notebook_dir, "coffee") == ["Coffee", "Tea", "Café notes"]
+    assert titles(notebook_dir, "coffee", limit=1) == ["Coffee"]
+
+
+def test_grep_requires_every_word(notebook_dir):
+    assert titles(notebook_dir, "coffee espresso") == ["Café notes"]
+    assert titles(notebook_dir, "coffee matcha") == []
+    assert titles(notebook_dir, "esp*") == ["Café notes"]
+    assert titles(notebook_dir, "cafe") == ["Café notes"]
+    assert titles(notebook_dir, "!!") == []
+
+
+def test_grep_ignores_frontmatter(notebook_dir):
+    assert titles(notebook_dir, "tags") == []
+
+
+def test_query_syntax_is_taken_literally():
+    assert query_terms('title:tea OR "x" NEAR(a b)') == ["title", "tea", "OR", "x", "NEAR", "a", "b"]
+    assert match_expression(["tea", "esp*"]) == '"tea" "esp"*'
+
+
+def test_grep_updates_changed_and_deleted_notes(notebook_dir):
+    grep(notebook_dir, "coffee")
+    write_note(notebook_dir / "Reference" / "20240102T101010.md", "# Tea\nGreen tea only.\n", mtime=4_000)
+    (notebook_dir / "Reference" / "20240103T101010" / "index.md").unlink()
+    assert titles(notebook_dir, "coffee") == ["Café notes"]
+    assert titles(notebook_dir, "green") == ["Tea"]
+    with NoteIndex(notebook_dir) as index:
+        assert index.conn.execute("SELECT count(*) FROM fulltext_files").fetchone() == (2,)
+
+
+def test_grep_only_reads_changed_notes(notebook_dir, monkeypatch):
+    grep(notebook_dir, "coffee")
+    monkeypatch.setattr("zettel.index.parse_text", lambda *args: pytest.fail("re-read"))
+    assert titles(notebook_dir, "tea") == ["Tea"]
+
+
+def test_watcher_keeps_built_text_index_current(notebook_dir, monkeypatch):
+    grep(notebook_dir, "coffee")
+    backend = PollingBackend(notebook_dir, interval=0)
+    with Watcher(notebook_dir, backend=backend) as watcher:
+        write_note(notebook_dir / "Actions" / "20240104T101010.md", "# Matcha\nNot coffee.\n", mtime=5_000)
+        os.utime(notebook_dir / "Actions", (10_000, 10_000))
+        watcher.step(timeout=0)
+        monkeypatch.setattr("zettel.index.NoteIndex.sync_text", lambda *args: pytest.fail("re-scanned"))
+        assert titles(notebook_dir, "coffee") == ["Coffee", "Tea", "Matcha", "Café notes"]
+
+
+def test_old_index_with_text_table_is_rebuilt(notebook_dir):
+    grep(notebook_dir, "coffee")
+    conn = sqlite3.connect(cache_path(notebook_dir))
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+    assert titles(notebook_dir, "coffee") == ["Coffee", "Tea", "Café notes"]
+
+
+def test_snippet_windows_first_match():
+    body = "intro " * 50 + "the espresso\nmachine " + "outro " * 50
+    text = snippet(body, ["espresso"], width=40)
+    assert text.startswith("…") and text.endswith("…")
+    assert "the espresso machine" in text
+    assert "\n" not in text
+    assert snippet("Short body", ["missing"]) == "Short body"
+    assert snippet("Espresso* here", ["esp*"]) == "Espresso* here"
+
+
+def test_cli_grep(notebook_dir):
+    result = CliRunner().invoke(app, ["grep", "espresso", "--dir", str(notebook_dir)])
+    assert result.exit_code == 0, result.output
+    assert result.stdout == "Actions/20240101T101010.md: Café notes\n    # Café I like coffee and espresso a lot.\n"
+
+
+def test_listing_works_without_fts5(notebook_dir, monkeypatch):
+    monkeypatch.setattr(index_module, "FULLTEXT_SCHEMA", "CREATE VIRTUAL TABLE fulltext USING missing_module (title);")
+    monkeypatch.setenv("ZETTEL_DAEMON", "0")
+    runner = CliRunner()
+    result = runner.invoke(app, ["list", "--dir", str(notebook_dir)])
+    assert result.exit_code == 0, result.output
+    assert len(result.stdout.splitlines()) == 3
+    result = runner.invoke(app, ["grep", "coffee", "--dir", str(notebook_dir)])
+    assert result.exit_code == 1
+    assert "Full-text search needs SQLite with FTS5" in result.stderr
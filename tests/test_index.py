@@ -0,0 +1,150 @@
+import pytest
+from typer.testing import CliRunner
+
+from zettel import index as index_module
+from zettel.cli import app
+from zettel.fzf import get_notes, get_titles, list_files, select_files
+from zettel.index import NoteIndex, cache_path
+from zettel.notebook import Notebook
+
+from conftest import write_note
+
+
+@pytest.fixture
+def notes():
+    return {
+        "Actions/20240101T101010.md": "---\ntitle: First\nstatus: todo\n---\n",
+        "Reference/20240102T101010.md": "---\ntitle: Second\ntags:\n  - alpha\n---\n",
+        "Reference/20240103T101010/index.md": "# Third\n",
+    }
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    calls = []
+    original = index_module.parse_note
+
+    def counting_parse(file, rel, mtime_ns, size):
+        calls.append(rel)
+        return original(file, rel, mtime_ns, size)
+
+    monkeypatch.setattr(index_module, "parse_note", counting_parse)
+    return calls
+
+
+def test_index_is_stored_under_dot_zettel(notebook_dir):
+    list(get_notes(notebook_dir))
+    assert cache_path(notebook_dir).is_file()
+
+
+def test_records_are_sorted_by_mtime_descending(notebook_dir):
+    notes = list(get_notes(notebook_dir))
+    assert [note.id for note in notes] == ["20240103T101010", "20240102T101010", "20240101T101010"]
+    assert notes[1].tags == ["alpha"]
+    assert notes[2].status == "todo"
+    assert notes[0].path == notebook_dir / "Reference" / "20240103T101010" / "index.md"
+
+
+def test_sync_only_reparses_changed_files(notebook_dir, parsed):
+    with NoteIndex(notebook_dir) as index:
+        index.sync(list_files(notebook_dir))
+    assert len(parsed) == 3
+
+    parsed.clear()
+    write_note(notebook_dir / "Actions" / "20240101T101010.md", "---\ntitle: First edited\n---\n", mtime=4_000)
+    write_note(notebook_dir / "Actions" / "20240104T101010.md", "# Fourth\n", mtime=5_000)
+    (notebook_dir / "Reference" / "20240102T101010.md").unlink()
+
+    with NoteIndex(notebook_dir) as index:
+        index.sync(list_files(notebook_dir))
+        records = list(index.records())
+
+    assert sorted(parsed) == ["Actions/20240101T101010.md", "Actions/20240104T101010.md"]
+    assert [(note.id, note.title) for note in records] == [
+        ("20240104T101010", "Fourth"),
+        ("20240101T101010", "First edited"),
+        ("20240103T101010", "Third"),
+    ]
+
+
+def test_get_titles_reads_from_index(notebook_dir, parsed):
+    list(get_titles(notebook_dir))
+    parsed.clear()
+    titles = list(get_titles(notebook_dir))
+    assert parsed == []
+    assert titles[1] == "Second \033[35m[#alpha]\033[0m"
+
+
+def test_notebook_specific_files_do_not_prune_index(notebook_dir):
+    Notebook(notebook_dir)
+    notebook = Notebook(notebook_dir, notes=["Actions/20240101T101010.md"])
+    assert [id for id, _ in notebook.notes] == ["20240101T101010"]
+    assert len(Notebook(notebook_dir).notes) == 3
+
+
+def test_cache_can_be_disabled(notebook_dir, monkeypatch):
+    monkeypatch.setenv("ZETTEL_CACHE", "0")
+    notebook = Notebook(notebook_dir)
+    assert len(notebook.notes) == 3
+    assert not cache_path(notebook_dir).exists()
+
+
+def test_parallel_sync_matches_serial(tmp_path, monkeypatch):
+    monkeypatch.setattr(index_module, "MIN_PARALLEL_FILES", 1)
+    for n in range(40):
+        write_note(tmp_path / "Reference" / f"2024010{n % 9}T1010{n:02d}.md", f"---\ntitle: Note {n}\n---\n", mtime=1_000 + n)
+
+    with NoteIndex(tmp_path, jobs=3) as index:
+        index.sync(list_files(tmp_path))
+        parallel = list(index.records())
+    monkeypatch.setenv("ZETTEL_CACHE", "0")
+    serial = list(get_notes(tmp_path, jobs=1))
+
+    assert parallel == serial
+    assert [note.title for note in parallel][:2] == ["Note 39", "Note 38"]
+
+
+def test_resolve_jobs(monkeypatch):
+    monkeypatch.delenv("ZETTEL_JOBS", raising=False)
+    assert index_module.resolve_jobs() == 1
+    monkeypatch.setenv("ZETTEL_JOBS", "4")
+    assert index_module.resolve_jobs() == 4
+    assert index_module.resolve_jobs(2) == 2
+    assert index_module.resolve_jobs(0) >= 1
+
+
+def test_select_files_limit_keeps_most_recent(notebook_dir):
+    files = select_files(notebook_dir, limit=2)
+    assert [file.id for file in files] == ["20240103T101010", "20240102T101010"]
+    assert all(file.stat is not None for file in files)
+
+
+def test_select_files_by_id_does_not_stat(notebook_dir):
+    write_note(notebook_dir / "Reference" / "daily-20230528.md", "# daily\n", mtime=9_000)
+    files = select_files(notebook_dir, sort="id")
+    assert [file.id for file in files] == ["20240103T101010", "20240102T101010", "20240101T101010", "daily-20230528"]
+    assert all(file.stat is None for file in files)
+
+
+def test_limited_listing_does_not_prune_index(notebook_dir):
+    list(get_notes(notebook_dir))
+    assert [note.id for note in get_notes(notebook_dir, limit=1)] == ["20240103T101010"]
+    assert len(list(get_notes(notebook_dir, sort="id"))) == 3
+    with NoteIndex(notebook_dir) as index:
+        assert len(list(index.records())) == 3
+
+
+def test_cli_list_limit_and_sort(notebook_dir):
+    runner = CliRunner()
+    result = runner.invoke(app, ["list", "--dir", str(notebook_dir), "--limit", "1", "--sort", "id"])
+    assert result.exit_code == 0
+    assert result.stdout == "Third\n"
+
+
+def test_notebook_lookup_prefers_most_recent_duplicate(notebook_dir):
+    write_note(notebook_dir / "Actions" / "20240105T101010.md", "---\ntitle: Second\n---\n", mtime=6_000)
+    notebook = Notebook(notebook_dir)
+    assert notebook.get_note_by_title("Second").id == "20240105T101010"
+    assert notebook.get_note_by_title("Second [#alpha]").id == "20240102T101010"
+    assert notebook.get_note_by_id("20240103T101010").title == "Third"
+    assert notebook.get_note_by_id("missing") is None
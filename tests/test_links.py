@@ -0,0 +1,76 @@
+import os
+
+import pytest
+from typer.testing import CliRunner
+
+from zettel import index as index_module
+from zettel.cli import app
+from zettel.index import NoteIndex
+from zettel.links import backlinks, extract_links, link_target, links
+from zettel.watch import PollingBackend, Watcher
+
+from conftest import write_note
+
+
+@pytest.fixture
+def notes():
+    return {
+        "Actions/20240101T101010.md": (
+            "# First\nSee [[20240102T101010|Second]] and [[20240103T101010/index|Third]].\n[[missing|Gone]]\n"
+        ),
+        "Reference/20240102T101010.md": "# Second\nBack to [[20240101T101010]].\n",
+        "Reference/20240103T101010/index.md": "# Third\n[[20240102T101010#Intro|x]]\n",
+    }
+
+
+def test_extract_links():
+    text = "[[a|A]] [[b/index|B]]\n\n[[Reference/c.md]] [[d#h]] [[ |x]] [not](a) [[e|]]"
+    assert list(extract_links(text)) == [(1, "a", "A"), (1, "b", "B"), (3, "c", None), (3, "d", None), (3, "e", None)]
+    assert link_target("20240101T101010/index") == "20240101T101010"
+
+
+def test_links_and_backlinks(notebook_dir):
+    assert links(notebook_dir, "20240101T101010") == [
+        ("20240102T101010", "Second", "Second"),
+        ("20240103T101010", "Third", "Third"),
+        ("missing", None, "Gone"),
+    ]
+    assert backlinks(notebook_dir, "20240102T101010") == [("20240103T101010", "Third"), ("20240101T101010", "First")]
+    assert backlinks(notebook_dir, "20240101T101010") == [("20240102T101010", "Second")]
+    assert backlinks(notebook_dir, "missing") == [("20240101T101010", "First")]
+
+
+def test_links_are_updated_per_file(notebook_dir, monkeypatch):
+    backlinks(notebook_dir, "20240102T101010")
+    write_note(notebook_dir / "Actions" / "20240101T101010.md", "# First\nNo links now.\n", 4_000)
+    (notebook_dir / "Reference" / "20240103T101010" / "index.md").unlink()
+    parsed = []
+    parse_links = index_module.parse_links
+    monkeypatch.setattr(index_module, "parse_links", lambda *args: parsed.append(args[1]) or parse_links(*args))
+    assert backlinks(notebook_dir, "20240102T101010") == []
+    assert parsed == ["Actions/20240101T101010.md"]
+    with NoteIndex(notebook_dir) as index:
+        assert index.conn.execute("SELECT count(*) FROM links").fetchone() == (1,)
+
+
+def test_watcher_keeps_built_link_index_current(notebook_dir, monkeypatch):
+    backlinks(notebook_dir, "20240101T101010")
+    backend = PollingBackend(notebook_dir, interval=0)
+    with Watcher(notebook_dir, backend=backend) as watcher:
+        write_note(notebook_dir / "Actions" / "20240104T101010.md", "# Fourth\n[[20240101T101010]]\n", 5_000)
+        os.utime(notebook_dir / "Actions", (10_000, 10_000))
+        watcher.step(timeout=0)
+        monkeypatch.setattr("zettel.index.NoteIndex.sync_links", lambda *args: pytest.fail("re-scanned"))
+        assert backlinks(notebook_dir, "20240101T101010") == [("20240104T101010", "Fourth"), ("20240102T101010", "Second")]
+
+
+def test_cli_links_and_backlinks(notebook_dir, monkeypatch):
+    monkeypatch.setenv("ZETTEL_DAEMON", "0")
+    runner = CliRunner()
+    result = runner.invoke(app, ["links", "First", "--dir", str(notebook_dir)])
+    assert result.exit_code == 0, result.output
+    assert result.stdout == "20240102T101010\tSecond\n20240103T101010\tThird\nmissing\tGone\n"
+    result = runner.invoke(app, ["backlinks", "20240101T101010", "--dir", str(notebook_dir)])
+    assert result.stdout == "20240102T101010\tSecond\n"
+    result = runner.invoke(app, ["backlinks", "Nope", "--dir", str(notebook_dir)])
+    assert result.exit_code == 1
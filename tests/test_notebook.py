@@ -3,6 +3,11 @@ from pathlib import Path
 from zettel.notebook import Notebook
 from zettel.notes import Note
 
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    """Keep the checked-in notebook free of a ``.zettel`` index."""
+    monkeypatch.setenv('ZETTEL_CACHE', '0')
+
 @pytest.fixture
 def notebook():
     return Notebook('tests/notebook')
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+from typer.testing import CliRunner
+
+from zettel import preview as previews
+from zettel.cli import app
+from zettel.preview import markdown, preview, warm
+
+from conftest import write_note
+
+
+@pytest.fixture
+def notes():
+    return {
+        "Actions/20240101T101010.md": "---\ntitle: First\ntags:\n  - a\n---\n\nSome **bold** text\n",
+        "Reference/20240102T101010.md": "# Second\n\nBody\n",
+        "Reference/20240103T101010/index.md": "# Third\n",
+    }
+
+
+def test_markdown_strips_frontmatter_and_keeps_title(notebook_dir):
+    assert markdown(notebook_dir / "Actions" / "20240101T101010.md") == "# First\n\nSome **bold** text"
+    assert markdown(notebook_dir / "Reference" / "20240102T101010.md") == "# Second\n\nBody"
+
+
+def test_markdown_is_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(previews, "MAX_LINES", 3)
+    path = write_note(tmp_path / "note.md", "# Long\n" + "line\n" * 10, 1_000)
+    assert markdown(path) == "# Long\nline\nline\n\n…"
+
+
+def test_preview_is_cached_until_the_note_changes(notebook_dir, monkeypatch):
+    text = preview(notebook_dir, "20240101T101010", width=40)
+    assert "First" in text and "bold" in text and "title:" not in text
+    render = previews.render
+    monkeypatch.setattr(previews, "render", lambda *args: pytest.fail("rendered again"))
+    assert preview(notebook_dir, "20240101T101010", width=40) == text
+
+    monkeypatch.setattr(previews, "render", render)
+    assert preview(notebook_dir, "20240101T101010", width=60) != text
+    write_note(notebook_dir / "Actions" / "20240101T101010.md", "# Edited\n", 4_000)
+    assert "Edited" in preview(notebook_dir, "20240101T101010", width=40)
+    assert preview(notebook_dir, "missing") is None
+
+
+def test_warm_renders_recent_notes_once(notebook_dir, monkeypatch):
+    assert warm(notebook_dir, count=2, width=40) == 2
+    assert warm(notebook_dir, count=3, width=40) == 1
+    monkeypatch.setattr(previews, "render", lambda *args: pytest.fail("rendered again"))
+    assert warm(notebook_dir, count=3, width=40) == 0
+    assert "Third" in preview(notebook_dir, "20240103T101010", width=40)
+
+
+def test_warm_returns_when_already_running(notebook_dir):
+    lock = previews._acquire_lock(notebook_dir)
+    try:
+        assert warm(notebook_dir) is None
+    finally:
+        os.close(lock)
+    assert warm(notebook_dir, count=1) == 1
+
+
+def test_cli_preview(notebook_dir):
+    runner = CliRunner()
+    result = runner.invoke(app, ["preview", "20240102T101010", "--dir", str(notebook_dir), "--width", "30"])
+    assert result.exit_code == 0, result.output
+    assert result.stdout == preview(notebook_dir, "20240102T101010", width=30)
+    result = runner.invoke(app, ["preview", "--warm", "5", "--dir", str(notebook_dir)])
+    assert result.exit_code == 0 and result.stdout == ""
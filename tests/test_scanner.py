@@ -0,0 +1,175 @@
+import json
+import shutil
+
+import pytest
+from typer.testing import CliRunner
+
+from zettel import index as index_module
+from zettel import scanner
+from zettel.cli import app
+from zettel.notebook import Notebook
+from zettel.scanner import find_tasks, scan_file, scan_tasks
+from zettel.tasks import Task, dumps_task, json_default, loads_task
+
+
+@pytest.fixture
+def notebook_dir(tmp_path):
+    (tmp_path / "daily-20230528.md").write_text(
+        "# Daily\n\n- @wip Write report @clock(20231105T201542/50:00)\r\n"
+        "Prose mentioning @todo is not a task\n"
+        "- @done this is done"
+    )
+    (tmp_path / "Reference").mkdir()
+    (tmp_path / "Reference" / "20240101T101010.md").write_text("---\ntitle: No tasks\n---\n- @unknown status\n")
+    (tmp_path / ".zettel").mkdir()
+    (tmp_path / ".zettel" / "hidden.md").write_text("- @todo hidden\n")
+    (tmp_path / "notes.txt").write_text("- @todo not markdown\n")
+    return tmp_path
+
+
+def test_scan_file_reports_line_numbers(notebook_dir):
+    assert scan_file(notebook_dir / "daily-20230528.md") == [
+        (3, "- @wip Write report @clock(20231105T201542/50:00)"),
+        (5, "- @done this is done"),
+    ]
+    assert scan_file(notebook_dir / "Reference" / "20240101T101010.md") == []
+    assert scan_file(notebook_dir / "missing.md") == []
+
+
+def test_scan_file_maps_large_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(scanner, "MMAP_THRESHOLD", 16)
+    path = tmp_path / "big.md"
+    path.write_text("padding line\n" * 10 + "- @todo Found\n")
+    assert scan_file(path) == [(11, "- @todo Found")]
+
+
+def test_scan_tasks_skips_hidden_and_other_files(notebook_dir):
+    assert [(path, line) for path, line, _ in scan_tasks(notebook_dir)] == [
+        (str(notebook_dir / "daily-20230528.md"), 3),
+        (str(notebook_dir / "daily-20230528.md"), 5),
+    ]
+
+
+def test_parallel_scan_matches_serial(tmp_path, monkeypatch):
+    monkeypatch.setattr(scanner, "MIN_PARALLEL_FILES", 1)
+    for n in range(30):
+        (tmp_path / f"note-{n:02d}.md").write_text(f"intro\n- @todo Task {n}\n" * (n % 3))
+    assert list(scan_tasks(tmp_path, jobs=3)) == list(scan_tasks(tmp_path, jobs=1))
+
+
+def test_find_tasks_falls_back_without_rg(notebook_dir, monkeypatch):
+    monkeypatch.setattr(shutil, "which", lambda name: None)
+    assert list(find_tasks(notebook_dir)) == list(scan_tasks(notebook_dir))
+
+
+@pytest.mark.skipif(shutil.which("rg") is None, reason="ripgrep is not installed")
+def test_native_scanner_matches_rg(notebook_dir):
+    assert sorted(find_tasks(notebook_dir, scanner="rg")) == sorted(find_tasks(notebook_dir, scanner="native"))
+
+
+def test_notebook_find_tasks(notebook_dir):
+    tasks = list(Notebook(notebook_dir).find_tasks(scanner="native"))
+    assert [(task["path"], task["line"], task["task"].task["title"]) for task in tasks] == [
+        ("daily-20230528", 3, "Write report"),
+        ("daily-20230528", 5, "this is done"),
+    ]
+
+
+def summary(notebook_dir):
+    return [
+        (task["path"], task["line"], task["task"].task["title"], task["task"].task["duration"])
+        for task in Notebook(notebook_dir).find_tasks()
+    ]
+
+
+def test_cached_tasks_match_full_scan(notebook_dir):
+    cached = [(task["path"], task["line"], task["task"].task) for task in Notebook(notebook_dir).find_tasks()]
+    scanned = [(task["path"], task["line"], task["task"].task) for task in Notebook(notebook_dir).find_tasks("native")]
+    assert cached == scanned
+    assert cached[0][2]["duration"] == "50 minutes"
+
+
+def test_cached_tasks_only_rescan_changed_files(notebook_dir, parsed):
+    summary(notebook_dir)
+    assert sorted(parsed) == ["Reference/20240101T101010.md", "daily-20230528.md"]
+
+    parsed.clear()
+    summary(notebook_dir)
+    assert parsed == []
+
+    (notebook_dir / "Reference" / "20240101T101010.md").write_text("- @todo New task\n")
+    (notebook_dir / "daily-20230528.md").unlink()
+    assert summary(notebook_dir) == [("20240101T101010", 1, "New task", None)]
+    assert parsed == ["Reference/20240101T101010.md"]
+
+
+def test_tasks_are_yielded_as_each_chunk_is_stored(tmp_path, parsed, monkeypatch):
+    monkeypatch.setattr(index_module, "SQL_CHUNK", 2)
+    for n in range(5):
+        (tmp_path / f"note-{n}.md").write_text(f"- @todo Task {n}\n")
+    tasks = Notebook(tmp_path).find_tasks()
+    first = next(tasks)
+    assert len(parsed) == 2
+    assert sorted(task["path"] for task in [first, *tasks]) == [f"note-{n}" for n in range(5)]
+    assert len(parsed) == 5
+
+
+def test_cached_task_decodes_lazily():
+    task = Task("- @todo Write @activity(writing)")
+    cached = Task.from_cache("Write", "@todo", True, dumps_task(task.task))
+    assert (cached.title, cached.status, cached.open) == ("Write", "@todo", True)
+    assert "task" not in vars(cached)
+    assert cached.task == task.task
+    assert (task.title, task.status, task.open) == ("Write", "@todo", True)
+
+
+def test_cached_task_json_round_trips():
+    task = Task("- @done Ship @activity(ops) @flag @clock(20231105T201542/50:00, 01:02:03)").task
+    text = dumps_task(task)
+    assert json.loads(text)["tags"]["clock"] == [
+        {"start": "2023-11-05T20:15:42", "end": "2023-11-05T21:05:42", "duration": 3000},
+        {"start": None, "end": None, "duration": 3723},
+    ]
+    assert loads_task(text) == task
+    assert loads_task(dumps_task(Task("- @todo Plain").task)) == Task("- @todo Plain").task
+
+
+def run_tasks(*args):
+    result = CliRunner().invoke(app, ["tasks", *args])
+    assert result.exit_code == 0, result.output
+    return result.stdout
+
+
+def test_tasks_jsonl_serializes_clock(notebook_dir):
+    lines = run_tasks(str(notebook_dir), "--format", "jsonl", "--status", "all").splitlines()
+    first = json.loads(lines[0])
+    assert (first["path"], first["line"], first["task"]["status"]) == ("daily-20230528", 3, "@wip")
+    assert first["task"]["tags"]["clock"] == [
+        {"start": "2023-11-05T20:15:42", "end": "2023-11-05T21:05:42", "duration": 3000.0}
+    ]
+    assert len(lines) == 2
+
+
+def test_tasks_tsv(notebook_dir):
+    assert run_tasks(str(notebook_dir), "--format", "tsv", "--status", "all", "--scanner", "native").splitlines() == [
+        "daily-20230528\t3\t@wip\t50 minutes\tWrite report",
+        "daily-20230528\t5\t@done\t\tthis is done",
+    ]
+
+
+def test_tasks_fzf_dumps_json_only_when_asked(notebook_dir, tmp_path, monkeypatch):
+    prompts = []
+    monkeypatch.setattr("zettel.fzf.fzf_prompt", lambda choices, **kwargs: prompts.append(choices) or "\nWrite report [@wip]")
+    monkeypatch.chdir(tmp_path)
+    assert run_tasks(str(notebook_dir)) == "daily-20230528:3\n"
+    assert prompts == [["Write report [@wip]"]]
+    assert not (tmp_path / "data.json").exists()
+
+    run_tasks(str(notebook_dir), "--status", "all", "--dump-json", str(tmp_path / "tasks.json"))
+    dumped = json.loads((tmp_path / "tasks.json").read_text())
+    assert [task["task"]["status"] for task in dumped] == ["@wip", "@done"]
+
+
+def test_json_default_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        json.dumps({"value": object()}, default=json_default)
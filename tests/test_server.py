@@ -0,0 +1,107 @@
+import os
+import threading
+
+import pytest
+from typer.testing import CliRunner
+
+from zettel import client
+from zettel.cli import app
+from zettel.server import NotebookServer
+
+from conftest import write_note
+
+
+@pytest.fixture
+def notes():
+    return {
+        "Actions/20240101T101010.md": "---\ntitle: First\nstatus: todo\n---\n",
+        "Reference/20240102T101010.md": "---\ntitle: Second\ntags:\n  - alpha\n---\n",
+        "Reference/20240103T101010/index.md": "# Third\n",
+    }
+
+
+@pytest.fixture
+def server(notebook_dir):
+    server = NotebookServer(notebook_dir)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def run(monkeypatch, daemon, *args):
+    monkeypatch.setenv("ZETTEL_DAEMON", "1" if daemon else "0")
+    result = CliRunner().invoke(app, list(args))
+    assert result.exit_code == 0, result.output
+    return result.stdout
+
+
+COMMANDS = [
+    ["list"],
+    ["list", "--with-id"],
+    ["list", "--limit", "2"],
+    ["list", "--sort", "id"],
+    ["list", "--tag", "alpha"],
+    ["find", "Second [#alpha]"],
+    ["find", "Second"],
+    ["find", "Missing"],
+    ["find", "--fuzzy", "secnd"],
+    ["find", "--fuzzy", "alpha third", "--top", "1"],
+]
+
+
+@pytest.mark.parametrize("command", COMMANDS)
+def test_daemon_output_matches_in_process(server, notebook_dir, monkeypatch, command):
+    args = command + ["--dir", str(notebook_dir)]
+    assert run(monkeypatch, True, *args) == run(monkeypatch, False, *args)
+
+
+def test_commands_use_running_daemon(server, notebook_dir):
+    assert client.request(notebook_dir, "ping") == str(notebook_dir)
+    assert client.request(notebook_dir, "note", title="Third")["note"]["path"] == "Reference/20240103T101010/index.md"
+
+
+def test_daemon_picks_up_changes(server, notebook_dir):
+    write_note(notebook_dir / "Actions" / "20240104T101010.md", "# Fourth\n", 4_000)
+    assert client.request(notebook_dir, "list", limit=1) == ["Fourth"]
+
+
+def test_request_without_daemon_returns_none(tmp_path):
+    assert client.request(tmp_path, "ping") is None
+
+
+def test_second_server_refuses_to_start(server, notebook_dir):
+    with pytest.raises(RuntimeError):
+        NotebookServer(notebook_dir)
+
+
+def test_stale_socket_is_replaced(notebook_dir):
+    path = client.socket_path(notebook_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "w").close()
+    server = NotebookServer(notebook_dir)
+    server.server_close()
+    assert not os.path.exists(path)
+
+
+def test_watching_server_reloads_only_after_changes(notebook_dir, monkeypatch):
+    server = NotebookServer(notebook_dir, watch=True, backend="poll", interval=0.05)
+    try:
+        reloads = []
+        monkeypatch.setattr(server.notebook, "refresh", lambda: pytest.fail("server re-scanned"))
+        original = server.notebook.reload
+        monkeypatch.setattr(server.notebook, "reload", lambda: reloads.append(1) or original())
+        assert server.dispatch("list", {}) == ["Third", "Second \033[35m[#alpha]\033[0m", "First \033[36m@todo\033[0m"]
+        assert reloads == []
+
+        write_note(notebook_dir / "Actions" / "20240104T101010.md", "# Fourth\n", 4_000)
+        os.utime(notebook_dir / "Actions", (10_000, 10_000))
+        for _ in range(100):
+            if server._changed.wait(0.05):
+                break
+        assert server.dispatch("list", {"limit": 1}) == ["Fourth"]
+        assert reloads == [1]
+    finally:
+        server.server_close()
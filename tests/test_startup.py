@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = {"yaml", "frontmatter", "humanize", "fzf", "rich", "sqlite3", "concurrent.futures"}
+
+RUN_ZT = """
+import json, sys
+from zettel.cli import app
+sys.argv = ["zt"] + json.loads(sys.argv[1])
+try:
+    app()
+except SystemExit:
+    pass
+print(json.dumps(sorted(sys.modules)), file=sys.stderr)
+"""
+
+
+def loaded_modules(args, cwd):
+    result = subprocess.run(
+        [sys.executable, "-c", RUN_ZT, json.dumps(args)],
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+        check=True,
+    )
+    return set(json.loads(result.stderr.strip().splitlines()[-1]))
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["find", "--id", "20240101T101010"],
+        ["open", "--id", "missing"],
+    ],
+)
+def test_commands_do_not_import_heavy_modules(tmp_path, args):
+    note = tmp_path / "Actions" / "20240101T101010.md"
+    note.parent.mkdir()
+    note.write_text("# Title\n")
+
+    assert loaded_modules(args + ["--dir", str(tmp_path)], tmp_path) & HEAVY_MODULES == set()
+
+
+@pytest.mark.parametrize("command", ["copy", "open"])
+def test_commands_on_frontmatter_notes_do_not_import_heavy_modules(tmp_path, monkeypatch, command):
+    note = tmp_path / "Actions" / "20240101T101010.md"
+    note.parent.mkdir()
+    note.write_text("---\ntitle: Title\nstatus: todo\ntags:\n  - work\n---\nBody\n")
+    bin = tmp_path / "bin"
+    bin.mkdir()
+    for name in ("open", "pbcopy"):
+        (bin / name).write_text("#!/bin/sh\ncat > /dev/null\n")
+        (bin / name).chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin}{os.pathsep}{os.environ['PATH']}")
+
+    args = [command, "--id", "20240101T101010", "--dir", str(tmp_path)]
+    assert loaded_modules(args, tmp_path) & HEAVY_MODULES == set()
+
+
+def test_help_does_not_import_zettel_dependencies(tmp_path):
+    assert loaded_modules(["--help"], tmp_path) & (HEAVY_MODULES - {"rich"}) == set()
+
+
+def test_cached_preview_does_not_render_or_parse(tmp_path):
+    note = tmp_path / "Actions" / "20240101T101010.md"
+    note.parent.mkdir()
+    note.write_text("---\ntitle: Title\n---\nBody\n")
+    args = ["preview", "20240101T101010", "--dir", str(tmp_path)]
+    assert "rich" in loaded_modules(args, tmp_path)
+    assert loaded_modules(args, tmp_path) & {"rich", "yaml", "frontmatter"} == set()
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+from zettel.index import NoteRecord
+from zettel.table import NoteTable
+
+
+def record(dir, rel, id, title, tags=(), status=None, mtime_ns=0):
+    return NoteRecord(Path(dir) / rel, id, title, list(tags), status, "", mtime_ns)
+
+
+def test_table_round_trips_records(tmp_path):
+    table = NoteTable.from_records(
+        tmp_path,
+        [
+            record(tmp_path, "Actions/20240101T101010.md", "20240101T101010", "Ação rápida", ["alpha"], "todo", 3),
+            record(tmp_path, "Reference/20240102T101010/index.md", "20240102T101010", "Folder", ["alpha", "beta"]),
+            record(tmp_path, "elsewhere/daily-20230528.md", "daily-20230528", "daily 28/05/2023"),
+        ],
+    )
+
+    assert len(table) == 3
+    first, folder, other = table.records()
+    assert first.path == tmp_path / "Actions" / "20240101T101010.md"
+    assert first.title == "Ação rápida"
+    assert first.status == "todo"
+    assert first.mtime_ns == 3
+    assert first.display_title == "Ação rápida [#alpha] @todo"
+    assert folder.path == tmp_path / "Reference" / "20240102T101010" / "index.md"
+    assert folder.tags == ["alpha", "beta"]
+    assert folder.status is None
+    assert other.path == tmp_path / "elsewhere" / "daily-20230528.md"
+
+
+def test_table_iterates_like_list_of_tuples(tmp_path):
+    table = NoteTable.from_records(
+        tmp_path, [record(tmp_path, "Actions/a.md", "a", "A"), record(tmp_path, "Actions/b.md", "b", "B")]
+    )
+
+    assert [(id, note.title) for id, note in table] == [("a", "A"), ("b", "B")]
+
+
+def test_table_interns_tags(tmp_path):
+    table = NoteTable.from_records(
+        tmp_path,
+        [record(tmp_path, f"Actions/{n}.md", str(n), "t", ["shared" + ""]) for n in range(3)],
+    )
+
+    assert table.tags(0)[0] is table.tags(2)[0]
+
+
+def test_table_hashes_rows_first_one_wins(tmp_path):
+    table = NoteTable.from_records(
+        tmp_path,
+        [
+            record(tmp_path, "Actions/new.md", "new", "Same", ["alpha"]),
+            record(tmp_path, "Actions/old.md", "old", "Same"),
+        ],
+    )
+
+    assert table.row_by_id("old") == 1
+    assert table.row_by_title("Same") == 0
+    assert table.row_by_display_title("Same [#alpha]") == 0
+    assert table.row_by_display_title("Same") == 1
+    assert table.row_by_title("Missing") is None
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+from typer.testing import CliRunner
+
+from zettel import index as index_module
+from zettel.cli import _complete_tag, app
+from zettel.fzf import get_notes, get_tags
+from zettel.index import NoteIndex
+from zettel.watch import PollingBackend, Watcher
+
+from conftest import write_note
+
+
+@pytest.fixture
+def notes():
+    return {
+        "Actions/20240101T101010.md": "---\ntitle: First\ntags: [work, project]\n---\n",
+        "Reference/20240102T101010.md": "---\ntitle: Second\ntags: work, Python\n---\n",
+        "Reference/20240103T101010/index.md": "---\ntags: [python, project, work]\n---\n# Third\n",
+        "Reference/20240104T101010.md": "# Fourth\n",
+    }
+
+
+def test_tag_counts(notebook_dir):
+    assert get_tags(notebook_dir) == [("work", 3), ("project", 2), ("Python", 1), ("python", 1)]
+    assert get_tags(notebook_dir, prefix="p") == [("project", 2), ("python", 1)]
+    assert get_tags(notebook_dir, prefix="nope") == []
+
+
+def test_tag_intersection(notebook_dir):
+    ids = lambda notes: [note.id for note in notes]
+    assert ids(get_notes(notebook_dir, tags=["work"])) == ["20240103T101010", "20240102T101010", "20240101T101010"]
+    assert ids(get_notes(notebook_dir, tags=["work", "project"])) == ["20240103T101010", "20240101T101010"]
+    assert ids(get_notes(notebook_dir, tags=["work", "project"], limit=1)) == ["20240103T101010"]
+    assert ids(get_notes(notebook_dir, tags=["work", "project"], sort="id")) == ["20240103T101010", "20240101T101010"]
+    assert ids(get_notes(notebook_dir, tags=["work", "missing"])) == []
+
+
+def test_postings_are_updated_per_file(notebook_dir, monkeypatch):
+    get_tags(notebook_dir)
+    write_note(notebook_dir / "Reference" / "20240102T101010.md", "---\ntitle: Second\ntags: [project]\n---\n", 5_000)
+    os.remove(notebook_dir / "Actions" / "20240101T101010.md")
+    parsed = []
+    parse_note = index_module.parse_note
+    monkeypatch.setattr(index_module, "parse_note", lambda *args: parsed.append(args[1]) or parse_note(*args))
+    assert get_tags(notebook_dir) == [("project", 2), ("python", 1), ("work", 1)]
+    assert parsed == ["Reference/20240102T101010.md"]
+
+
+def test_watcher_keeps_postings_current(notebook_dir, monkeypatch):
+    get_tags(notebook_dir)
+    backend = PollingBackend(notebook_dir, interval=0)
+    with Watcher(notebook_dir, backend=backend) as watcher:
+        os.remove(notebook_dir / "Reference" / "20240103T101010" / "index.md")
+        os.utime(notebook_dir / "Reference", (10_000, 10_000))
+        watcher.step(timeout=0)
+        monkeypatch.setattr(NoteIndex, "sync", lambda *args: pytest.fail("re-scanned"))
+        assert get_tags(notebook_dir) == [("work", 2), ("Python", 1), ("project", 1)]
+
+
+def test_cli_tags_and_list_by_tag(notebook_dir, monkeypatch):
+    monkeypatch.setenv("ZETTEL_DAEMON", "0")
+    runner = CliRunner()
+    result = runner.invoke(app, ["tags", "--dir", str(notebook_dir)])
+    assert result.exit_code == 0, result.output
+    assert result.stdout == "work\t3\nproject\t2\nPython\t1\npython\t1\n"
+    result = runner.invoke(app, ["tags", "#pro", "--dir", str(notebook_dir)])
+    assert result.stdout == "project\t2\n"
+    result = runner.invoke(app, ["list", "--tag", "#python", "--tag", "work", "--dir", str(notebook_dir)])
+    assert result.exit_code == 0, result.output
+    assert result.stdout.splitlines() == ["Third \x1b[35m[#python, #project, #work]\x1b[0m"]
+
+
+def test_tag_completion(notebook_dir):
+    ctx = type("Context", (), {"params": {"dir": notebook_dir}})()
+    assert _complete_tag(ctx, "p") == ["project", "python"]
+    assert _complete_tag(ctx, "#w") == ["work"]
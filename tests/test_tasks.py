@@ -1,10 +1,15 @@
 import pytest
 import datetime
+import json
+from typer.testing import CliRunner
+from zettel.cli import app
+from zettel.index import NoteIndex
 from zettel.notebook import Notebook
-from zettel.tasks import Task
+from zettel.tasks import Task, TaskQuery
 
 @pytest.fixture
-def notebook():
+def notebook(monkeypatch):
+    monkeypatch.setenv('ZETTEL_CACHE', '0')
     return Notebook('tests/notebook')
 
 def test_tasks(notebook):
@@ -67,4 +72,96 @@ def test_task_without_clock():
                          'clock': None, 
                          'activity': 'research'}}
     
-    assert task.task == expected
\ No newline at end of file
+    assert task.task == expected
+
+
+@pytest.fixture
+def tagged_dir(tmp_path):
+    (tmp_path / "daily-20231105.md").write_text(
+        "- @wip Report @activity(writing) @urgent @clock(20231105T201542/50:00)\n"
+        "- @done Review @activity(review) @clock(25:00)\n"
+        "- @todo Plan @urgent\n"
+    )
+    (tmp_path / "Reference").mkdir()
+    (tmp_path / "Reference" / "20240101T101010.md").write_text(
+        "- @next Draft @activity(writing) @clock(20240102T090000/10:00)\n- @done Ship @urgent\n"
+    )
+    (tmp_path / "Actions" / "20240202T020202").mkdir(parents=True)
+    (tmp_path / "Actions" / "20240202T020202" / "index.md").write_text("- @todo Follow up @urgent\n")
+    return tmp_path
+
+
+QUERIES = [
+    TaskQuery(),
+    TaskQuery(status="open"),
+    TaskQuery(status="closed"),
+    TaskQuery(tags=("urgent",)),
+    TaskQuery(tags=("@urgent",), status="open"),
+    TaskQuery(activity="writing"),
+    TaskQuery(activity="writing", since="2023-12-01"),
+    TaskQuery(since="2023-11-05"),
+    TaskQuery(tags=("clock",), since="2023-01-01"),
+    TaskQuery(files=("20240101T101010",)),
+    TaskQuery(files=("daily-20231105.md",), tags=("urgent",)),
+    TaskQuery(files=("20240202T020202",)),
+    TaskQuery(tags=("missing",)),
+]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_indexed_filters_match_scan_filters(tagged_dir, query):
+    notebook = Notebook(tagged_dir)
+    indexed = [(task["path"], task["line"]) for task in notebook.find_tasks(query=query)]
+    scanned = [(task["path"], task["line"]) for task in notebook.find_tasks("native", query)]
+    assert indexed == scanned
+
+
+def test_filters_select_expected_tasks(tagged_dir):
+    def titles(**filters):
+        return [task["task"].title for task in Notebook(tagged_dir).find_tasks(query=TaskQuery(**filters))]
+
+    assert titles(tags=("urgent",)) == ["Report", "Plan", "Follow up", "Ship"]
+    assert titles(activity="writing", status="open") == ["Report", "Draft"]
+    assert titles(since="2023-11-05") == ["Report", "Review", "Draft"]
+    assert titles(since="2023-11-06") == ["Draft"]
+    assert titles(since="2023-11-01", activity="review") == ["Review"]
+    assert titles(files=("20240202T020202",)) == ["Follow up"]
+    assert titles(files=("Actions/20240202T020202/index.md",)) == ["Follow up"]
+
+
+def test_tag_filters_only_read_matching_files(tagged_dir, monkeypatch):
+    list(Notebook(tagged_dir).find_tasks())
+    selected = []
+    original = NoteIndex._select_tasks
+    monkeypatch.setattr(NoteIndex, "_select_tasks", lambda self, paths: selected.append(paths) or original(self, paths))
+    assert [task["line"] for task in Notebook(tagged_dir).find_tasks(query=TaskQuery(since="2024-01-01"))] == [1]
+    assert selected == [["Reference/20240101T101010.md"]]
+
+
+def test_file_filter_keeps_other_cached_files(tagged_dir, parsed):
+    list(Notebook(tagged_dir).find_tasks())
+    list(Notebook(tagged_dir).find_tasks(query=TaskQuery(files=("20240101T101010",))))
+    parsed.clear()
+    assert len(list(Notebook(tagged_dir).find_tasks())) == 6
+    assert parsed == []
+
+
+def run_tasks(*args):
+    result = CliRunner().invoke(app, ["tasks", *args])
+    assert result.exit_code == 0, result.output
+    return result.stdout
+
+
+def test_cli_filters(tagged_dir):
+    assert run_tasks(str(tagged_dir), "--format", "tsv", "--tag", "urgent", "--clocked-since", "2023-11-05").splitlines() == [
+        "daily-20231105\t1\t@wip\t50 minutes\tReport",
+    ]
+    result = CliRunner().invoke(app, ["tasks", str(tagged_dir), "--clocked-since", "soon"])
+    assert result.exit_code != 0
+
+
+@pytest.mark.parametrize("scanner", ["auto", "native"])
+def test_output_names_folder_notes_by_id(tagged_dir, scanner):
+    args = [str(tagged_dir), "--file", "20240202T020202", "--scanner", scanner]
+    assert run_tasks(*args, "--format", "tsv").splitlines() == ["20240202T020202\t1\t@todo\t\tFollow up"]
+    assert json.loads(run_tasks(*args, "--format", "jsonl"))["path"] == "20240202T020202"
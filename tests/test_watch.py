@@ -0,0 +1,156 @@
+import gc
+import os
+import sys
+
+import pytest
+from typer.testing import CliRunner
+
+from zettel.cli import app
+from zettel.fzf import get_notes
+from zettel.index import NoteIndex
+from zettel.watch import InotifyBackend, PollingBackend, Watcher, is_note_path, watching
+
+from conftest import write_note
+
+
+def touch_dir(path, mtime):
+    # Directory mtimes can be equal across quick successive changes on
+    # coarse-grained filesystems; make every change visible to the poller.
+    os.utime(path, (mtime, mtime))
+
+
+def indexed(dir):
+    with NoteIndex(dir) as index:
+        return {note.path.relative_to(dir).as_posix(): note.title for note in index.records()}
+
+
+@pytest.fixture
+def notes():
+    return {
+        "Actions/20240101T101010.md": "---\ntitle: First\n---\n",
+        "Reference/20240102T101010/index.md": "# Second\n",
+    }
+
+
+@pytest.fixture
+def watcher(notebook_dir):
+    backend = PollingBackend(notebook_dir, interval=0)
+    with Watcher(notebook_dir, backend=backend) as watcher:
+        yield watcher
+
+
+def test_start_indexes_notebook(watcher, notebook_dir):
+    assert indexed(notebook_dir) == {
+        "Actions/20240101T101010.md": "First",
+        "Reference/20240102T101010/index.md": "Second",
+    }
+
+
+def test_polling_applies_add_rename_and_delete(watcher, notebook_dir):
+    write_note(notebook_dir / "Actions" / "20240103T101010.md", "# Third\n")
+    touch_dir(notebook_dir / "Actions", 10_000)
+    assert watcher.step(timeout=0) == {str(notebook_dir / "Actions" / "20240103T101010.md")}
+    assert indexed(notebook_dir)["Actions/20240103T101010.md"] == "Third"
+
+    os.rename(notebook_dir / "Actions" / "20240103T101010.md", notebook_dir / "Reference" / "20240103T101010.md")
+    touch_dir(notebook_dir / "Actions", 11_000)
+    touch_dir(notebook_dir / "Reference", 11_000)
+    watcher.step(timeout=0)
+    notes = indexed(notebook_dir)
+    assert "Actions/20240103T101010.md" not in notes
+    assert notes["Reference/20240103T101010.md"] == "Third"
+
+    (notebook_dir / "Actions" / "20240101T101010.md").unlink()
+    touch_dir(notebook_dir / "Actions", 12_000)
+    watcher.step(timeout=0)
+    assert "Actions/20240101T101010.md" not in indexed(notebook_dir)
+
+
+def test_polling_applies_folder_notes(watcher, notebook_dir):
+    folder = notebook_dir / "Reference" / "20240102T101010"
+    write_note(folder / "index.md", "# Second edited\n", mtime=5_000)
+    touch_dir(folder, 10_000)
+    watcher.step(timeout=0)
+    assert indexed(notebook_dir)["Reference/20240102T101010/index.md"] == "Second edited"
+
+    (folder / "index.md").unlink()
+    folder.rmdir()
+    touch_dir(notebook_dir / "Reference", 11_000)
+    watcher.step(timeout=0)
+    assert "Reference/20240102T101010/index.md" not in indexed(notebook_dir)
+
+
+def test_polling_catches_in_place_edits_on_the_next_poll(watcher, notebook_dir):
+    assert watcher.step(timeout=0) == set()
+    write_note(notebook_dir / "Actions" / "20240101T101010.md", "---\ntitle: First edited\n---\n", mtime=3_000)
+    assert watcher.step(timeout=0) == {str(notebook_dir / "Actions" / "20240101T101010.md")}
+    assert indexed(notebook_dir)["Actions/20240101T101010.md"] == "First edited"
+
+
+def test_polling_waits_the_configured_interval(notebook_dir, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("zettel.watch.time.sleep", sleeps.append)
+    with Watcher(notebook_dir, backend="poll", interval=5) as watcher:
+        watcher.step(timeout=1.0)
+    assert sleeps == [5]
+
+
+def test_watcher_calls_on_change(notebook_dir):
+    changes = []
+    backend = PollingBackend(notebook_dir, interval=0)
+    with Watcher(notebook_dir, backend=backend, on_change=changes.append) as watcher:
+        write_note(notebook_dir / "Actions" / "notes.txt", "not a note\n")
+        touch_dir(notebook_dir / "Actions", 10_000)
+        watcher.step(timeout=0)
+    assert changes == [None]
+
+
+def test_listing_trusts_index_while_watching(watcher, notebook_dir, monkeypatch):
+    assert watching(notebook_dir)
+    monkeypatch.setattr("zettel.fzf.select_files", lambda *args, **kwargs: pytest.fail("listing re-scanned"))
+    assert [note.title for note in get_notes(notebook_dir)] == ["Second", "First"]
+    assert [note.title for note in get_notes(notebook_dir, sort="id", limit=1)] == ["Second"]
+
+
+def test_limited_listing_while_watching_closes_cleanly(watcher, notebook_dir, monkeypatch):
+    unraisable = []
+    monkeypatch.setattr(sys, "unraisablehook", unraisable.append)
+    monkeypatch.setenv("ZETTEL_DAEMON", "0")
+    result = CliRunner().invoke(app, ["list", "--limit", "1", "--dir", str(notebook_dir)])
+    assert result.exit_code == 0, result.output
+    assert result.stdout == "Second\n"
+    assert next(get_notes(notebook_dir)).title == "Second"
+    gc.collect()
+    assert unraisable == []
+
+
+def test_not_watching_without_watcher(notebook_dir):
+    assert not watching(notebook_dir)
+    with Watcher(notebook_dir, backend=PollingBackend(notebook_dir)):
+        pass
+    assert not watching(notebook_dir)
+
+
+def test_is_note_path():
+    assert is_note_path("Actions/20240101T101010.md")
+    assert is_note_path("Reference/20240101T101010/index.md")
+    assert not is_note_path("Reference/20240101T101010/other.md")
+    assert not is_note_path("Archive/20240101T101010.md")
+    assert not is_note_path("Actions/notes.txt")
+
+
+@pytest.mark.skipif(not InotifyBackend.available(), reason="inotify is Linux only")
+def test_inotify_reports_note_changes(notebook_dir):
+    backend = InotifyBackend(notebook_dir)
+    with Watcher(notebook_dir, backend=backend) as watcher:
+        write_note(notebook_dir / "Actions" / "20240103T101010.md", "# Third\n")
+        write_note(notebook_dir / "Reference" / "20240104T101010" / "index.md", "# Fourth\n")
+        for _ in range(5):
+            if watcher.step(timeout=1):
+                break
+        (notebook_dir / "Actions" / "20240101T101010.md").unlink()
+        watcher.step(timeout=1)
+    notes = indexed(notebook_dir)
+    assert notes["Actions/20240103T101010.md"] == "Third"
+    assert notes["Reference/20240104T101010/index.md"] == "Fourth"
+    assert "Actions/20240101T101010.md" not in notes